@@ -0,0 +1,184 @@
+"""
+Streaming batch prediction over many uploaded clips
+"""
+import asyncio
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional, Tuple, Union
+import logging
+
+from backend.schemas import BatchPredictionItem
+
+logger = logging.getLogger(__name__)
+
+# Archive members with other extensions (readmes, metadata) are skipped
+AUDIO_SUFFIXES = {".wav", ".flac", ".mp3", ".ogg", ".m4a", ".aiff", ".aif"}
+
+
+class ArchiveLimitExceeded(ValueError):
+    """An archive member, or the archive as a whole, extracts to more than allowed"""
+
+
+def _copy_member(src, target: Path, limit: Optional[int]) -> int:
+    """
+    Copy one member to target, returning the bytes written. Counts what is
+    actually decompressed rather than trusting the member's declared size,
+    and stops (removing target) as soon as limit is passed.
+    """
+    size = 0
+    with open(target, "wb") as dst:
+        while chunk := src.read(1024 * 1024):
+            size += len(chunk)
+            if limit is not None and size > limit:
+                break
+            dst.write(chunk)
+    if limit is not None and size > limit:
+        target.unlink(missing_ok=True)
+        raise ArchiveLimitExceeded(f"more than {limit} bytes")
+    return size
+
+
+def iter_archive(archive_path: Path, out_dir: Path,
+                 max_member_bytes: Optional[int] = None,
+                 max_total_bytes: Optional[int] = None
+                 ) -> Iterator[Tuple[str, Union[Path, ArchiveLimitExceeded]]]:
+    """
+    Extract audio members one at a time, yielding (member name, extracted path).
+
+    Members are written under out_dir by index, never by their own path,
+    so names like ``../../etc/passwd`` cannot escape it.
+
+    A member larger than max_member_bytes (by its header or once
+    decompressed) is not kept: it is yielded with an ArchiveLimitExceeded
+    in place of its path. Once max_total_bytes have been extracted in all,
+    ArchiveLimitExceeded is raised, so a zip bomb stops after that much.
+    """
+    index = 0
+    total = 0
+
+    def extract(name: str, declared: int, open_member, suffix: str):
+        nonlocal index, total
+        target = out_dir / f"{index:06d}{suffix}"
+        index += 1
+        if max_member_bytes is not None and declared > max_member_bytes:
+            return ArchiveLimitExceeded(f"Member exceeds {max_member_bytes} bytes")
+        limit = max_member_bytes
+        if max_total_bytes is not None:
+            remaining = max_total_bytes - total
+            if limit is None or remaining < limit:
+                limit = remaining
+        try:
+            with open_member() as src:
+                total += _copy_member(src, target, limit)
+        except ArchiveLimitExceeded:
+            if limit == max_member_bytes:
+                return ArchiveLimitExceeded(f"Member exceeds {max_member_bytes} bytes")
+            raise ArchiveLimitExceeded(
+                f"Archive extracts to more than {max_total_bytes} bytes; stopped at {name}"
+            )
+        return target
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                suffix = Path(info.filename).suffix.lower()
+                if info.is_dir() or suffix not in AUDIO_SUFFIXES:
+                    continue
+                yield info.filename, extract(info.filename, info.file_size,
+                                             lambda: archive.open(info), suffix)
+        return
+
+    if tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path) as archive:
+            for member in archive:
+                suffix = Path(member.name).suffix.lower()
+                if not member.isfile() or suffix not in AUDIO_SUFFIXES:
+                    continue
+                yield member.name, extract(member.name, member.size,
+                                           lambda: archive.extractfile(member), suffix)
+        return
+
+    raise ValueError("Archive must be a zip or tar file")
+
+
+async def _next_source(sources: Iterator[Tuple[str, Path]]):
+    # Archive extraction is disk work; keep it off the event loop
+    return await asyncio.to_thread(next, sources, None)
+
+
+async def stream_predictions(predict: Callable, sources: Iterator[Tuple[str, Path]],
+                             window: int,
+                             on_result: Optional[Callable] = None) -> AsyncIterator[str]:
+    """
+    Run predict(path) over sources, at most ``window`` at a time, and
+    yield one NDJSON line per clip in completion order, then a summary line.
+
+    Only the clips in the window are held at once, so memory and scratch
+    disk do not grow with the number of files: each clip is deleted once
+    its line is out. ``on_result(path, result)`` may instead take the clip
+    (e.g. hand it to the feedback writer) by returning a dict of extra
+    fields for its line. A source whose path is an exception gets an error
+    line of its own.
+    """
+    pending = {}
+    count = errors = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    source = await _next_source(sources)
+                except Exception as e:
+                    # A corrupt archive ends the stream after what was readable
+                    logger.error(f"Reading batch input failed: {e}")
+                    errors += 1
+                    yield BatchPredictionItem(error=f"Reading input failed: {e}").model_dump_json(
+                        exclude_none=True) + "\n"
+                    source = None
+                if source is None:
+                    exhausted = True
+                    break
+                if isinstance(source[1], Exception):
+                    # Skipped by the reader (e.g. over the size limit); the stream goes on
+                    errors += 1
+                    yield BatchPredictionItem(index=count, filename=source[0],
+                                              error=str(source[1])).model_dump_json(
+                        exclude_none=True) + "\n"
+                    count += 1
+                    continue
+                task = asyncio.ensure_future(predict(str(source[1])))
+                pending[task] = (count, source)
+                count += 1
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, (name, path) = pending.pop(task)
+                item = {"index": index, "filename": name}
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors += 1
+                    item["error"] = str(e) or type(e).__name__
+                else:
+                    item.update({key: result[key] for key in
+                                 ("prediction", "label_id", "confidence",
+                                  "probabilities", "model_version")})
+                    extra = await on_result(path, result) if on_result else None
+                    if extra:
+                        item.update(extra)
+                        path = None
+                if path is not None:
+                    path.unlink(missing_ok=True)
+                yield BatchPredictionItem(**item).model_dump_json(exclude_none=True) + "\n"
+
+        yield BatchPredictionItem(done=True, count=count,
+                                  errors=errors).model_dump_json(exclude_none=True) + "\n"
+    finally:
+        # Client disconnected or the server is stopping
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,199 @@
+"""
+Micro-batching of concurrent model evaluations
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+import numpy as np
+import logging
+
+import timing
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects feature vectors from concurrent requests and scores them with
+    one detector.predict_features_batch call.
+
+    One batch is evaluated at a time. Requests that arrive while one is
+    evaluated join the next batch, which closes as soon as the model is
+    free, or earlier at ``batch_max_size`` vectors. With the model idle and
+    nothing queued, a batch closes at once, so a lone request is not
+    delayed; ``batch_max_wait_ms`` > 0 instead keeps it open that long for
+    others to join.
+    """
+
+    def __init__(self, detector, config, executor=None):
+        self.detector = detector
+        self.max_size = config.batch_max_size
+        self.max_wait = config.batch_max_wait_ms / 1000
+        self.executor = executor  # where the model runs; None uses the loop default
+
+        self._queue = None
+        self._task = None
+        self._evaluation = None
+        self._metrics = {
+            "batches": 0,
+            "items": 0,
+            "failed_batches": 0,
+            "max_queue_depth": 0,
+            "queue_wait_seconds_sum": 0.0,
+            "batch_seconds_sum": 0.0,
+            "last_batch_size": 0,
+            # batch size -> number of batches
+            "batch_sizes": {}
+        }
+
+    def start(self):
+        """Start the collector task; call from the serving event loop"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, features: np.ndarray, audio_path: Optional[str] = None) -> Dict:
+        """Score one feature vector as part of the next batch"""
+        if self._task is None:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((features, audio_path, future, time.perf_counter(),
+                                timing.current()))
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"],
+                                               self._queue.qsize())
+        return await future
+
+    async def _collect(self, batch: list, evaluation: Optional[asyncio.Future]):
+        """Fill batch from the queue until it should be evaluated"""
+        batch.append(await self._queue.get())
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            if evaluation is not None and not evaluation.done():
+                # The model is busy, so this batch could not start yet
+                # anyway: keep taking arrivals until it is free
+                getter = asyncio.ensure_future(self._queue.get())
+                try:
+                    await asyncio.wait((getter, evaluation), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if getter.done() and not getter.cancelled():
+                        batch.append(getter.result())
+                    else:
+                        getter.cancel()
+                continue
+
+            # The model is idle: only linger if configured to
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        batch = []
+        try:
+            while True:
+                batch = []
+                await self._collect(batch, self._evaluation)
+                if self._evaluation is not None:
+                    # One batch is evaluated at a time
+                    await asyncio.shield(self._evaluation)
+                    self._evaluation = None
+                # Callers that went away no longer need a result
+                live = [item for item in batch if not item[2].done()]
+                if live:
+                    self._evaluation = asyncio.ensure_future(self._evaluate(live))
+        except asyncio.CancelledError:
+            # Taken from the queue but not yet handed to an evaluation
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Server shutting down"))
+            raise
+
+    async def _evaluate(self, batch):
+        started = time.perf_counter()
+        features = np.vstack([item[0] for item in batch])
+        audio_paths = [item[1] for item in batch]
+        # Only timed when one of the requests asked for its timings
+        spans = (timing.SpanRecorder()
+                 if any(item[4] is not None for item in batch) else None)
+
+        def evaluate():
+            if spans is None:
+                return self.detector.predict_features_batch(features, audio_paths,
+                                                            return_features=True)
+            with spans.activate():
+                return self.detector.predict_features_batch(features, audio_paths,
+                                                            return_features=True)
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, evaluate)
+        except asyncio.CancelledError:
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Server shutting down"))
+            raise
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} failed: {e}")
+            self._metrics["failed_batches"] += 1
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, enqueued, recorder), result in zip(batch, results):
+            if recorder is not None:
+                recorder.add("batch_wait", started - enqueued)
+                recorder.merge(spans)
+            if not future.done():
+                future.set_result(result)
+
+        size = len(batch)
+        metrics = self._metrics
+        metrics["batches"] += 1
+        metrics["items"] += size
+        metrics["last_batch_size"] = size
+        metrics["batch_sizes"][size] = metrics["batch_sizes"].get(size, 0) + 1
+        metrics["queue_wait_seconds_sum"] += sum(started - item[3] for item in batch)
+        metrics["batch_seconds_sum"] += time.perf_counter() - started
+
+    def get_metrics(self) -> Dict:
+        metrics = dict(self._metrics)
+        metrics["batch_sizes"] = dict(sorted(metrics["batch_sizes"].items()))
+        batches, items = metrics["batches"], metrics["items"]
+        metrics.update({
+            "max_batch_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": items / batches if batches else None,
+            "mean_queue_wait_seconds": metrics["queue_wait_seconds_sum"] / items if items else None,
+            "mean_batch_seconds": metrics["batch_seconds_sum"] / batches if batches else None
+        })
+        return metrics
+
+    async def close(self):
+        """Stop collecting; requests still queued fail"""
+        if self._task is None:
+            return
+        for task in (self._task, self._evaluation):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._evaluation = None
+
+        while not self._queue.empty():
+            _, _, future, _, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Server shutting down"))
@@ -0,0 +1,335 @@
+"""
+Runs predictions off the asyncio event loop
+"""
+import asyncio
+import contextvars
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+import logging
+
+import metrics
+import timing
+from feature_extractor import AudioFeatureExtractor
+from backend.batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MODES = ("thread", "process", "inline")
+
+_worker_extractor = None
+
+
+def _init_worker(config):
+    global _worker_extractor
+    _worker_extractor = AudioFeatureExtractor(config)
+
+
+def _extract_features(audio_path: str):
+    return _worker_extractor.extract_features(audio_path)
+
+
+class Overloaded(Exception):
+    """No inference slot is available soon enough; retry after retry_after seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Executes detector.predict for the API.
+
+    Modes:
+    - "thread": the whole prediction runs on a pool of
+      ``inference_workers`` threads. Decoding and MFCC work in librosa and
+      numpy release the GIL for much of their time.
+    - "process": decoding and feature extraction run in
+      ``inference_workers`` spawned processes, so they are not bound by the
+      GIL; the model step stays in this process, which keeps hot reload and
+      shadow scoring working unchanged.
+    - "inline": runs on the event loop (blocking it); only useful as a
+      baseline for load tests.
+
+    At most ``inference_max_concurrency`` predictions run at once; further
+    requests wait (asynchronously) for a slot. Admission control bounds
+    that wait: with ``inference_max_queue`` requests already waiting a new
+    one is refused at once, and one that has waited
+    ``inference_queue_timeout`` seconds gives up. Both raise Overloaded.
+
+    With ``batch_max_size`` > 1 (thread and process modes), the model step
+    of concurrent requests goes through a MicroBatcher, so the forest runs
+    once per batch instead of once per request.
+
+    Sampled profiles (detector.profiler) cover the decode and model work
+    done in this process; in process mode decoding runs in the workers and
+    only shows up as time spent waiting.
+    """
+
+    def __init__(self, detector, config):
+        if config.inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {config.inference_mode}. "
+                             f"Choose one of {INFERENCE_MODES}")
+
+        self.detector = detector
+        self.config = config
+        self.mode = config.inference_mode
+        self.workers = config.inference_workers
+        self.batching = config.inference_mode != "inline" and config.batch_max_size > 1
+        # Requests waiting for a batch to fill hold a slot but no CPU, so
+        # leave room for a full batch on top of the busy workers
+        self.max_concurrency = config.inference_max_concurrency or (
+            self.workers + (config.batch_max_size if self.batching else 0)
+        )
+
+        self.max_queue = config.inference_max_queue
+        self.queue_timeout = config.inference_queue_timeout or None
+
+        self._threads = None
+        self._processes = None
+        self._batcher = None
+        self._semaphore = None  # created on the serving loop in start()
+
+        self._lock = threading.Lock()
+        self._metrics = {
+            "completed": 0,
+            "failed": 0,
+            "cache_hits": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "max_waiting": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "wait_seconds_sum": 0.0,
+            "run_seconds_sum": 0.0
+        }
+
+    def start(self):
+        """Create the pools; call from the serving event loop"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self.mode in ("thread", "process") and self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix="inference")
+        if self.mode == "process" and self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.config,)
+            )
+        if self.batching and self._batcher is None:
+            self._batcher = MicroBatcher(self.detector, self.config, executor=self._threads)
+            self._batcher.start()
+        logger.info(f"Inference executor: {self.mode}, {self.workers} workers, "
+                    f"{self.max_concurrency} concurrent")
+
+    def saturated(self) -> bool:
+        """True when a new request would be refused for a full queue"""
+        with self._lock:
+            waiting = self._metrics["waiting"]
+        return (self.max_queue > 0 and self._semaphore is not None
+                and self._semaphore.locked() and waiting >= self.max_queue)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained, for Retry-After"""
+        with self._lock:
+            waiting = self._metrics["waiting"]
+            done = self._metrics["completed"] + self._metrics["failed"]
+            run_seconds = self._metrics["run_seconds_sum"]
+        mean_run = run_seconds / done if done else 1.0
+        return max(1, min(60, math.ceil((waiting + 1) * mean_run / self.max_concurrency)))
+
+    def reject(self, reason: str) -> Overloaded:
+        with self._lock:
+            self._metrics[f"rejected_{reason}"] += 1
+        metrics.inc(f"rejected_{reason}")
+        return Overloaded(reason.replace("_", " "), self.retry_after())
+
+    async def predict(self, audio_path: str, digest: Optional[str] = None,
+                      admission: bool = True) -> Dict:
+        """
+        detector.predict(audio_path, return_features=True), off the loop.
+
+        Given the sha256 of the file, a cached result is returned right
+        away, without waiting for a slot, and new results are cached.
+
+        Raises Overloaded when admission control refuses the request;
+        admission=False waits for a slot however long it takes (for
+        callers that bound their own concurrency, like /predict/batch).
+        """
+        if self._semaphore is None:
+            self.start()
+
+        if digest is not None:
+            cached = self.detector.get_cached_prediction(digest, audio_path, return_features=True)
+            if cached is not None:
+                with self._lock:
+                    self._metrics["cache_hits"] += 1
+                return cached
+
+        result = await self._with_slot(self._run(audio_path), admission)
+        if digest is not None:
+            self.detector.prediction_cache.put(digest, result)
+        return result
+
+    async def predict_signal(self, y: np.ndarray, sr: int, admission: bool = True) -> Dict:
+        """detector.predict_signal(y, sr, return_features=True), off the loop"""
+        if self._semaphore is None:
+            self.start()
+        return await self._with_slot(self._run_signal(y, sr), admission)
+
+    async def predict_features(self, features: np.ndarray, admission: bool = True) -> List[Dict]:
+        """Score validated feature rows, off the loop; one result per row"""
+        if self._semaphore is None:
+            self.start()
+        return await self._with_slot(self._run_features(features), admission)
+
+    async def _with_slot(self, work, admission: bool):
+        """Await the coroutine ``work`` once a slot is free, with admission control"""
+        try:
+            if admission and self.saturated():
+                raise self.reject("queue_full")
+
+            queued = time.perf_counter()
+            with self._lock:
+                self._metrics["waiting"] += 1
+                self._metrics["max_waiting"] = max(self._metrics["max_waiting"],
+                                                   self._metrics["waiting"])
+
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(),
+                                       self.queue_timeout if admission else None)
+            except asyncio.TimeoutError:
+                raise self.reject("timeout") from None
+            finally:
+                # Also reached when the client goes away while queued
+                with self._lock:
+                    self._metrics["waiting"] -= 1
+        except BaseException:
+            work.close()
+            raise
+
+        started = time.perf_counter()
+        with self._lock:
+            self._metrics["in_flight"] += 1
+            self._metrics["wait_seconds_sum"] += started - queued
+        metrics.observe("queue", started - queued)
+
+        try:
+            result = await work
+        except Exception:
+            with self._lock:
+                self._metrics["failed"] += 1
+            raise
+        else:
+            with self._lock:
+                self._metrics["completed"] += 1
+            return result
+        finally:
+            self._semaphore.release()
+            with self._lock:
+                self._metrics["in_flight"] -= 1
+                self._metrics["run_seconds_sum"] += time.perf_counter() - started
+
+    def _predict_file(self, audio_path: str) -> Dict:
+        # detector.predict without its own cache lookup; predict() did that
+        with self.detector.profiler.sample("predict"):
+            features = self.detector.feature_extractor.extract_features(audio_path)
+            return self.detector.predict_features(features, audio_path, return_features=True)
+
+    def _extract_file(self, audio_path: str) -> np.ndarray:
+        # The model step of a micro-batched request runs in the batcher, so
+        # a sampled profile covers decoding and MFCC only
+        with self.detector.profiler.sample("featurize"):
+            return self.detector.feature_extractor.extract_features(audio_path)
+
+    def _in_thread(self, fn, *args):
+        """fn(*args) on the thread pool, seeing the caller's span recorder"""
+        loop = asyncio.get_running_loop()
+        if timing.current() is not None:
+            return loop.run_in_executor(self._threads, contextvars.copy_context().run, fn, *args)
+        return loop.run_in_executor(self._threads, fn, *args)
+
+    async def _run(self, audio_path: str) -> Dict:
+        if self.mode == "inline":
+            return self._predict_file(audio_path)
+
+        if self.mode == "thread" and self._batcher is None:
+            return await self._in_thread(self._predict_file, audio_path)
+
+        if self.mode == "thread":
+            features = await self._in_thread(self._extract_file, audio_path)
+        else:
+            # Decode, resample and MFCC happen in the worker process and
+            # show up as one span
+            with metrics.stage("featurize"):
+                features = await asyncio.get_running_loop().run_in_executor(
+                    self._processes, _extract_features, audio_path
+                )
+
+        return await self._score(features, audio_path)
+
+    async def _run_signal(self, y: np.ndarray, sr: int) -> Dict:
+        extract = self.detector.feature_extractor.extract_features_from_signal
+        if self.mode == "inline":
+            features = extract(y, sr)
+        else:
+            # MFCC of an in-memory signal is cheap to hand to a thread;
+            # shipping the samples to a worker process would cost more
+            features = await self._in_thread(extract, y, sr)
+        return await self._score(features)
+
+    async def _run_features(self, features: np.ndarray) -> List[Dict]:
+        if len(features) == 1 and self._batcher is not None:
+            return [await self._batcher.submit(features[0])]
+        if self.mode == "inline":
+            return self.detector.predict_features_batch(features)
+        return await self._in_thread(self.detector.predict_features_batch, features)
+
+    async def _score(self, features: np.ndarray, audio_path: Optional[str] = None) -> Dict:
+        """The model step for one feature vector"""
+        if self._batcher is not None:
+            return await self._batcher.submit(features, audio_path)
+        if self.mode == "inline":
+            return self.detector.predict_features(features, audio_path, return_features=True)
+        return await self._in_thread(
+            lambda: self.detector.predict_features(features, audio_path, return_features=True)
+        )
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        done = metrics["completed"] + metrics["failed"]
+        metrics.update({
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "mean_wait_seconds": metrics["wait_seconds_sum"] / done if done else None,
+            "mean_run_seconds": metrics["run_seconds_sum"] / done if done else None
+        })
+        if self._batcher is not None:
+            metrics["batching"] = self._batcher.get_metrics()
+        return metrics
+
+    async def close(self):
+        if self._batcher is not None:
+            await self._batcher.close()
+            self._batcher = None
+        await asyncio.to_thread(self._shutdown_pools)
+
+    def _shutdown_pools(self):
+        if self._processes is not None:
+            self._processes.shutdown(wait=True)
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+            self._threads = None
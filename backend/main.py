@@ -1,9 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import time
+# Measured before the heavy imports below, for the cold-start breakdown
+PROCESS_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from src.facade import GenderDetectionFacade
-from backend.schemas import PredictionResponse, FeedbackRequest
-import uuid6
+import metrics
+import timing
+from feedback_manager import FeedbackItem
+from backend.schemas import (PredictionResponse, FeedbackRequest, FeaturesRequest,
+                             FeaturePrediction, FeaturesPredictionResponse, ProfilingRequest)
+from backend.inference import InferenceExecutor, Overloaded
+from backend.batch_predict import iter_archive, stream_predictions
+import asyncio
+import hashlib
 import shutil
+import tarfile
+import uuid
+import zipfile
+import uuid6
+import numpy as np
+import soundfile as sf
 from pathlib import Path
+from typing import List, Optional
 import os
 import logging
 
@@ -11,11 +30,24 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+IMPORTED = time.perf_counter()
+
 app = FastAPI(title="Gender Detection API")
 
 # Initialize Facade
 # We generally want to load the model once at startup
 detector = GenderDetectionFacade()
+inference = InferenceExecutor(detector, detector.config)
+INITIALIZED = time.perf_counter()
+metrics.REGISTRY.configure(detector.config)
+# Load signals for autoscaling, next to the rejection counters
+metrics.REGISTRY.add_gauge("inference_in_flight", "Predictions running",
+                           lambda: inference.get_metrics()["in_flight"])
+metrics.REGISTRY.add_gauge("inference_waiting", "Predictions waiting for a slot",
+                           lambda: inference.get_metrics()["waiting"])
+
+# Uploads are read this many bytes at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 if not detector.is_model_trained():
     logger.warning("No trained model found. Please train the model first.")
     # You might want to trigger training here or just warn
@@ -23,6 +55,77 @@ if not detector.is_model_trained():
     # But for the API to work, we need a model.
     # We can try to load it or fail gracefully.
 
+async def watch_model_artifacts(interval: float):
+    """Poll the model artifacts and hot-swap the model when they change"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Loading runs in a worker thread; requests keep using the old model
+            if await asyncio.to_thread(detector.reload_if_changed):
+                logger.info(f"Serving model version {detector.model_version}")
+                schedule_warm_up()
+        except Exception as e:
+            logger.error(f"Model reload failed, keeping current model: {e}")
+        # Retries a failed warm-up, and catches models that appeared another way
+        if not readiness["ready"]:
+            schedule_warm_up()
+
+# Readiness: set once a model is loaded and warmed up (see /ready)
+readiness = {"ready": False, "reason": "starting", "cold_start": None}
+
+async def warm_up_model():
+    """
+    Load the active model eagerly and run warm-up inferences, then report
+    ready. Once ready, a later call only warms up the (new) model and
+    /ready keeps answering 200 meanwhile.
+    """
+    if not detector.is_model_trained():
+        readiness["reason"] = "model not trained"
+        return
+    
+    was_ready = readiness["ready"]
+    if not was_ready:
+        readiness["reason"] = "warming up"
+    try:
+        timings = await asyncio.to_thread(detector.warm_up)
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        if not was_ready:
+            readiness["reason"] = f"warm-up failed: {e}"
+        return
+    
+    if was_ready:
+        logger.info(f"Warmed up model version {detector.model_version}")
+        return
+    
+    now = time.perf_counter()
+    cold_start = {
+        "import_seconds": IMPORTED - PROCESS_STARTED,
+        "init_seconds": INITIALIZED - IMPORTED,
+        **timings,
+        "ready_after_seconds": now - PROCESS_STARTED
+    }
+    readiness.update(ready=True, reason=None, cold_start=cold_start)
+    first = timings.get("first", {})
+    logger.info(
+        f"Ready after {cold_start['ready_after_seconds']:.2f}s: imports {cold_start['import_seconds']:.2f}s, "
+        f"init {cold_start['init_seconds']:.2f}s, model load {timings['load_seconds']:.2f}s"
+        + (f", first inference {first['total_seconds']:.3f}s (decode {first['decode_seconds']:.3f}s, "
+           f"mfcc {first['mfcc_seconds']:.3f}s, model {first['model_seconds']:.3f}s), "
+           f"warm {timings['warm']['total_seconds']:.3f}s" if first else "")
+    )
+
+def schedule_warm_up():
+    """
+    Warm up in the background unless a warm-up is already running. Called
+    at startup and whenever a model becomes active (watcher reload,
+    /admin/reload, promotion), and by /ready and the watcher while not
+    ready, so a model trained after startup or a failed warm-up is picked up.
+    """
+    task = getattr(app.state, "warm_up", None)
+    if task is None or task.done():
+        app.state.warm_up = asyncio.create_task(warm_up_model())
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up Gender Detection API")
@@ -30,16 +133,127 @@ async def startup_event():
         detector.get_model_info() # Triggers loading config
     else:
         logger.warning("Model not trained.")
+    
+    # Runs in the background so /health answers while the model warms up
+    schedule_warm_up()
+    
+    if detector.model_persistence.candidate_exists():
+        await asyncio.to_thread(detector.load_candidate_model)
+    
+    inference.start()
+    detector.feedback_writer.start()
+    detector.retrain_scheduler.start()
+    
+    interval = detector.config.model_watch_interval
+    if interval > 0:
+        app.state.model_watcher = asyncio.create_task(watch_model_artifacts(interval))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in (getattr(app.state, "model_watcher", None), getattr(app.state, "warm_up", None)):
+        if task is not None:
+            task.cancel()
+    await inference.close()
+    # Drains queued feedback before the process exits
+    await asyncio.to_thread(detector.close)
+
+# Multipart framing and headers on top of the clip itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+def max_upload_bytes() -> int:
+    return int(detector.config.max_upload_mb * 1024 * 1024)
+
+def overloaded_response(e: Overloaded) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(e)},
+                        headers={"Retry-After": str(e.retry_after)})
+
+async def save_upload(upload: UploadFile, path: Path, max_bytes: Optional[int] = None) -> str:
+    """
+    Copy an upload into path without blocking the event loop; returns its
+    sha256. Raises a 413 once more than max_bytes have been read.
+
+    Starlette has already spooled the whole multipart body (to memory, then
+    a temp file) while parsing the form, so max_bytes bounds what lands in
+    temp_uploads, not what was received; requests declaring too large a
+    Content-Length are refused earlier by admission_control.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as buffer:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                metrics.inc("rejected_upload_too_large")
+                raise HTTPException(status_code=413,
+                                    detail=f"Upload exceeds {detector.config.max_upload_mb} MB")
+            digest.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+    return digest.hexdigest()
+
+# Single-prediction endpoints guarded by admission control
+ADMITTED_PATHS = ("/predict", "/predict/pcm", "/predict/features")
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """
+    Refuse prediction requests before their body is read: oversized ones
+    by Content-Length, and all of them while the inference queue is full.
+    Nothing is spooled to memory or temp_uploads for a refused request.
+    Chunked uploads carry no Content-Length; save_upload catches those,
+    after Starlette has spooled them.
+    """
+    if request.method == "POST" and request.url.path in ADMITTED_PATHS:
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_upload_bytes() + MULTIPART_OVERHEAD:
+            metrics.inc("rejected_upload_too_large")
+            return JSONResponse(status_code=413, content={
+                "detail": f"Upload exceeds {detector.config.max_upload_mb} MB"
+            })
+        if inference.saturated():
+            return overloaded_response(inference.reject("queue_full"))
+    return await call_next(request)
+
+# Registered last, so it is the outermost middleware and also times
+# requests refused by admission control
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    if not metrics.REGISTRY.enabled:
+        return await call_next(request)
+    
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template, not the raw path, keeps the label set bounded;
+        # requests refused before routing are labelled with their path
+        route = request.scope.get("route")
+        if route is not None:
+            label = route.path
+        else:
+            label = request.url.path if status in (413, 503) else "unmatched"
+        metrics.REGISTRY.request_seconds.observe(time.perf_counter() - start, label, status)
 
 @app.get("/test")
 def test_endpoint():
     return {"message": "Backend is running"}
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(file: UploadFile = File(...)):
+async def predict(file: UploadFile = File(...), timings: bool = False):
     """
     Upload an audio file for gender prediction.
     Automatically saves the result as 'presumed correct' in feedback data.
+    
+    With ?timings=true the response includes the seconds this request
+    spent in each stage (upload, queue, decode, resample, mfcc, batch_wait,
+    scale, model, feedback_enqueue) and in total. feedback_enqueue only
+    covers handing the clip to the feedback writer; the write itself
+    happens after the response (see FeedbackWriter).
     """
     request_id = str(uuid6.uuid7())
     
@@ -47,67 +261,457 @@ async def predict(file: UploadFile = File(...)):
     temp_dir = Path("temp_uploads")
     temp_dir.mkdir(exist_ok=True)
     file_path = temp_dir / f"{request_id}{Path(file.filename).suffix}"
+    handed_off = False
     
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Predict
-        # We need to ensure the model is loaded. 
-        # The facade loads it on first predict call if not loaded.
+    # Stages of this request are recorded while a recorder is active
+    with timing.recording(timings) as spans:
         try:
-            result = detector.predict(str(file_path))
-        except Exception as e:
-            logger.error(f"Prediction error: {e}")
-            raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
-        
-        # Save as feedback (presumed correct)
-        # We assume the prediction is correct initially
-        predicted_label_id = result["label_id"]
-        
-        # Save to feedback system
-        saved_path = detector.feedback_manager.save_feedback(
-            audio_path=str(file_path),
-            predicted_label=predicted_label_id,
-            correct_label=predicted_label_id, # Presumed correct
+            with metrics.stage("upload"):
+                digest = await save_upload(file, file_path, max_upload_bytes())
+            
+            # Predict
+            # Decoding and the model run on the inference executor, so other
+            # requests keep being served meanwhile; a clip seen before is
+            # answered from the prediction cache
+            try:
+                result = await inference.predict(str(file_path), digest)
+            except Overloaded as e:
+                return overloaded_response(e)
+            except Exception as e:
+                logger.error(f"Prediction error: {e}")
+                raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+            
+            # Save as feedback (presumed correct)
+            # We assume the prediction is correct initially
+            predicted_label_id = result["label_id"]
+            
+            # Hand the upload to the background writer; it moves the file into
+            # the feedback store, so the response does not wait on disk
+            # (submit only blocks when the queue is full and it writes inline)
+            with metrics.stage("feedback_enqueue"):
+                await asyncio.to_thread(detector.feedback_writer.submit, FeedbackItem(
+                    audio_path=str(file_path),
+                    predicted_label=predicted_label_id,
+                    correct_label=predicted_label_id, # Presumed correct
+                    confidence=result["confidence"],
+                    request_id=request_id,
+                    content_hash=digest,
+                    # Stored so retraining does not decode this clip again
+                    features=result["features"],
+                    feature_params=detector.feature_extractor.get_params(),
+                    move=True
+                ))
+            handed_off = True
+            
+            # Construct response
+            return PredictionResponse(
+                request_id=request_id,
+                prediction=result["prediction"],
+                label_id=result["label_id"],
+                confidence=result["confidence"],
+                probabilities=result["probabilities"],
+                audio_path=str(file_path), # Returning the temp path or saved path? 
+                                           # Maybe clear to return request_id as primary ref
+                model_version=result["model_version"],
+                timings=spans.to_dict() if spans is not None else None
+            )
+            
+        finally:
+            # Once handed to the feedback writer the temp file is its to move
+            if not handed_off and file_path.exists():
+                file_path.unlink()
+
+# Sample formats accepted by /predict/pcm, as little-endian numpy dtypes
+PCM_DTYPES = {"float32": np.dtype("<f4"), "int16": np.dtype("<i2")}
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """The raw request body, refusing more than max_bytes"""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            metrics.inc("rejected_upload_too_large")
+            raise HTTPException(status_code=413,
+                                detail=f"Upload exceeds {detector.config.max_upload_mb} MB")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def decode_pcm(body: bytes, dtype: str) -> np.ndarray:
+    """Raw mono little-endian samples as float32 in [-1, 1]"""
+    if dtype not in PCM_DTYPES:
+        raise ValueError(f"dtype must be one of {sorted(PCM_DTYPES)}")
+    sample_format = PCM_DTYPES[dtype]
+    if not body or len(body) % sample_format.itemsize:
+        raise ValueError(f"Body must be a non-empty sequence of {dtype} samples "
+                         f"({sample_format.itemsize} bytes each)")
+    
+    samples = np.frombuffer(body, dtype=sample_format)
+    if dtype == "int16":
+        return samples.astype(np.float32) / 32768.0
+    if not np.isfinite(samples).all():
+        raise ValueError("Samples must be finite numbers")
+    return samples.astype(np.float32)
+
+@app.post("/predict/pcm", response_model=PredictionResponse)
+async def predict_pcm(request: Request, dtype: str = "float32",
+                      sample_rate: Optional[int] = None):
+    """
+    Predict from raw mono PCM sent as the request body
+    (application/octet-stream), little-endian float32 or int16 samples at
+    sample_rate (default: the model's rate; other rates are resampled).
+    Skips file decoding. The clip is saved as presumed-correct feedback
+    like /predict.
+    """
+    request_id = str(uuid6.uuid7())
+    sample_rate = sample_rate or detector.config.sample_rate
+    if not 8000 <= sample_rate <= 192000:
+        raise HTTPException(status_code=422, detail="sample_rate must be between 8000 and 192000")
+    
+    with metrics.stage("upload"):
+        body = await read_body(request, max_upload_bytes())
+    try:
+        y = decode_pcm(body, dtype)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        result = await inference.predict_signal(y, sample_rate)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    
+    # Kept as a wav so feedback, compaction and retraining treat it like
+    # any uploaded clip
+    temp_dir = Path("temp_uploads")
+    temp_dir.mkdir(exist_ok=True)
+    file_path = temp_dir / f"{request_id}.wav"
+    try:
+        await asyncio.to_thread(sf.write, str(file_path), y, sample_rate, subtype="FLOAT")
+        with metrics.stage("feedback_enqueue"):
+            await asyncio.to_thread(detector.feedback_writer.submit, FeedbackItem(
+                audio_path=str(file_path),
+                predicted_label=result["label_id"],
+                correct_label=result["label_id"],  # Presumed correct
+                confidence=result["confidence"],
+                request_id=request_id,
+                features=result["features"],
+                feature_params=detector.feature_extractor.get_params(),
+                move=True
+            ))
+    except Exception as e:
+        # The prediction stands even if its feedback copy could not be kept
+        logger.error(f"Saving PCM feedback failed: {e}")
+        file_path.unlink(missing_ok=True)
+    
+    return PredictionResponse(
+        request_id=request_id,
+        prediction=result["prediction"],
+        label_id=result["label_id"],
+        confidence=result["confidence"],
+        probabilities=result["probabilities"],
+        audio_path=str(file_path),
+        model_version=result["model_version"]
+    )
+
+@app.post("/predict/features", response_model=FeaturesPredictionResponse)
+async def predict_features(request: FeaturesRequest):
+    """
+    Predict from feature vectors computed on the client: the MFCC means
+    followed by the MFCC standard deviations, as produced by
+    AudioFeatureExtractor. Send one vector or a list of up to
+    max_feature_rows. No audio is received, so nothing is stored as
+    feedback.
+    """
+    if not detector.is_model_trained():
+        raise HTTPException(status_code=503, detail="Model not trained")
+    
+    try:
+        features = await asyncio.to_thread(detector.validate_features, request.features)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if len(features) > detector.config.max_feature_rows:
+        raise HTTPException(status_code=422, detail=f"At most {detector.config.max_feature_rows} "
+                                                    f"vectors per request")
+    
+    try:
+        results = await inference.predict_features(features)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    
+    return FeaturesPredictionResponse(predictions=[
+        FeaturePrediction(**{key: result[key] for key in FeaturePrediction.model_fields})
+        for result in results
+    ])
+
+@app.post("/predict/batch")
+async def predict_batch(files: Optional[List[UploadFile]] = File(None),
+                        archive: Optional[UploadFile] = File(None),
+                        save_feedback: bool = Form(False)):
+    """
+    Predict many clips, sent as repeated `files` parts or as one zip/tar
+    `archive`. Results stream back as NDJSON, one line per clip in the
+    order clips finish, followed by a {"done": true, ...} summary line.
+    
+    With save_feedback=true each clip is also stored as presumed-correct
+    feedback and its line carries the request_id for later correction.
+    """
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="Send `files` or an `archive`")
+    
+    batch_dir = Path("temp_uploads") / f"batch-{uuid6.uuid7()}"
+    batch_dir.mkdir(parents=True)
+    
+    try:
+        # Uploads are closed once this handler returns, so they are
+        # spooled to disk before streaming starts
+        if archive is not None:
+            archive_path = batch_dir / "archive"
+            await save_upload(archive, archive_path, max_upload_bytes())
+            is_archive = await asyncio.to_thread(
+                lambda: zipfile.is_zipfile(archive_path) or tarfile.is_tarfile(archive_path)
+            )
+            if not is_archive:
+                raise HTTPException(status_code=400, detail="Archive must be a zip or tar file")
+            members_dir = batch_dir / "members"
+            members_dir.mkdir()
+            sources = iter_archive(archive_path, members_dir,
+                                   max_member_bytes=max_upload_bytes(),
+                                   max_total_bytes=int(detector.config.max_archive_extract_mb * 1024 * 1024))
+        else:
+            saved = []
+            for index, upload in enumerate(files):
+                path = batch_dir / f"{index:06d}{Path(upload.filename or '').suffix}"
+                await save_upload(upload, path, max_upload_bytes())
+                saved.append((upload.filename, path))
+            sources = iter(saved)
+    except BaseException:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise
+    
+    async def hand_to_feedback(path: Path, result: dict):
+        request_id = str(uuid6.uuid7())
+        # Out of batch_dir, which is removed when the stream ends while the
+        # writer may still be queueing this clip
+        owned_path = batch_dir.parent / f"{request_id}{path.suffix}"
+        os.replace(path, owned_path)
+        await asyncio.to_thread(detector.feedback_writer.submit, FeedbackItem(
+            audio_path=str(owned_path),
+            predicted_label=result["label_id"],
+            correct_label=result["label_id"],  # Presumed correct
             confidence=result["confidence"],
-            request_id=request_id
-        )
-        
-        # Construct response
-        return PredictionResponse(
             request_id=request_id,
-            prediction=result["prediction"],
-            label_id=result["label_id"],
-            confidence=result["confidence"],
-            probabilities=result["probabilities"],
-            audio_path=str(file_path) # Returning the temp path or saved path? 
-                                      # Maybe clear to return request_id as primary ref
-        )
-        
-    finally:
-        # Clean up temp file? 
-        # feedback_manager.save_feedback copies the file. 
-        # So we can remove the temp file.
-        if file_path.exists():
-            file_path.unlink()
+            features=result["features"],
+            feature_params=detector.feature_extractor.get_params(),
+            move=True
+        ))
+        return {"request_id": request_id}
+    
+    async def body():
+        try:
+            # The window bounds this batch's share of the executor, so its
+            # clips wait for slots instead of being refused
+            predict = lambda path: inference.predict(path, admission=False)
+            async for line in stream_predictions(predict, sources,
+                                                 window=inference.max_concurrency,
+                                                 on_result=hand_to_feedback if save_feedback else None):
+                yield line
+        finally:
+            # Clips handed to the feedback writer were moved out already
+            await asyncio.to_thread(shutil.rmtree, batch_dir, True)
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+def issued_within(request_id: str, seconds: float) -> bool:
+    """True for a request_id this API minted (a uuid7) less than ``seconds`` ago"""
+    try:
+        value = uuid.UUID(request_id)
+    except ValueError:
+        return False
+    if value.version != 7:
+        return False
+    # A uuid7 starts with its creation time in Unix milliseconds
+    age = time.time() - (value.int >> 80) / 1000
+    return 0 <= age < seconds
 
 @app.post("/feedback")
 async def submit_feedback(feedback: FeedbackRequest):
     """
     Correct a prediction if it was wrong.
     """
-    success = detector.feedback_manager.update_feedback(
-        request_id=feedback.request_id,
-        new_correct_label=feedback.correct_label,
-        user_id=feedback.user_id
-    )
+    # The original save may still be queued in the feedback writer
+    if detector.feedback_writer.is_pending(feedback.request_id):
+        await asyncio.to_thread(detector.feedback_writer.flush,
+                                detector.config.feedback_flush_interval * 10)
+    
+    # Under backend.serve another worker may have answered the prediction,
+    # and its writer may not have flushed the save yet
+    patience = detector.config.feedback_flush_interval * 10
+    while True:
+        try:
+            success = await asyncio.to_thread(
+                detector.feedback_manager.update_feedback,
+                request_id=feedback.request_id,
+                new_correct_label=feedback.correct_label,
+                user_id=feedback.user_id
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if success or not issued_within(feedback.request_id, patience):
+            break
+        await asyncio.sleep(detector.config.feedback_flush_interval)
     
     if not success:
         raise HTTPException(status_code=404, detail="Request ID not found")
         
     return {"message": "Feedback updated successfully"}
 
+@app.post("/admin/reload")
+async def reload_model():
+    """
+    Load the model artifacts from disk and swap them in without downtime.
+    """
+    if not detector.is_model_trained():
+        raise HTTPException(status_code=404, detail="No trained model found")
+    
+    try:
+        version = await asyncio.to_thread(detector.reload_model)
+    except Exception as e:
+        logger.error(f"Model reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
+    
+    schedule_warm_up()
+    return {"message": "Model reloaded", "model_version": version}
+
+@app.get("/admin/shadow")
+def shadow_stats():
+    """
+    Agreement and latency statistics of the shadowed candidate model.
+    """
+    return detector.get_shadow_stats()
+
+@app.post("/admin/shadow/load")
+async def load_candidate():
+    """
+    Start shadow scoring the candidate model saved in the artifacts.
+    """
+    version = await asyncio.to_thread(detector.load_candidate_model)
+    if version is None:
+        raise HTTPException(status_code=404, detail="No candidate model found")
+    
+    return {"message": "Candidate loaded", "candidate_version": version}
+
+@app.post("/admin/shadow/promote")
+async def promote_candidate():
+    """
+    Replace the active model with the shadowed candidate.
+    """
+    try:
+        version = await asyncio.to_thread(detector.promote_candidate)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    schedule_warm_up()
+    return {"message": "Candidate promoted", "model_version": version}
+
+@app.get("/admin/feedback-writer")
+def feedback_writer_metrics():
+    """
+    Queue depth and throughput of the background feedback writer.
+    """
+    return detector.feedback_writer.get_metrics()
+
+@app.get("/admin/prediction-cache")
+def prediction_cache_metrics():
+    """
+    Hit rate, size and evictions of the prediction cache.
+    """
+    return detector.prediction_cache.get_metrics()
+
+@app.get("/admin/inference")
+def inference_metrics():
+    """
+    Concurrency and queueing of the inference executor.
+    """
+    return inference.get_metrics()
+
+@app.get("/admin/profiling")
+def profiling_status():
+    """
+    Sample rate of the per-request profiler and the reports it has written.
+    """
+    return detector.profiler.get_status()
+
+@app.post("/admin/profiling")
+def set_profiling(request: ProfilingRequest):
+    """
+    Profile this fraction of predictions (0 turns profiling off). Applies
+    to the process that answers; under the pre-fork server, set
+    GENDER_DETECTION_PROFILE_RATE before starting to reach every worker.
+    """
+    try:
+        detector.profiler.set_sample_rate(request.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return detector.profiler.get_status()
+
+@app.get("/admin/retrain")
+def retrain_status():
+    """
+    State of the retraining scheduler and the result of its last job.
+    """
+    return detector.retrain_scheduler.get_status()
+
+@app.post("/admin/retrain")
+def trigger_retrain():
+    """
+    Start a retraining job now, regardless of the feedback thresholds.
+    """
+    if not detector.retrain_scheduler.trigger():
+        raise HTTPException(status_code=409, detail="A retraining job is already running")
+    
+    return {"message": "Retraining started", **detector.retrain_scheduler.get_status()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Stage latency histograms and counters in Prometheus text format.
+    """
+    if not metrics.REGISTRY.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.REGISTRY.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the model is loaded and warmed up, so a
+    load balancer only routes traffic to a replica that answers fast.
+    /health is the liveness probe and answers as soon as the process runs.
+    
+    While not ready, each probe starts a warm-up if none is running, so a
+    model trained after startup or a failed warm-up recovers on its own.
+    """
+    if not readiness["ready"]:
+        schedule_warm_up()
+        return JSONResponse(status_code=503, content={"ready": False,
+                                                      "reason": readiness["reason"]})
+    return {
+        "ready": True,
+        "model_version": detector.model_version,
+        "cold_start": readiness["cold_start"]
+    }
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "model_trained": detector.is_model_trained()}
+    return {
+        "status": "healthy",
+        "model_trained": detector.is_model_trained(),
+        "model_version": detector.model_version
+    }
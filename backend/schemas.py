@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 
 class PredictionResponse(BaseModel):
     request_id: str
@@ -7,9 +7,45 @@ class PredictionResponse(BaseModel):
     label_id: int
     confidence: float
     probabilities: Dict[str, float]
-    audio_path: str
+    audio_path: Optional[str] = None
+    model_version: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None  # seconds per stage, with ?timings=true
 
 class FeedbackRequest(BaseModel):
     request_id: str
     correct_label: int
     user_id: Optional[str] = None
+
+class BatchPredictionItem(BaseModel):
+    """One NDJSON line of /predict/batch; the last line has done=True"""
+    index: Optional[int] = None
+    filename: Optional[str] = None
+    request_id: Optional[str] = None
+    prediction: Optional[str] = None
+    label_id: Optional[int] = None
+    confidence: Optional[float] = None
+    probabilities: Optional[Dict[str, float]] = None
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+    done: Optional[bool] = None
+    count: Optional[int] = None
+    errors: Optional[int] = None
+
+class FeaturesRequest(BaseModel):
+    """One feature vector, or a list of them (MFCC means then stds)"""
+    features: Union[List[float], List[List[float]]]
+
+class FeaturePrediction(BaseModel):
+    prediction: str
+    label_id: int
+    confidence: float
+    probabilities: Dict[str, float]
+    model_version: Optional[str] = None
+
+class FeaturesPredictionResponse(BaseModel):
+    """Predictions in the order of the submitted vectors"""
+    predictions: List[FeaturePrediction]
+
+class ProfilingRequest(BaseModel):
+    """Fraction of predictions to profile, 0 turns profiling off"""
+    sample_rate: float
@@ -0,0 +1,182 @@
+"""
+Pre-fork multi-worker serving
+
+    python -m backend.serve --host 0.0.0.0 --port 8000 --workers 4
+
+``uvicorn --workers N`` imports the app in every worker, so each worker
+loads and warms its own copy of the forest. Here the master process
+imports the app, loads and warms the model once, freezes the heap out of
+the garbage collector's reach and only then forks the workers. The
+model's arrays and the rest of the warmed heap stay shared copy-on-write
+pages, and each worker's own warm-up finds everything already loaded.
+
+Notes:
+- Requires os.fork (Linux/macOS); use plain uvicorn elsewhere.
+- Only worker 0 runs the retrain scheduler. Every worker still starts its
+  own feedback writer, inference pools and model watcher in the app's
+  startup hook, after the fork.
+- Feedback state is per worker in memory but shared on disk: writes take
+  a file lock in feedback_dir and first apply the other workers' journal
+  records and counters. /feedback can relabel a clip another worker
+  saved (waiting briefly for that worker's writer to flush), and
+  index.json, /metrics and worker 0's retrain scheduler count every
+  worker's feedback. Without fcntl (Windows) this does not hold, but
+  neither does os.fork.
+- A hot reload gives the reloading worker a private copy of the new
+  model; restart the server to share it again.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after being forked is respawned
+# only after the same delay, so a crash at startup cannot spin the master
+RESPAWN_DELAY = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by all workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def load_app():
+    """Import the app and warm its model in this (the master) process"""
+    import backend.main as main
+
+    started = time.perf_counter()
+    if main.detector.is_model_trained():
+        main.detector.warm_up()
+    else:
+        logger.warning("No trained model found; workers will load it on first request")
+    logger.info(f"Master ready in {time.perf_counter() - started:.2f}s")
+    return main
+
+
+def run_worker(main, index: int, sock: socket.socket, log_level: str):
+    """Serve main.app on sock; runs in the forked child and never returns"""
+    import uvicorn
+
+    # Objects frozen by the master are skipped by collections from here on
+    gc.enable()
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    if index != 0:
+        main.detector.retrain_scheduler.check_interval = 0
+
+    code = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(main.app, log_level=log_level))
+        server.run(sockets=[sock])
+    except BaseException as e:
+        logger.error(f"Worker {index} failed: {e}")
+        code = 1
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+class PreforkServer:
+    """Forks ``workers`` children serving one socket and keeps them running"""
+
+    def __init__(self, main, sock: socket.socket, workers: int, log_level: str = "info"):
+        self.main = main
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children = {}  # pid -> (index, forked at)
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.main, index, self.sock, self.log_level)
+        self.children[pid] = (index, time.monotonic())
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Move everything allocated so far (the app, the model, librosa's
+        # compiled code) out of the collector's generations: a collection
+        # in a worker would otherwise write to every object header and
+        # un-share the pages holding them
+        gc.collect()
+        gc.freeze()
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            index, forked_at = self.children.pop(pid, (None, None))
+            if index is None:
+                continue
+            if self.stopping:
+                logger.info(f"Worker {index} (pid {pid}) stopped")
+                continue
+
+            logger.error(f"Worker {index} (pid {pid}) exited with status "
+                         f"{os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - forked_at < RESPAWN_DELAY:
+                time.sleep(RESPAWN_DELAY)
+            if not self.stopping:
+                self.spawn(index)
+
+        self.sock.close()
+        return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: config.serve_workers)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        parser.error("pre-fork serving needs os.fork; run uvicorn backend.main:app instead")
+
+    # Collections in the master between now and the fork would only
+    # shuffle objects between generations
+    gc.disable()
+
+    sock = bind_socket(args.host, args.port)
+    main_module = load_app()
+    workers = args.workers or main_module.detector.config.serve_workers or os.cpu_count() or 1
+
+    logger.info(f"Serving on {args.host}:{args.port} with {workers} workers")
+    return PreforkServer(main_module, sock, workers, args.log_level).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Artifact compression benchmark
+
+Saves the same forest + scaler with every codec/level combination and
+reports file size, save time and ModelPersistence.load_model time, so a
+setting can be picked for the API image (fast loads) and for archival
+(small files).
+
+Usage:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --model artifacts/gender_rf.pkl --json results.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import ModelConfig
+from model_persistence import ModelPersistence
+
+
+DEFAULT_SETTINGS = [
+    (None, 0),
+    ("zlib", 1), ("zlib", 3), ("zlib", 9),
+    ("gzip", 3),
+    ("bz2", 3),
+    ("lzma", 3), ("xz", 9),
+    ("lz4", 3),
+]
+
+
+def build_artifacts(args):
+    """Load an existing model/scaler, or train one on synthetic features"""
+    if args.model:
+        model = joblib.load(args.model)
+        scaler = joblib.load(args.scaler)
+        return model, scaler
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((args.samples, 80))
+    y = (X[:, 0] + 0.5 * rng.standard_normal(args.samples) > 0).astype(int)
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = RandomForestClassifier(n_estimators=args.n_estimators,
+                                   random_state=42, n_jobs=-1)
+    model.fit(X_scaled, y)
+    return model, scaler
+
+
+def bench_setting(model, scaler, codec, level, workdir, repeats):
+    """Save and reload once per repeat; return the median timings"""
+    config = ModelConfig(
+        artifacts_dir=str(workdir),
+        model_path=str(workdir / "model.pkl"),
+        scaler_path=str(workdir / "scaler.pkl"),
+        config_path=str(workdir / "config.json"),
+        feedback_dir=str(workdir / "feedback"),
+        log_dir=str(workdir / "logs"),
+        compression_codec=codec,
+        compression_level=level,
+    )
+    persistence = ModelPersistence(config)
+
+    save_times = []
+    load_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        persistence.save_model(model, scaler)
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        persistence.load_model()
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        "codec": codec or "none",
+        "level": level if codec else 0,
+        "model_bytes": persistence.model_path.stat().st_size,
+        "scaler_bytes": persistence.scaler_path.stat().st_size,
+        "save_seconds": float(np.median(save_times)),
+        "load_seconds": float(np.median(load_times)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Existing model pickle to benchmark")
+    parser.add_argument("--scaler", default="artifacts/scaler.pkl",
+                        help="Scaler pickle used with --model")
+    parser.add_argument("--samples", type=int, default=5000,
+                        help="Synthetic training rows when no --model is given")
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    model, scaler = build_artifacts(args)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec, level in DEFAULT_SETTINGS:
+            workdir = Path(tmp) / f"{codec or 'none'}_{level}"
+            workdir.mkdir()
+            try:
+                results.append(bench_setting(model, scaler, codec, level,
+                                             workdir, args.repeats))
+            except (ValueError, ImportError) as e:
+                # lz4 is optional in joblib
+                print(f"skipping {codec}:{level} ({e})", file=sys.stderr)
+
+    baseline = results[0]["model_bytes"]
+    print(f"{'codec':<8}{'level':>6}{'model MB':>12}{'ratio':>8}"
+          f"{'save s':>10}{'load s':>10}")
+    for r in results:
+        print(f"{r['codec']:<8}{r['level']:>6}{r['model_bytes'] / 1e6:>12.2f}"
+              f"{baseline / r['model_bytes']:>8.2f}"
+              f"{r['save_seconds']:>10.3f}{r['load_seconds']:>10.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
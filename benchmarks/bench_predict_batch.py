@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Batch prediction benchmark
+
+Scores the same synthetic clips three ways for each batch size:
+- "loop": facade.predict once per file (the old predict_batch)
+- "batch": facade.predict_batch (threaded featurizing, one forest call)
+- "model": facade.predict_features_batch on precomputed features, i.e.
+  the model step alone
+
+and reports files per second, so the gain from evaluating the forest once
+per batch can be told apart from the gain in featurizing.
+
+Usage:
+    python benchmarks/bench_predict_batch.py
+    python benchmarks/bench_predict_batch.py --batch-sizes 1,8,32,128 --featurize-workers 8 --json batch.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import ModelConfig
+from facade import GenderDetectionFacade
+
+
+def make_clips(directory: Path, count: int, seconds: float, seed: int = 0):
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        path = directory / f"clip_{i}.wav"
+        sf.write(str(path), rng.standard_normal(int(seconds * 16000)).astype(np.float32), 16000)
+        paths.append(str(path))
+    return paths
+
+
+def build_facade(workdir: Path, args) -> GenderDetectionFacade:
+    """Train a model on noise inside workdir"""
+    import soundfile as sf
+
+    rng = np.random.default_rng(0)
+    for label, gain in (("female", 0.1), ("male", 1.0)):
+        class_dir = workdir / "data" / label
+        class_dir.mkdir(parents=True)
+        for i in range(10):
+            sf.write(str(class_dir / f"{i}.wav"),
+                     (gain * rng.standard_normal(32000)).astype(np.float32), 16000)
+
+    config = ModelConfig(
+        artifacts_dir=str(workdir / "artifacts"),
+        model_path=str(workdir / "artifacts" / "model.pkl"),
+        scaler_path=str(workdir / "artifacts" / "scaler.pkl"),
+        config_path=str(workdir / "artifacts" / "config.json"),
+        feedback_dir=str(workdir / "feedback"),
+        log_dir=str(workdir / "logs"),
+        retrain_state_path=str(workdir / "artifacts" / "retrain_state.json"),
+        n_estimators=args.n_estimators,
+        featurize_workers=args.featurize_workers,
+        # Repeats score the same clips; measure the model, not the cache
+        prediction_cache_size=0,
+    )
+    facade = GenderDetectionFacade(config)
+    facade.train_initial_model(str(workdir / "data"))
+    return facade
+
+
+def timed(fn, repeats):
+    """Median seconds of fn() over repeats"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--featurize-workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--clip-seconds", type=float, default=3.0)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        facade = build_facade(workdir, args)
+        clips_dir = workdir / "clips"
+        clips_dir.mkdir()
+        clips = make_clips(clips_dir, max(batch_sizes), args.clip_seconds)
+        features = np.vstack([facade.feature_extractor.extract_features(p) for p in clips])
+        for size in batch_sizes:
+            paths = clips[:size]
+            loop = timed(lambda: [facade.predict(p) for p in paths], args.repeats)
+            batch = timed(lambda: facade.predict_batch(paths), args.repeats)
+            model = timed(lambda: facade.predict_features_batch(features[:size]), args.repeats)
+            # Per-row model cost when each file is scored on its own
+            model_single = timed(
+                lambda: [facade.predict_features_batch(row[None, :]) for row in features[:size]],
+                args.repeats
+            )
+            results.append({
+                "batch_size": size,
+                "loop_files_per_second": size / loop,
+                "batch_files_per_second": size / batch,
+                "model_rows_per_second": size / model,
+                "model_single_rows_per_second": size / model_single,
+                "speedup": loop / batch,
+            })
+        facade.close()
+
+    print(f"{'batch':>6}{'loop f/s':>11}{'batch f/s':>11}{'speedup':>9}"
+          f"{'model rows/s':>14}{'single rows/s':>15}")
+    for r in results:
+        print(f"{r['batch_size']:>6}{r['loop_files_per_second']:>11.1f}"
+              f"{r['batch_files_per_second']:>11.1f}{r['speedup']:>9.2f}"
+              f"{r['model_rows_per_second']:>14.0f}{r['model_single_rows_per_second']:>15.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
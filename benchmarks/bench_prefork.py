@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Multi-worker serving benchmark
+
+Starts the API with N workers two ways and compares startup time and
+per-worker memory:
+- "uvicorn": uvicorn --workers N; every worker imports the app and loads
+  and warms its own copy of the model
+- "prefork": python -m backend.serve; the master loads and warms the
+  model once and forks workers that share it copy-on-write
+
+For each worker it reports RSS, PSS (resident pages divided among the
+processes sharing them) and USS (pages private to the worker), read from
+/proc/<pid>/smaps_rollup after every worker has served requests. The sum
+of PSS over master and workers is the memory the server really costs.
+
+Linux only. Runs in a temporary working directory with a model trained on
+synthetic audio.
+
+Usage:
+    python benchmarks/bench_prefork.py
+    python benchmarks/bench_prefork.py --workers 4 --n-estimators 500 --json prefork.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from load_test import free_port, make_clip, train_synthetic_model
+
+
+def command(mode: str, port: int, workers: int):
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+                "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return [sys.executable, "-m", "backend.serve", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+
+
+def children(pid: int):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        pids = [int(p) for p in f.read().split()]
+    # uvicorn's multiprocessing helpers are not workers
+    return [p for p in pids if b"resource_tracker" not in Path(f"/proc/{p}/cmdline").read_bytes()]
+
+
+def memory(pid: int):
+    """RSS, PSS and USS of a process in MB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "uss_mb": fields["Private_Clean"] + fields["Private_Dirty"]
+    }
+
+
+def post_predict(port: int, clip: bytes) -> float:
+    import httpx
+
+    start = time.perf_counter()
+    response = httpx.post(f"http://127.0.0.1:{port}/predict",
+                          files={"file": ("clip.wav", clip, "audio/wav")}, timeout=120)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def wait_ready(port: int, process, timeout: float = 120.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5) as s:
+                s.sendall(b"GET /ready HTTP/1.0\r\n\r\n")
+                if b" 200 " in s.recv(64):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError("server did not become ready")
+
+
+def run_mode(mode: str, args, clips, env):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(command(mode, port, args.workers), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+        ready = time.perf_counter() - started
+        first = post_predict(port, clips[0])
+
+        # Enough concurrent requests that every worker has served before
+        # memory is read
+        with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+            latencies = list(pool.map(lambda clip: post_predict(port, clip), clips[1:]))
+        time.sleep(0.5)
+
+        workers = [dict(pid=pid, **memory(pid)) for pid in children(process.pid)]
+        master = memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    return {
+        "mode": mode,
+        "workers": len(workers),
+        "ready_seconds": ready,
+        "first_predict_seconds": first,
+        "max_predict_seconds": max(latencies),
+        "master": master,
+        "per_worker": workers,
+        "mean_worker_rss_mb": float(np.mean([w["rss_mb"] for w in workers])),
+        "mean_worker_uss_mb": float(np.mean([w["uss_mb"] for w in workers])),
+        "total_pss_mb": master["pss_mb"] + sum(w["pss_mb"] for w in workers)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", default="uvicorn,prefork")
+    parser.add_argument("--n-estimators", type=int, default=300)
+    parser.add_argument("--requests-per-worker", type=int, default=4)
+    parser.add_argument("--clip-seconds", type=float, default=3.0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+
+    import logging
+    logging.disable(logging.INFO)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(REPO_ROOT), str(REPO_ROOT / "src")]))
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        train_synthetic_model(args.n_estimators)
+        # Distinct clips, so no request is answered from the prediction cache
+        clips = [make_clip(args.clip_seconds, seed=i)
+                 for i in range(1 + args.workers * args.requests_per_worker)]
+        for mode in args.modes.split(","):
+            print(f"running {mode} ...", file=sys.stderr)
+            results.append(run_mode(mode, args, clips, env))
+        os.chdir(REPO_ROOT)
+
+    print(f"{'mode':<9}{'workers':>8}{'ready s':>9}{'1st pred s':>12}{'max pred s':>12}"
+          f"{'worker RSS':>12}{'worker USS':>12}{'total PSS':>11}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['workers']:>8}{r['ready_seconds']:>9.2f}"
+              f"{r['first_predict_seconds']:>12.2f}{r['max_predict_seconds']:>12.2f}"
+              f"{r['mean_worker_rss_mb']:>12.0f}{r['mean_worker_uss_mb']:>12.0f}"
+              f"{r['total_pss_mb']:>11.0f}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
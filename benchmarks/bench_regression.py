@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""
+Hot-path regression benchmark
+
+Times the pipeline's hot paths at several sizes on deterministic synthetic
+audio:
+
+- extract_features: one clip of 1, 5 and 15 seconds
+- load_from_directory: a dataset of 20 and 80 clips
+- train_model: 100 and 1000 feature rows
+- load_model: forests of 50 and 200 trees
+- predict: facade.predict on a 1 and 5 second clip (prediction cache off)
+
+Each case runs once untimed, then reports the median of --repeats runs.
+--save-baseline stores the medians; later runs compare against them and
+exit with status 1 when a case is more than --threshold times slower than
+its baseline (and slower by at least --min-delta seconds, so
+sub-millisecond jitter cannot fail a run). Timings only compare on the same
+machine, so baselines are not committed; record one before a change and
+check against it after.
+
+Usage:
+    python benchmarks/bench_regression.py --save-baseline
+    python benchmarks/bench_regression.py
+    python benchmarks/bench_regression.py --cases predict,extract_features --threshold 1.3 --json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# The dataset loader's progress bars would drown the report
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import ModelConfig
+from facade import GenderDetectionFacade
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines.json"
+SAMPLE_RATE = 16000
+
+
+def synthetic_clip(seconds: float, seed: int, pitch: float = 150.0) -> np.ndarray:
+    """A voiced-like tone with harmonics plus noise, identical for the same seed"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = pitch * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    y = sum(np.sin(k * phase) / k for k in range(1, 6))
+    y = 0.3 * y + 0.05 * rng.standard_normal(len(t))
+    return y.astype(np.float32)
+
+
+def write_clip(path: Path, seconds: float, seed: int, pitch: float = 150.0) -> str:
+    import soundfile as sf
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sf.write(str(path), synthetic_clip(seconds, seed, pitch), SAMPLE_RATE)
+    return str(path)
+
+
+def write_dataset(directory: Path, count: int, seconds: float = 2.0):
+    """count clips split between female (higher pitch) and male"""
+    for i in range(count):
+        label, pitch = ("female", 220.0) if i % 2 else ("male", 120.0)
+        write_clip(directory / label / f"{i}.wav", seconds, seed=i, pitch=pitch)
+
+
+def make_config(workdir: Path, **overrides) -> ModelConfig:
+    workdir.mkdir(parents=True, exist_ok=True)
+    values = dict(
+        artifacts_dir=str(workdir / "artifacts"),
+        model_path=str(workdir / "artifacts" / "model.pkl"),
+        scaler_path=str(workdir / "artifacts" / "scaler.pkl"),
+        config_path=str(workdir / "artifacts" / "config.json"),
+        feedback_dir=str(workdir / "feedback"),
+        log_dir=str(workdir / "logs"),
+        retrain_state_path=str(workdir / "artifacts" / "retrain_state.json"),
+        # The same clips are scored on every repeat; measure the model, not the cache
+        prediction_cache_size=0,
+    )
+    values.update(overrides)
+    return ModelConfig(**values)
+
+
+def synthetic_features(rows: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    y = np.arange(rows) % 2
+    X = rng.standard_normal((rows, dim)) + y[:, None] * 0.5
+    return X, y
+
+
+def timed(fn, repeats: int) -> float:
+    """Median seconds of fn() over repeats, after one untimed run"""
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def bench_extract_features(workdir: Path, repeats: int):
+    facade = GenderDetectionFacade(make_config(workdir))
+    for seconds in (1, 5, 15):
+        path = write_clip(workdir / "clips" / f"extract_{seconds}.wav", seconds, seed=seconds)
+        yield f"{seconds}s", timed(lambda: facade.feature_extractor.extract_features(path), repeats)
+
+
+def bench_load_from_directory(workdir: Path, repeats: int):
+    facade = GenderDetectionFacade(make_config(workdir))
+    for count in (20, 80):
+        data_dir = workdir / f"dataset_{count}"
+        write_dataset(data_dir, count)
+        yield f"{count}_files", timed(
+            lambda: facade.dataset_loader.load_from_directory(data_dir, ["female", "male"]),
+            repeats
+        )
+
+
+def bench_train_model(workdir: Path, repeats: int):
+    facade = GenderDetectionFacade(make_config(workdir))
+    dim = 2 * facade.config.n_mfcc
+    for rows in (100, 1000):
+        X, y = synthetic_features(rows, dim)
+        yield f"{rows}_rows", timed(lambda: facade.model_trainer.train_model(X, y), repeats)
+
+
+def bench_load_model(workdir: Path, repeats: int):
+    for trees in (50, 200):
+        facade = GenderDetectionFacade(make_config(workdir / f"load_{trees}", n_estimators=trees))
+        X, y = synthetic_features(200, 2 * facade.config.n_mfcc)
+        model, scaler, metrics = facade.model_trainer.train_model(X, y)
+        facade.model_persistence.save_model(model, scaler, metrics)
+        yield f"{trees}_trees", timed(facade.model_persistence.load_model, repeats)
+
+
+def bench_predict(workdir: Path, repeats: int):
+    facade = GenderDetectionFacade(make_config(workdir))
+    write_dataset(workdir / "predict_data", 20)
+    facade.train_initial_model(str(workdir / "predict_data"))
+    for seconds in (1, 5):
+        path = write_clip(workdir / "clips" / f"predict_{seconds}.wav", seconds, seed=100 + seconds)
+        yield f"{seconds}s", timed(lambda: facade.predict(path), repeats)
+    facade.close()
+
+
+CASES = {
+    "extract_features": bench_extract_features,
+    "load_from_directory": bench_load_from_directory,
+    "train_model": bench_train_model,
+    "load_model": bench_load_model,
+    "predict": bench_predict,
+}
+
+
+def run_cases(names, repeats: int):
+    results = {}
+    for name in names:
+        print(f"running {name} ...", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as tmp:
+            for size, seconds in CASES[name](Path(tmp), repeats):
+                results[f"{name}[{size}]"] = seconds
+    return results
+
+
+def check(results, baseline, threshold: float, min_delta: float):
+    """Rows of (case, seconds, baseline seconds, ratio, regressed)"""
+    rows = []
+    for case, seconds in results.items():
+        base = baseline.get(case)
+        if base is None:
+            rows.append((case, seconds, None, None, False))
+            continue
+        ratio = seconds / base if base else None
+        regressed = ratio is not None and ratio > threshold and seconds - base > min_delta
+        rows.append((case, seconds, base, ratio, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help=f"Comma-separated subset of {', '.join(CASES)}")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the baseline (merged into an existing file)")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Fail when a case takes more than this many times its baseline")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="Seconds a case must also slow down by to count as a regression")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    names = args.cases.split(",")
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    import logging
+    logging.disable(logging.INFO)
+
+    results = run_cases(names, args.repeats)
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path) as f:
+            baseline = json.load(f)["cases"]
+
+    rows = check(results, baseline, args.threshold, args.min_delta)
+    print(f"{'case':<34}{'ms':>10}{'baseline ms':>13}{'ratio':>8}")
+    for case, seconds, base, ratio, regressed in rows:
+        base_ms = f"{base * 1000:.1f}" if base is not None else "-"
+        ratio_text = f"{ratio:.2f}" if ratio is not None else "-"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:<34}{seconds * 1000:>10.1f}{base_ms:>13}{ratio_text:>8}{flag}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "cases": results,
+                "regressions": [row[0] for row in rows if row[4]],
+                "threshold": args.threshold,
+            }, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(baseline_path, "w") as f:
+            json.dump({
+                "cases": baseline,
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            }, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {baseline_path}", file=sys.stderr)
+        return 0
+
+    if not baseline:
+        print(f"no baseline at {baseline_path}; run with --save-baseline first", file=sys.stderr)
+        return 0
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.threshold}x baseline", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+"""
+API load test
+
+Drives /predict with a mix of synthetic clips and reports throughput,
+p50/p95/p99 latency and error rates, while a separate probe hits /health
+to show whether the event loop stays responsive.
+
+Load is either closed-loop (--concurrency clients, each sending its next
+request when the previous one returns) or open-loop (--rate requests per
+second arriving on a fixed schedule whatever the server does). Open-loop
+latency is measured from each request's scheduled start, so a server that
+falls behind shows it in the tail instead of silently slowing the client.
+
+By default the real FastAPI app is served in-process with uvicorn, in a
+temporary working directory with a model trained on synthetic audio, and
+each inference mode is measured in turn. The repository's artifacts and
+feedback are untouched. --url targets a server that is already running
+instead (its own configuration applies).
+
+Results are written as JSON with stable key order and run metadata (git
+commit, Python, CPU count), so runs can be diffed between commits;
+--compare prints the change against an earlier result file.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --modes inline,thread:1,thread --concurrency 32 --duration 30 --json load.json
+    python benchmarks/load_test.py --modes thread --rate 40 --mix 1:2,3:1,10:1 --json after.json --compare before.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --rate 20
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+
+def make_clip(seconds: float, sample_rate: int = 16000, seed: int = 0) -> bytes:
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    sf.write(buffer, rng.standard_normal(int(seconds * sample_rate)).astype(np.float32),
+             sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+def parse_mix(spec: str):
+    """ "1:2,3:1" -> [(1.0, 2.0), (3.0, 1.0)]: clip seconds and relative weight"""
+    mix = []
+    for part in spec.split(","):
+        seconds, _, weight = part.partition(":")
+        mix.append((float(seconds), float(weight or 1)))
+    return mix
+
+
+def make_clips(mix, variants: int):
+    """``variants`` distinct clips per length, so repeats are not all cache hits"""
+    clips, weights = [], []
+    for seconds, weight in mix:
+        for _ in range(variants):
+            clips.append((seconds, make_clip(seconds, seed=len(clips))))
+            weights.append(weight / variants)
+    return clips, weights
+
+
+def train_synthetic_model(n_estimators: int):
+    """Train a model on noise in the current (temporary) directory"""
+    import soundfile as sf
+    from config import ModelConfig
+    from facade import GenderDetectionFacade
+
+    rng = np.random.default_rng(0)
+    for label, gain in (("female", 0.1), ("male", 1.0)):
+        class_dir = Path("data") / label
+        class_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(10):
+            sf.write(str(class_dir / f"{i}.wav"),
+                     (gain * rng.standard_normal(32000)).astype(np.float32), 16000)
+
+    GenderDetectionFacade(ModelConfig(n_estimators=n_estimators)).train_initial_model("data")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(max(values))}
+
+
+class Recorder:
+    """Latencies and outcomes of the /predict requests of one run"""
+
+    def __init__(self):
+        self.latencies = []
+        self.by_length = {}
+        self.statuses = Counter()
+
+    def record(self, seconds: float, status, clip_seconds: float):
+        self.statuses[str(status)] += 1
+        if status == 200:
+            self.latencies.append(seconds)
+            self.by_length.setdefault(clip_seconds, []).append(seconds)
+
+    def summary(self, elapsed: float, health_latencies):
+        total = sum(self.statuses.values())
+        ok = len(self.latencies)
+        return {
+            "requests": total,
+            "ok": ok,
+            "errors": total - ok,
+            "error_rate": (total - ok) / total if total else None,
+            "status_counts": dict(self.statuses),
+            "seconds": elapsed,
+            "throughput_rps": ok / elapsed,
+            "predict_latency": percentiles(self.latencies),
+            "predict_latency_by_clip_seconds": {
+                str(seconds): percentiles(values)
+                for seconds, values in sorted(self.by_length.items())
+            },
+            "health_latency": percentiles(health_latencies)
+        }
+
+
+async def drive(base_url: str, clips, weights, duration: float, health_interval: float,
+                concurrency: int = 0, rate: float = 0.0, max_outstanding: int = 1000,
+                seed: int = 0):
+    import httpx
+
+    recorder = Recorder()
+    health_latencies = []
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    deadline = started + duration
+    limits = httpx.Limits(max_connections=max(concurrency, max_outstanding) + 1)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def send(scheduled: float):
+            seconds, clip = rng.choices(clips, weights)[0]
+            try:
+                response = await client.post(
+                    "/predict", files={"file": ("clip.wav", clip, "audio/wav")}
+                )
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            recorder.record(time.perf_counter() - scheduled, status, seconds)
+
+        async def closed_loop_client():
+            while time.perf_counter() < deadline:
+                await send(time.perf_counter())
+
+        async def open_loop():
+            pending = set()
+            sent = 0
+            while True:
+                scheduled = started + sent / rate
+                if scheduled >= deadline:
+                    break
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                sent += 1
+                if len(pending) >= max_outstanding:
+                    # The client cannot keep up either; count it, do not hide it
+                    recorder.record(0.0, "client_overflow", 0.0)
+                    continue
+                task = asyncio.create_task(send(scheduled))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+
+        async def health_probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    await client.get("/health")
+                    health_latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(health_interval)
+
+        load = [open_loop()] if rate else [closed_loop_client() for _ in range(concurrency)]
+        await asyncio.gather(health_probe(), *load)
+        elapsed = time.perf_counter() - started
+
+    return recorder.summary(elapsed, health_latencies)
+
+
+def drive_args(args):
+    return {"duration": args.duration, "health_interval": args.health_interval,
+            "concurrency": args.concurrency, "rate": args.rate,
+            "max_outstanding": args.max_outstanding, "seed": args.seed}
+
+
+def run_mode(main, spec: str, args, clips, weights):
+    import uvicorn
+    from backend.inference import InferenceExecutor
+
+    # "thread:1" runs the thread mode with micro-batching off
+    mode, _, batch_size = spec.partition(":")
+    main.detector.config.inference_mode = mode
+    main.detector.config.inference_workers = args.workers
+    main.detector.config.batch_max_size = int(batch_size or args.batch_max_size)
+    main.inference = InferenceExecutor(main.detector, main.detector.config)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        # Warm-up: spin up worker processes and fill the pools
+        asyncio.run(drive(f"http://127.0.0.1:{port}", clips, weights, 2.0, 1.0,
+                          concurrency=args.workers))
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", clips, weights,
+                                   **drive_args(args)))
+        # Read before shutdown tears the batcher down
+        inference_metrics = main.inference.get_metrics()
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    result.update({"mode": spec, "workers": args.workers,
+                   "batch_max_size": main.detector.config.batch_max_size,
+                   "inference_metrics": inference_metrics})
+    return result
+
+
+def run_url(args, clips, weights):
+    result = asyncio.run(drive(args.url.rstrip("/"), clips, weights, **drive_args(args)))
+    result["mode"] = args.url
+    return result
+
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args)
+    }
+
+
+def compare(results, baseline_path: Path):
+    """Print the change of the headline numbers against an earlier run"""
+    with open(baseline_path) as f:
+        baseline = {r["mode"]: r for r in json.load(f)["results"]}
+
+    def change(new, old):
+        if new is None or not old:
+            return "-"
+        return f"{(new - old) / old * 100:+.0f}%"
+
+    print(f"\nvs {baseline_path}")
+    print(f"{'mode':<11}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'err rate':>10}")
+    for r in results:
+        old = baseline.get(r["mode"])
+        if old is None:
+            print(f"{r['mode']:<11} (not in baseline)")
+            continue
+        p, q = r["predict_latency"], old["predict_latency"]
+        error_change = (r["error_rate"] or 0) - (old["error_rate"] or 0)
+        print(f"{r['mode']:<11}{change(r['throughput_rps'], old['throughput_rps']):>9}"
+              f"{change(p['p50'], q['p50']):>8}{change(p['p95'], q['p95']):>8}"
+              f"{change(p['p99'], q['p99']):>8}{error_change * 100:>+8.1f}pp")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="inline,thread:1,thread,process",
+                        help="Comma-separated inference modes to compare; "
+                             "mode:N overrides the micro-batch size")
+    parser.add_argument("--url", help="Load an already running server instead (ignores --modes)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Closed-loop /predict clients")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Open-loop arrivals per second (overrides --concurrency)")
+    parser.add_argument("--max-outstanding", type=int, default=1000,
+                        help="Open-loop requests in flight before new ones count as errors")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="inference_workers for the thread and process modes")
+    parser.add_argument("--batch-max-size", type=int, default=32,
+                        help="Micro-batch size for modes without an explicit :N")
+    parser.add_argument("--mix", default="5",
+                        help="Clip lengths in seconds with relative weights, e.g. 1:2,3:1,10:1")
+    parser.add_argument("--variants", type=int, default=4, help="Distinct clips per length")
+    parser.add_argument("--prediction-cache", action="store_true",
+                        help="Keep the prediction cache on (in-process runs)")
+    parser.add_argument("--health-interval", type=float, default=0.1)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the clip choice")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier --json output to compare against")
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    compare_path = Path(args.compare).resolve() if args.compare else None
+    metadata = run_metadata(args)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    clips, weights = make_clips(parse_mix(args.mix), args.variants)
+
+    results = []
+    if args.url:
+        results.append(run_url(args, clips, weights))
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            train_synthetic_model(args.n_estimators)
+
+            import backend.main as main
+            # Retraining on the feedback this test generates would skew the numbers
+            main.detector.retrain_scheduler.check_interval = 0
+            main.detector.config.model_watch_interval = 0
+            if not args.prediction_cache:
+                # Clips repeat; measure the model, not the cache
+                main.detector.prediction_cache.max_entries = 0
+
+            for mode in args.modes.split(","):
+                print(f"running {mode} ...", file=sys.stderr)
+                results.append(run_mode(main, mode, args, clips, weights))
+            os.chdir(REPO_ROOT)
+
+    print(f"{'mode':<11}{'req/s':>8}{'err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'health p99 ms':>15}{'health max ms':>15}")
+    for r in results:
+        p, h = r["predict_latency"], r["health_latency"]
+        fmt = lambda v: f"{v * 1000:.0f}" if v is not None else "-"
+        print(f"{r['mode']:<11}{r['throughput_rps']:>8.1f}{(r['error_rate'] or 0) * 100:>7.1f}"
+              f"{fmt(p['p50']):>9}{fmt(p['p95']):>9}{fmt(p['p99']):>9}"
+              f"{fmt(h['p99']):>15}{fmt(h['max']):>15}")
+
+    if compare_path:
+        compare(results, compare_path)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"metadata": metadata, "results": results}, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Maintenance commands for the gender detection system
+
+Usage:
+    python manage.py rebuild-feedback-index
+    python manage.py compact-feedback [--min-age-days N] [--format pcm|features]
+    python manage.py retrain [--data-dir DIR] [--promote]
+    python manage.py import-feedback MANIFEST [--workers N]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from config import ModelConfig
+from feedback_manager import FeedbackManager
+from feedback_compactor import FeedbackCompactor
+from feedback_importer import FeedbackImporter
+from feature_extractor import AudioFeatureExtractor
+from model_persistence import ModelPersistence
+from retrain_scheduler import RetrainScheduler
+
+
+def rebuild_feedback_index(args, config):
+    """Recount feedback on disk and rewrite the feedback index"""
+    manager = FeedbackManager(config)
+    stats = manager.rebuild_index()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def compact_feedback(args, config):
+    """Pack settled loose feedback into shards"""
+    if args.min_age_days is not None:
+        config.compaction_min_age_days = args.min_age_days
+    if args.format:
+        config.compaction_format = args.format
+    if args.shard_size:
+        config.compaction_shard_size = args.shard_size
+
+    manager = FeedbackManager(config)
+    compactor = FeedbackCompactor(config, manager, AudioFeatureExtractor(config))
+    report = compactor.compact()
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+def import_feedback(args, config):
+    """Import labelled clips listed in a CSV/JSONL manifest"""
+    if args.workers is not None:
+        config.import_workers = args.workers
+
+    manager = FeedbackManager(config)
+    importer = FeedbackImporter(config, manager, AudioFeatureExtractor(config))
+    report = importer.import_manifest(args.manifest)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+def retrain(args, config):
+    """Run one retraining job in a limited worker process and apply the result"""
+    if args.data_dir:
+        config.retrain_data_dir = args.data_dir
+
+    def promote(report):
+        # A running API picks the new artifacts up through its model watcher
+        persistence = ModelPersistence(config)
+        model, scaler = persistence.load_model(candidate=True)
+        persistence.save_model(model, scaler,
+                               persistence.load_config(candidate=True).get("metrics"))
+        persistence.delete_candidate()
+
+    # Without --promote an accepted candidate stays saved for shadow scoring
+    scheduler = RetrainScheduler(config, FeedbackManager(config), ModelPersistence(config),
+                                 promote if args.promote else lambda report: None)
+    scheduler.trigger()
+    report = scheduler.wait()
+    print(json.dumps(report, indent=2, default=str))
+    return 0 if report["status"] in ("accepted", "skipped") else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gender detection maintenance commands")
+    parser.add_argument("--feedback-dir", help="Override the feedback directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-feedback-index",
+        help="Recount feedback from disk (use after manual edits or a crash)"
+    )
+    rebuild.set_defaults(func=rebuild_feedback_index)
+
+    compact = subparsers.add_parser(
+        "compact-feedback",
+        help="Pack settled feedback clips into shard files"
+    )
+    compact.add_argument("--min-age-days", type=float,
+                         help="Only pack feedback older than this (default from config)")
+    compact.add_argument("--format", choices=["pcm", "features"],
+                         help="Keep decoded audio or only feature rows")
+    compact.add_argument("--shard-size", type=int, help="Clips per shard")
+    compact.set_defaults(func=compact_feedback)
+
+    importer = subparsers.add_parser(
+        "import-feedback",
+        help="Bulk-import labelled clips (manifest columns: path, label[, user_id, ...])"
+    )
+    importer.add_argument("manifest", help="CSV with a header row, or JSONL")
+    importer.add_argument("--workers", type=int,
+                          help="Featurizing processes (1 runs in-process)")
+    importer.set_defaults(func=import_feedback)
+
+    retrain_parser = subparsers.add_parser(
+        "retrain",
+        help="Train and validate a candidate on feedback in a separate process"
+    )
+    retrain_parser.add_argument("--data-dir", help="Original training data to include")
+    retrain_parser.add_argument("--promote", action="store_true",
+                                help="Make an accepted candidate the active model")
+    retrain_parser.set_defaults(func=retrain)
+
+    args = parser.parse_args(argv)
+
+    config = ModelConfig()
+    if args.feedback_dir:
+        config.feedback_dir = args.feedback_dir
+
+    return args.func(args, config)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
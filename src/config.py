@@ -2,7 +2,7 @@
 Configuration management for the gender detection system
 """
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Optional
 from pathlib import Path
 
 
@@ -19,6 +19,7 @@ class ModelConfig:
     n_estimators: int = 200
     random_state: int = 42
     test_size: float = 0.2
+    n_jobs: int = -1  # training/inference threads, -1 uses every core
     
     # Paths
     artifacts_dir: str = "artifacts"
@@ -28,6 +29,10 @@ class ModelConfig:
     feedback_dir: str = "feedback_data"
     log_dir: str = "logs"
     
+    # Artifact compression (joblib codec name, None for uncompressed)
+    compression_codec: Optional[str] = None
+    compression_level: int = 3
+    
     # Labels
     label_map: Dict[int, str] = field(default_factory=lambda: {
         0: "Female",
@@ -36,6 +41,70 @@ class ModelConfig:
     
     # Retraining parameters
     feedback_threshold: int = 100  
+    retrain_check_interval: float = 0.0  # seconds between scheduler checks, 0 disables (opt-in)
+    retrain_max_age_hours: float = 24.0  # retrain once unused feedback is this old
+    retrain_data_dir: Optional[str] = None  # original labelled data: trained on and held out for validation
+    retrain_holdout_size: float = 0.2  # held out to compare candidate and active model
+    retrain_max_accuracy_drop: float = 0.0  # candidate may trail the active model by this much
+    retrain_auto_promote: bool = True  # needs retrain_data_dir; otherwise (or False) accepted candidates are shadow-scored
+    retrain_cpu_count: int = 1  # CPUs the worker process may use
+    retrain_memory_limit_mb: int = 4096  # address-space limit of the worker, 0 disables
+    retrain_timeout: float = 3600.0  # seconds before the worker is killed
+    retrain_state_path: str = "artifacts/retrain_state.json"
+    
+    # Serving parameters
+    model_watch_interval: float = 5.0  # seconds between artifact checks, 0 disables
+    warmup_iterations: int = 3  # synthetic clips run through the pipeline before /ready, 0 only loads the model
+    serve_workers: int = 0  # processes forked by backend.serve, 0 uses the CPU count
+    inference_mode: str = "thread"  # "thread", "process" (decode in worker processes) or "inline"
+    inference_workers: int = 4
+    inference_max_concurrency: int = 0  # predictions in flight at once, 0 derives it from workers and batch size
+    inference_max_queue: int = 64  # requests waiting for a slot before new ones get 503, 0 = unbounded
+    inference_queue_timeout: float = 10.0  # seconds a request may wait for a slot before 503, 0 = no limit
+    max_upload_mb: float = 50.0  # per uploaded clip or archive (and per archive member); larger uploads get 413
+    max_archive_extract_mb: float = 2048.0  # audio extracted from one /predict/batch archive before the stream stops
+    max_feature_rows: int = 1024  # feature vectors per /predict/features request
+    featurize_workers: int = 4  # threads decoding files in predict_batch
+    batch_max_size: int = 32  # feature vectors per model call, 1 disables micro-batching
+    batch_max_wait_ms: float = 0.0  # extra wait for others to join a batch while the model is idle; adds up to this much latency per request
+    
+    # Per-stage latency histograms served at /metrics
+    metrics_enabled: bool = True
+    
+    # Sampled cProfile/tracemalloc reports of predictions, written to <log_dir>/profiles
+    profiling_sample_rate: float = 0.0  # fraction of predictions profiled, 0 disables
+    profiling_tracemalloc: bool = True  # also record allocation sites (slows sampled requests)
+    profiling_top_n: int = 25  # functions and allocation sites per report
+    profiling_max_files: int = 100  # oldest reports are deleted beyond this many
+    profiling_max_mb: float = 20.0  # ...or this much in total
+    
+    # Prediction cache, keyed by a hash of the audio bytes and the model version
+    prediction_cache_size: int = 1024  # entries, 0 disables
+    prediction_cache_max_mb: float = 64.0
+    prediction_cache_ttl: float = 3600.0  # seconds
+    
+    # Shadow scoring of a candidate model
+    candidate_model_path: str = "artifacts/candidate_rf.pkl"
+    candidate_scaler_path: str = "artifacts/candidate_scaler.pkl"
+    candidate_config_path: str = "artifacts/candidate_config.json"
+    shadow_stats_path: str = "artifacts/shadow_stats.json"
+    shadow_sample_rate: float = 0.1  # fraction of predictions also scored by the candidate
+    shadow_max_pending: int = 100  # shadow jobs queued before new samples are dropped
+    
+    # Asynchronous feedback writer
+    feedback_queue_size: int = 1000
+    feedback_batch_size: int = 64
+    feedback_flush_interval: float = 0.5  # seconds
+    feedback_durability: str = "buffered"  # "buffered" or "fsync"
+    
+    # Bulk feedback import
+    import_workers: int = 4  # featurizing processes and copying threads
+    import_batch_size: int = 256  # clips per journal/index write
+    
+    # Feedback compaction into shards
+    compaction_min_age_days: float = 7.0  # only feedback settled this long is packed
+    compaction_shard_size: int = 10000  # clips per shard
+    compaction_format: str = "pcm"  # "pcm" keeps audio, "features" keeps feature rows only
     
     def __post_init__(self):
         """Create necessary directories"""
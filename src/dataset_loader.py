@@ -4,10 +4,13 @@ Handles loading and organizing audio datasets
 """
 import numpy as np
 from pathlib import Path
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Optional
 from tqdm import tqdm
 import logging
 
+from shard_store import (shard_index_paths, read_shard_index, open_shard_data,
+                         member_path, PCM_FORMAT)
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,10 +21,21 @@ class DatasetLoader:
         self.feature_extractor = feature_extractor
     
     def load_from_directory(self, data_dir: Path, 
-                           classes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
-
+                           classes: List[str],
+                           feature_cache: Optional[Dict[Path, np.ndarray]] = None
+                           ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load features for every wav under data_dir/<class>.
+        
+        Files found in ``feature_cache`` (path -> feature vector) are not
+        decoded again, and hardlinks to an already decoded file reuse its
+        features.
+        """
         X = []
         y = []
+        feature_cache = feature_cache or {}
+        cache_hits = 0
+        by_inode = {}
         
         data_dir = Path(data_dir)
         
@@ -44,20 +58,84 @@ class DatasetLoader:
             
             # Extract features with progress bar
             for wav_file in tqdm(wav_paths, desc=f"Processing {label_name}"):
+                cached = feature_cache.get(wav_file)
+                if cached is not None:
+                    X.append(cached)
+                    y.append(label_idx)
+                    cache_hits += 1
+                    continue
+                
                 try:
-                    features = self.feature_extractor.extract_features(str(wav_file))
+                    stat = wav_file.stat()
+                    inode = (stat.st_dev, stat.st_ino)
+                    features = by_inode.get(inode)
+                    if features is None:
+                        features = self.feature_extractor.extract_features(str(wav_file))
+                        by_inode[inode] = features
+                    else:
+                        cache_hits += 1
                     X.append(features)
                     y.append(label_idx)
                 except Exception as e:
                     logger.warning(f"Skipping {wav_file}: {e}")
         
+            # Compacted feedback packed into shards next to the loose files
+            for index_path in shard_index_paths(folder):
+                shard_X = self._load_shard(index_path, feature_cache)
+                X.extend(shard_X)
+                y.extend([label_idx] * len(shard_X))
+        
         X = np.array(X)
         y = np.array(y)
         
+        if cache_hits:
+            logger.info(f"Reused features for {cache_hits}/{len(X)} files "
+                        f"(stored or hardlinked)")
+        
         logger.info(f"Loaded dataset: X shape {X.shape}, y shape {y.shape}")
         
         return X, y
     
+    def _load_shard(self, index_path: Path,
+                    feature_cache: Dict[Path, np.ndarray]) -> List[np.ndarray]:
+        """Features for every clip in one shard"""
+        try:
+            index = read_shard_index(index_path)
+            data = open_shard_data(index)
+        except Exception as e:
+            logger.warning(f"Skipping shard {index_path}: {e}")
+            return []
+        
+        if index["format"] != PCM_FORMAT:
+            if index["params"] != self.feature_extractor.get_params():
+                logger.warning(f"Skipping feature shard {index_path}: extracted with "
+                               f"{index['params']}, need {self.feature_extractor.get_params()}")
+                return []
+            return [np.array(data[entry["row"]], dtype=np.float64)
+                    for entry in index["entries"]]
+        
+        features_list = []
+        by_offset = {}
+        for entry in tqdm(index["entries"], desc=f"Processing {index_path.name}"):
+            features = feature_cache.get(member_path(index["data_path"], entry["name"]))
+            if features is None:
+                features = by_offset.get(entry["offset"])
+            
+            if features is None:
+                try:
+                    signal = data[entry["offset"]:entry["offset"] + entry["length"]]
+                    features = self.feature_extractor.extract_features_from_signal(
+                        signal, index["sample_rate"]
+                    )
+                except Exception as e:
+                    logger.warning(f"Skipping {entry['name']} in {index_path}: {e}")
+                    continue
+            
+            by_offset[entry["offset"]] = features
+            features_list.append(features)
+        
+        return features_list
+    
     def load_from_file_list(self, file_paths: List[str], 
                            labels: List[int]) -> Tuple[np.ndarray, np.ndarray]:
      
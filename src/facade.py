@@ -1,17 +1,31 @@
 import logging
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List
 import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent))
+
 from config import ModelConfig
 from feature_extractor import AudioFeatureExtractor
 from dataset_loader import DatasetLoader
 from model_trainer import ModelTrainer
-from model_persistence import ModelPersistence
+from model_persistence import ModelPersistence, ArtifactMismatch
 from feedback_manager import FeedbackManager
+from feedback_writer import FeedbackWriter
+from shadow_scorer import ShadowScorer
+from retrain_scheduler import RetrainScheduler
+from feedback_importer import FeedbackImporter
+from prediction_cache import PredictionCache
+from profiler import RequestProfiler
+import metrics
+import timing
 
-
-sys.path.insert(0, str(Path(__file__).parent))
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +33,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Native rate of the synthetic warm-up clip
+WARMUP_SAMPLE_RATE = 44100
+
 
 class GenderDetectionFacade:
     """
@@ -41,10 +58,20 @@ class GenderDetectionFacade:
         self.model_trainer = ModelTrainer(self.config)
         self.model_persistence = ModelPersistence(self.config)
         self.feedback_manager = FeedbackManager(self.config)
+        self.shadow_scorer = ShadowScorer(self.config, self.model_persistence)
+        self.feedback_writer = FeedbackWriter(self.feedback_manager, self.config)
+        self.retrain_scheduler = RetrainScheduler(self.config, self.feedback_manager,
+                                                  self.model_persistence,
+                                                  self._apply_retrained)
+        self.prediction_cache = PredictionCache(self.config)
+        self.profiler = RequestProfiler(self.config)
         
 
-        self._model = None
-        self._scaler = None
+        # (model, scaler, version) is swapped as one tuple so a prediction
+        # never pairs a model with another version's scaler
+        self._active = None
+        self._artifact_signature = None
+        self._reload_lock = threading.Lock()
         
         logger.info("GenderDetectionFacade initialized")
     
@@ -73,11 +100,10 @@ class GenderDetectionFacade:
         model, scaler, metrics = self.model_trainer.train_model(X, y)
         
         # Save model
-        self.model_persistence.save_model(model, scaler, metrics)
+        version = self.model_persistence.save_model(model, scaler, metrics)
         
         # Update internal references
-        self._model = model
-        self._scaler = scaler
+        self._set_active(model, scaler, version)
         
         logger.info("=" * 60)
         logger.info("Initial Training Complete")
@@ -85,12 +111,12 @@ class GenderDetectionFacade:
         
         return metrics
     
-    def retrain_with_feedback(self, original_data_dir: Optional[str] = None) -> Dict:
-
-        logger.info("=" * 60)
-        logger.info("Starting Model Retraining with Feedback")
-        logger.info("=" * 60)
+    def load_training_data(self, original_data_dir: Optional[str] = None):
+        """
+        Feedback (plus the original data, if given) as one training set.
         
+        Returns (X, y), or None when there is no feedback to train on.
+        """
         all_X = []
         all_y = []
         
@@ -108,9 +134,15 @@ class GenderDetectionFacade:
         
         # Load feedback data
         logger.info("Loading feedback data")
+        # Features stored at prediction time are reused when the extractor
+        # parameters still match; everything else is decoded
+        feature_cache = self.feedback_manager.get_cached_features(
+            self.feature_extractor.get_params()
+        )
         X_feedback, y_feedback = self.dataset_loader.load_from_directory(
             self.feedback_manager.feedback_dir,
-            ["female", "male"]
+            ["female", "male"],
+            feature_cache=feature_cache
         )
         
         if len(X_feedback) == 0:
@@ -126,14 +158,36 @@ class GenderDetectionFacade:
         y = np.concatenate(all_y)
         
         logger.info(f"Total samples for retraining: {len(X)}")
+        return X, y
+    
+    def retrain_with_feedback(self, original_data_dir: Optional[str] = None,
+                              as_candidate: bool = False) -> Dict:
+        """
+        Retrain on feedback (plus the original data, if given).
+        
+        With as_candidate=True the new model is saved as the candidate and
+        shadow-scored against live traffic instead of replacing the active one.
+        """
+
+        logger.info("=" * 60)
+        logger.info("Starting Model Retraining with Feedback")
+        logger.info("=" * 60)
+        
+        data = self.load_training_data(original_data_dir)
+        if data is None:
+            return None
+        X, y = data
         
         # Train and save
         model, scaler, metrics = self.model_trainer.train_model(X, y)
-        self.model_persistence.save_model(model, scaler, metrics)
+        version = self.model_persistence.save_model(model, scaler, metrics,
+                                                    candidate=as_candidate)
         
         # Update internal references
-        self._model = model
-        self._scaler = scaler
+        if as_candidate:
+            self.shadow_scorer.load_candidate()
+        else:
+            self._set_active(model, scaler, version)
         
         logger.info("=" * 60)
         logger.info("Retraining Complete")
@@ -142,66 +196,359 @@ class GenderDetectionFacade:
         return metrics
     
 
-    def predict(self, audio_path: str) -> Dict:
-
-        if self._model is None or self._scaler is None:
-            logger.info("Loading model for first prediction")
-            self._model, self._scaler = self.model_persistence.load_model()
+    def _set_active(self, model, scaler, version: Optional[str]):
+        with self._reload_lock:
+            self._active = (model, scaler, version)
+            self._artifact_signature = self.model_persistence.artifact_signature()
+    
+    def _load_active(self, attempts: int = 3):
+        """
+        Load artifacts from disk without touching the active model.
+        
+        Raises ArtifactMismatch if a save is still replacing the files
+        after ``attempts`` tries; the caller keeps its current model.
+        """
+        for attempt in range(1, attempts + 1):
+            signature = self.model_persistence.artifact_signature()
+            try:
+                model, scaler, version = self.model_persistence.load_versioned()
+            except ArtifactMismatch as e:
+                if attempt == attempts:
+                    raise
+                logger.info(f"{e}, retrying")
+                time.sleep(0.1 * attempt)
+                continue
+            
+            if self.model_persistence.artifact_signature() == signature:
+                break
+            logger.info("Model artifacts changed while loading, retrying")
+        
+        return (model, scaler, version), signature
+    
+    def _get_active(self):
+        active = self._active
+        if active is None:
+            with self._reload_lock:
+                if self._active is None:
+                    logger.info("Loading model for first prediction")
+                    self._active, self._artifact_signature = self._load_active()
+                active = self._active
+        return active
+    
+    def reload_model(self) -> Optional[str]:
+        """
+        Load the artifacts on disk and atomically swap them in.
+        
+        In-flight predictions keep the model they started with; only
+        predictions that begin after the swap see the new version.
+        """
+        with self._reload_lock:
+            previous = self._active[2] if self._active else None
+            self._active, self._artifact_signature = self._load_active()
+            version = self._active[2]
+        
+        logger.info(f"Model reloaded: {previous} -> {version}")
+        return version
+    
+    def reload_if_changed(self) -> bool:
+        """Reload when the artifacts on disk differ from the loaded ones"""
+        signature = self.model_persistence.artifact_signature()
+        if signature is None or signature == self._artifact_signature:
+            return False
+        
+        self.reload_model()
+        return True
+    
+    def warm_up(self, iterations: Optional[int] = None) -> Dict:
+        """
+        Load the model and run synthetic clips through the whole pipeline
+        (file decode with resampling, MFCC, scaler, forest), so the first
+        real request does not pay for loading, librosa's JIT compilation,
+        codec and resampler setup or first-touch page faults.
+        
+        Returns the seconds spent loading plus the per-stage times of the
+        first (cold) and last (warm) pass. With 0 iterations the model is
+        only loaded.
+        """
+        if iterations is None:
+            iterations = self.config.warmup_iterations
+        extractor = self.feature_extractor
+        
+        start = time.perf_counter()
+        model, scaler, _ = self._get_active()
+        timings = {"load_seconds": time.perf_counter() - start, "iterations": iterations}
+        if not iterations:
+            logger.info(f"Loaded model {self.model_version} in {timings['load_seconds']:.2f}s")
+            return timings
+        
+        passes = []
+        with tempfile.TemporaryDirectory() as tmp:
+            # Noise at a rate other than the model's, so decoding also
+            # goes through the resampler
+            path = str(Path(tmp) / "warmup.wav")
+            rng = np.random.default_rng(0)
+            sf.write(path, 0.1 * rng.standard_normal(int(WARMUP_SAMPLE_RATE * extractor.duration))
+                     .astype(np.float32), WARMUP_SAMPLE_RATE)
+            
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                y, _ = extractor.load_audio_fixed_length(path)
+                t1 = time.perf_counter()
+                features = extractor.features_from_fixed_signal(y)
+                t2 = time.perf_counter()
+                model.predict_proba(scaler.transform(features.reshape(1, -1)))
+                t3 = time.perf_counter()
+                passes.append({"decode_seconds": t1 - t0, "mfcc_seconds": t2 - t1,
+                               "model_seconds": t3 - t2, "total_seconds": t3 - t0})
+        
+        timings.update({"first": passes[0], "warm": passes[-1]})
+        logger.info(
+            f"Warmed up model {self.model_version}: load {timings['load_seconds']:.2f}s, "
+            + ", ".join(f"{stage.replace('_seconds', '')} {passes[0][stage]:.3f}s "
+                        f"-> {passes[-1][stage]:.3f}s" for stage in passes[0])
+        )
+        return timings
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        """Version of the model currently serving predictions"""
+        return self._active[2] if self._active else None
+    
+    def predict(self, audio_path: str, return_features: bool = False,
+                digest: Optional[str] = None, timings: bool = False) -> Dict:
+        """
+        Predict the gender for one audio file.
+        
+        With return_features=True the extracted feature vector is included
+        under "features", e.g. to store it alongside feedback.
+        
+        With the prediction cache enabled, a file whose bytes (sha256, or
+        the given digest) were already scored by the serving model is
+        answered from the cache without decoding it.
+        
+        With timings=True the result includes "timings", the seconds spent
+        in each stage (hash, decode, resample, mfcc, scale, model, ...)
+        plus "total"; a cached result only shows the lookup.
+        """
+        if timings:
+            with timing.recording() as spans:
+                result = self.predict(audio_path, return_features, digest)
+            result["timings"] = spans.to_dict()
+            return result
+        
+        with metrics.stage("predict"), self.profiler.sample("predict"):
+            if self.prediction_cache.enabled:
+                if digest is None:
+                    with metrics.stage("hash"):
+                        digest = FeedbackManager.hash_file(audio_path)
+                cached = self.get_cached_prediction(digest, audio_path, return_features)
+                if cached is not None:
+                    return cached
+            
+            features = self.feature_extractor.extract_features(audio_path)
+            result = self.predict_features(features, audio_path, return_features=True)
+        
+        if digest is not None:
+            self.prediction_cache.put(digest, result)
+        if not return_features:
+            result.pop("features")
+        return result
+    
+    def get_cached_prediction(self, digest: str, audio_path: Optional[str] = None,
+                              return_features: bool = False) -> Optional[Dict]:
+        """Cached result for audio with this sha256 under the serving model, or None"""
+        result = self.prediction_cache.get(digest, self.model_version)
+        if result is None:
+            return None
         
+        metrics.inc("prediction_cache_hit")
+        result["audio_path"] = audio_path
+        if not return_features:
+            result.pop("features", None)
+        logger.info(f"Prediction (cached): {result['prediction']} "
+                    f"(confidence: {result['confidence']:.2%})")
+        return result
+    
+    def predict_signal(self, y: np.ndarray, sr: int, return_features: bool = False) -> Dict:
+        """
+        Predict from decoded mono audio, skipping file decoding; the signal
+        is resampled when sr differs from the configured sample rate.
+        """
+        with self.profiler.sample("predict_signal"):
+            features = self.feature_extractor.extract_features_from_signal(y, sr)
+            return self.predict_features(features, None, return_features)
+    
+    def feature_dim(self) -> int:
+        """Length of the feature vectors the serving model expects"""
+        _, scaler, _ = self._get_active()
+        return getattr(scaler, "n_features_in_", None) or 2 * self.config.n_mfcc
+    
+    def validate_features(self, features) -> np.ndarray:
+        """
+        Check client-supplied feature vectors against the serving model.
+        
+        Accepts one vector or a matrix of one vector per row and returns a
+        2-D float array; raises ValueError on a wrong shape or non-finite
+        values.
+        """
+        expected = self.feature_dim()
+        message = (f"Each feature vector must have {expected} floats "
+                   f"({self.config.n_mfcc} MFCC means then stds)")
+        try:
+            features = np.asarray(features, dtype=np.float64)
+        except (TypeError, ValueError):
+            # Rows of different lengths, or elements that are not numbers
+            raise ValueError(message) from None
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        
+        if features.ndim != 2 or features.shape[0] == 0 or features.shape[1] != expected:
+            raise ValueError(f"{message}, got shape {features.shape}")
+        if not np.isfinite(features).all():
+            raise ValueError("Features must be finite numbers")
+        return features
+    
+    def predict_features(self, features: np.ndarray, audio_path: Optional[str] = None,
+                         return_features: bool = False) -> Dict:
+        """Predict from an already extracted feature vector"""
 
-        features = self.feature_extractor.extract_features(audio_path)
-        features_scaled = self._scaler.transform(features.reshape(1, -1))
-        
-        # Predict
-        prediction = self._model.predict(features_scaled)[0]
-        probabilities = self._model.predict_proba(features_scaled)[0]
-        
-        result = {
-            "prediction": self.config.label_map[prediction],
-            "label_id": int(prediction),
-            "confidence": float(probabilities[prediction]),
-            "probabilities": {
-                self.config.label_map[i]: float(prob)
-                for i, prob in enumerate(probabilities)
-            },
-            "audio_path": audio_path
-        }
+        return self.predict_features_batch(features.reshape(1, -1), [audio_path],
+                                           return_features)[0]
+    
+    def predict_features_batch(self, features: np.ndarray,
+                               audio_paths: Optional[List[Optional[str]]] = None,
+                               return_features: bool = False) -> List[Dict]:
+        """
+        Predict many feature vectors (one per row) at once.
+        
+        The scaler and the forest each run once for the whole batch, and
+        labels are taken from the probabilities rather than a second
+        forest evaluation.
+        """
+
+        model, scaler, version = self._get_active()
+        if audio_paths is None:
+            audio_paths = [None] * len(features)
+        
+        start = time.perf_counter()
+        scaled = scaler.transform(features)
+        scaled_at = time.perf_counter()
+        probabilities = model.predict_proba(scaled)
+        predictions = model.classes_[probabilities.argmax(axis=1)]
+        end = time.perf_counter()
+        # Each row's share of the batch, for the shadow latency comparison
+        model_latency = (end - start) / len(features)
+        metrics.observe("scale", scaled_at - start)
+        metrics.observe("model", end - scaled_at)
         
-        logger.info(f"Prediction: {result['prediction']} "
-                   f"(confidence: {result['confidence']:.2%})")
+        results = []
+        for row, prediction, row_probabilities, audio_path in zip(
+                features, predictions, probabilities, audio_paths):
+            # Candidate scoring happens on the shadow worker, not here
+            self.shadow_scorer.submit(row, prediction, row_probabilities,
+                                      model_latency, version)
+            
+            result = {
+                "prediction": self.config.label_map[prediction],
+                "label_id": int(prediction),
+                "confidence": float(row_probabilities[prediction]),
+                "probabilities": {
+                    self.config.label_map[i]: float(prob)
+                    for i, prob in enumerate(row_probabilities)
+                },
+                "audio_path": audio_path,
+                "model_version": version
+            }
+            
+            if return_features:
+                result["features"] = row
+            
+            if len(features) == 1:
+                logger.info(f"Prediction: {result['prediction']} "
+                           f"(confidence: {result['confidence']:.2%})")
+            results.append(result)
+        
+        if len(features) > 1:
+            logger.info(f"Predicted batch of {len(features)} "
+                        f"in {model_latency * len(features) * 1000:.1f} ms")
         
-        return result
+        return results
     
     def predict_batch(self, audio_paths: List[str]) -> List[Dict]:
+        """
+        Predict many files at once.
+        
+        Files are featurized on ``featurize_workers`` threads, then scored
+        with one scaler transform and one forest evaluation. A file that
+        fails yields {"error", "audio_path"} in its place; results keep the
+        order of audio_paths.
+        """
 
-        results = []
-        for path in audio_paths:
+        def featurize(path):
             try:
-                result = self.predict(path)
-                results.append(result)
+                return self.feature_extractor.extract_features(path)
             except Exception as e:
                 logger.error(f"Error predicting {path}: {e}")
-                results.append({"error": str(e), "audio_path": path})
+                return e
+        
+        workers = min(self.config.featurize_workers, len(audio_paths))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix="featurize") as executor:
+                extracted = list(executor.map(featurize, audio_paths))
+        else:
+            extracted = [featurize(path) for path in audio_paths]
+        
+        results = [{"error": str(f), "audio_path": path}
+                   for f, path in zip(extracted, audio_paths)]
+        ok = [i for i, f in enumerate(extracted) if not isinstance(f, Exception)]
+        
+        if ok:
+            try:
+                predictions = self.predict_features_batch(
+                    np.vstack([extracted[i] for i in ok]), [audio_paths[i] for i in ok]
+                )
+            except Exception as e:
+                logger.error(f"Error predicting batch of {len(ok)}: {e}")
+                predictions = [{"error": str(e), "audio_path": audio_paths[i]} for i in ok]
+            for i, result in zip(ok, predictions):
+                results[i] = result
         
         return results
     
-
-    
     def submit_feedback(self, audio_path: str, predicted_label: int,
                        correct_label: int, user_id: Optional[str] = None,
-                       confidence: Optional[float] = None):
+                       confidence: Optional[float] = None,
+                       request_id: Optional[str] = None,
+                       features: Optional[np.ndarray] = None):
 
         self.feedback_manager.save_feedback(
-            audio_path, predicted_label, correct_label, user_id, confidence
+            audio_path, predicted_label, correct_label, user_id, confidence,
+            request_id=request_id,
+            features=features,
+            feature_params=self.feature_extractor.get_params() if features is not None else None
         )
         
-        # Check if we should trigger retraining
+        # Retraining itself runs in the scheduler's worker process
         stats = self.feedback_manager.get_feedback_stats()
         
         if stats["total"] >= self.config.feedback_threshold:
             if stats["total"] % self.config.feedback_threshold == 0:
-                logger.info(f"Feedback threshold reached ({stats['total']} samples). "
-                          "Consider retraining the model.")
+                logger.info(f"Feedback threshold reached ({stats['total']} samples)")
+                self.retrain_scheduler.wake()
+    
+    def import_feedback(self, manifest_path: str) -> Dict:
+        """
+        Bulk-import labelled clips from a CSV or JSONL manifest.
+        
+        Returns imported/duplicate/failed counts, throughput and the
+        per-row failures (see FeedbackImporter).
+        """
+        importer = FeedbackImporter(self.config, self.feedback_manager,
+                                    self.feature_extractor)
+        report = importer.import_manifest(manifest_path)
+        self.retrain_scheduler.wake()
+        return report
     
     def get_feedback_statistics(self) -> Dict:
 
@@ -209,6 +556,59 @@ class GenderDetectionFacade:
     
 
     
+    def load_candidate_model(self) -> Optional[str]:
+        """Start shadow scoring the saved candidate model"""
+        return self.shadow_scorer.load_candidate()
+    
+    def get_shadow_stats(self) -> Dict:
+        """Agreement and latency of the candidate against the active model"""
+        return self.shadow_scorer.get_stats()
+    
+    def promote_candidate(self) -> str:
+        """Make the candidate the active model and stop shadowing it"""
+        if not self.model_persistence.candidate_exists():
+            raise FileNotFoundError("No candidate model to promote")
+        
+        model, scaler, _ = self.model_persistence.load_versioned(candidate=True)
+        candidate_config = self.model_persistence.load_config(candidate=True)
+        
+        self.shadow_scorer.clear_candidate()
+        version = self.model_persistence.save_model(
+            model, scaler, candidate_config.get("metrics")
+        )
+        self._set_active(model, scaler, version)
+        self.model_persistence.delete_candidate()
+        
+        logger.info(f"Promoted candidate {candidate_config.get('model_version')} "
+                    f"as model version {version}")
+        return version
+    
+    def _apply_retrained(self, report: Dict):
+        """
+        Promote (or start shadowing) a candidate that passed validation.
+        
+        Only a candidate validated on held-out original data is promoted
+        automatically; one validated on (self-labelled) feedback alone is
+        shadow-scored until promoted by hand.
+        """
+        validated_on = report.get("validation", {}).get("holdout_source")
+        if self.config.retrain_auto_promote and validated_on == "original":
+            self.promote_candidate()
+        else:
+            if self.config.retrain_auto_promote:
+                logger.warning(f"Not promoting candidate {report.get('candidate_version')}: "
+                               f"validated on {validated_on} data only (set retrain_data_dir); "
+                               "shadow scoring it instead")
+            self.load_candidate_model()
+    
+    def close(self):
+        """Flush background work before shutdown"""
+        self.retrain_scheduler.close()
+        self.feedback_writer.close()
+        self.shadow_scorer.close()
+    
+
+    
     def is_model_trained(self) -> bool:
         """Check if a trained model exists"""
         return self.model_persistence.model_exists()
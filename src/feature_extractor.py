@@ -7,6 +7,8 @@ import numpy as np
 from typing import Tuple
 import logging
 
+import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,55 +22,88 @@ class AudioFeatureExtractor:
         self.duration = config.duration
         self.n_mfcc = config.n_mfcc
     
+    def get_params(self) -> dict:
+        """Parameters that determine the feature vector; cached features must match them"""
+        return {
+            "sample_rate": self.sample_rate,
+            "duration": self.duration,
+            "n_mfcc": self.n_mfcc
+        }
+    
+    def fix_length(self, y: np.ndarray) -> np.ndarray:
+        """Truncate or zero-pad a signal at self.sample_rate to self.duration"""
+        # Calculate target length
+        target_len = int(self.sample_rate * self.duration)
+        
+        # Truncate or pad
+        if len(y) > target_len:
+            y = y[:target_len]
+        elif len(y) < target_len:
+            pad_width = target_len - len(y)
+            y = np.pad(y, (0, pad_width), mode='constant')
+        
+        return y
+    
     def load_audio_fixed_length(self, path: str) -> Tuple[np.ndarray, int]:
 
         try:
-            # Load audio
-            y, sr = librosa.load(path, sr=self.sample_rate)
+            # Decode at the native rate, then resample; librosa.load(sr=...)
+            # does the same in one call, but the two costs differ widely
+            # (a 44.1 kHz upload spends most of its time resampling)
+            with metrics.stage("decode"):
+                y, sr = librosa.load(path, sr=None)
             
-            # Calculate target length
-            target_len = int(self.sample_rate * self.duration)
+            if sr != self.sample_rate:
+                with metrics.stage("resample"):
+                    y = librosa.resample(y, orig_sr=sr, target_sr=self.sample_rate)
             
-            # Truncate or pad
-            if len(y) > target_len:
-                y = y[:target_len]
-            elif len(y) < target_len:
-                pad_width = target_len - len(y)
-                y = np.pad(y, (0, pad_width), mode='constant')
-            
-            return y, self.sample_rate
+            return self.fix_length(y), self.sample_rate
             
         except Exception as e:
             logger.error(f"Error loading audio from {path}: {e}")
             raise
     
-    def extract_features(self, audio_path: str) -> np.ndarray:
-
-        try:
-            # Load audio
-            y, sr = self.load_audio_fixed_length(audio_path)
-            
+    def features_from_fixed_signal(self, y: np.ndarray) -> np.ndarray:
+        """MFCC mean/std features of a fixed-length signal at self.sample_rate"""
+        with metrics.stage("mfcc"):
             # Extract MFCC
             mfcc = librosa.feature.mfcc(
                 y=y,
-                sr=sr,
+                sr=self.sample_rate,
                 n_mfcc=self.n_mfcc
             )
             
             # Calculate statistics
             mfcc_mean = mfcc.mean(axis=1)
             mfcc_std = mfcc.std(axis=1)
+        
+        # Concatenate features
+        features = np.concatenate([mfcc_mean, mfcc_std], axis=0)
+        
+        logger.debug(f"Extracted features shape: {features.shape}")
+        return features
+    
+    def extract_features(self, audio_path: str) -> np.ndarray:
+
+        try:
+            # Load audio
+            y, sr = self.load_audio_fixed_length(audio_path)
             
-            # Concatenate features
-            features = np.concatenate([mfcc_mean, mfcc_std], axis=0)
-            
-            logger.debug(f"Extracted features shape: {features.shape}")
-            return features
+            return self.features_from_fixed_signal(y)
             
         except Exception as e:
             logger.error(f"Error extracting features from {audio_path}: {e}")
             raise
     
+    def extract_features_from_signal(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Features of an already decoded mono signal, resampled if needed"""
+        y = np.asarray(y, dtype=np.float32)
+        if sr != self.sample_rate:
+            with metrics.stage("resample"):
+                y = librosa.resample(y, orig_sr=sr, target_sr=self.sample_rate)
+        
+        return self.features_from_fixed_signal(self.fix_length(y))
+    
     def extract_features_batch(self, audio_paths: list) -> np.ndarray:
 
         features_list = []
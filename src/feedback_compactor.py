@@ -0,0 +1,217 @@
+"""
+Component 9: Feedback Compaction
+Packs settled loose feedback clips into large shard files
+"""
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import librosa
+import logging
+
+from shard_store import (ShardWriter, shard_index_paths, read_shard_index,
+                         PCM_FORMAT, FEATURES_FORMAT)
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"pcm": PCM_FORMAT, "features": FEATURES_FORMAT}
+
+
+class FeedbackCompactor:
+    """
+    Moves feedback older than ``compaction_min_age_days`` out of the class
+    directories and into shards (see shard_store).
+
+    "pcm" shards keep the decoded audio, so features can be recomputed with
+    new extractor parameters; "features" shards keep only the feature rows
+    and are much smaller. Compacted items can no longer be relabelled.
+    """
+
+    def __init__(self, config, feedback_manager, feature_extractor):
+        if config.compaction_format not in FORMATS:
+            raise ValueError(f"Unknown compaction format: {config.compaction_format}. "
+                             f"Choose one of {tuple(FORMATS)}")
+
+        self.config = config
+        self.feedback_manager = feedback_manager
+        self.feature_extractor = feature_extractor
+        self.min_age = timedelta(days=config.compaction_min_age_days)
+        self.shard_size = config.compaction_shard_size
+        self.format = FORMATS[config.compaction_format]
+
+    def _age_reference(self, entry: Dict) -> datetime:
+        stamp = entry.get("updated_at") or entry["timestamp"]
+        return datetime.strptime(stamp, "%Y%m%d_%H%M%S_%f")
+
+    def _candidates(self, class_dir: Path, label_name: str,
+                    entries: List[Dict], cutoff: datetime) -> List[Dict]:
+        """Settled loose clips of one class, journalled or legacy"""
+        candidates = []
+        known = set()
+
+        for entry in entries:
+            if entry.get("shard"):
+                continue
+            path = Path(entry["saved_path"])
+            known.add(path.name)
+            if (entry["correct_class"] == label_name and path.exists()
+                    and self._age_reference(entry) <= cutoff):
+                candidates.append({"path": path, "entry": entry})
+
+        # Clips saved before the journal existed, aged by mtime
+        for path in list(class_dir.glob("*.wav")) + list(class_dir.glob("*.WAV")):
+            if path.name in known:
+                continue
+            if datetime.fromtimestamp(path.stat().st_mtime) <= cutoff:
+                candidates.append({"path": path, "entry": None})
+
+        return sorted(candidates, key=lambda c: c["path"].name)
+
+    def _finish_interrupted(self, class_dir: Path, entries: List[Dict]) -> int:
+        """Remove loose copies of clips a previous run already sharded"""
+        by_name = {Path(e["saved_path"]).name: e for e in entries if not e.get("shard")}
+        moves = []
+        removed = 0
+
+        for index_path in shard_index_paths(class_dir):
+            index = read_shard_index(index_path)
+            for shard_entry in index["entries"]:
+                loose = class_dir / shard_entry["name"]
+                entry = by_name.get(shard_entry["name"])
+                if entry is not None and entry["request_id"] == shard_entry.get("request_id"):
+                    moves.append(self._move(entry, index["data_path"], shard_entry))
+                if loose.exists():
+                    loose.unlink()
+                    loose.with_suffix(".json").unlink(missing_ok=True)
+                    removed += 1
+
+        self.feedback_manager.record_compaction(moves)
+        return removed
+
+    def _move(self, entry: Dict, data_path: str, shard_entry: Dict) -> Dict:
+        location = {k: shard_entry[k] for k in ("offset", "length", "row") if k in shard_entry}
+        return {
+            "request_id": entry["request_id"],
+            "saved_path": f"{data_path}#{shard_entry['name']}",
+            "shard": dict(location, data=str(data_path))
+        }
+
+    def _shard_data(self, path: Path, cached_features: Dict):
+        if self.format == PCM_FORMAT:
+            signal, _ = librosa.load(str(path), sr=self.feature_extractor.sample_rate)
+            return signal
+
+        features = cached_features.get(path)
+        if features is None:
+            features = self.feature_extractor.extract_features(str(path))
+        return features
+
+    def compact(self, now: Optional[datetime] = None) -> Dict:
+        """Compact every class; returns a report of what was packed"""
+        cutoff = (now or datetime.now()) - self.min_age
+        entries = self.feedback_manager.list_feedback()
+        params = self.feature_extractor.get_params()
+        cached_features = (self.feedback_manager.get_cached_features(params)
+                           if self.format == FEATURES_FORMAT else {})
+
+        report = {"compacted": 0, "failed": 0, "shards": 0,
+                  "bytes_before": 0, "bytes_after": 0, "by_class": {}}
+
+        for label_name in self.config.label_map.values():
+            class_dir = self.feedback_manager.feedback_dir / label_name.lower()
+            if not class_dir.exists():
+                continue
+
+            self._finish_interrupted(class_dir, entries)
+            candidates = self._candidates(class_dir, label_name, entries, cutoff)
+            compacted = 0
+
+            for start in range(0, len(candidates), self.shard_size):
+                chunk = candidates[start:start + self.shard_size]
+                packed, failed, before, after = self._write_shard(
+                    class_dir, chunk, params, cached_features
+                )
+                compacted += packed
+                report["failed"] += failed
+                report["bytes_before"] += before
+                report["bytes_after"] += after
+                report["shards"] += int(packed > 0)
+
+            report["compacted"] += compacted
+            report["by_class"][label_name] = compacted
+            logger.info(f"Compacted {compacted} {label_name} clips")
+
+        return report
+
+    def _write_shard(self, class_dir: Path, chunk: List[Dict], params: Dict,
+                     cached_features: Dict):
+        writer = ShardWriter(class_dir, self.format,
+                             sample_rate=self.feature_extractor.sample_rate,
+                             feature_params=params)
+        packed = []
+        failed = 0
+        inodes = set()
+        bytes_before = 0
+
+        try:
+            for candidate in chunk:
+                path, entry = candidate["path"], candidate["entry"]
+                try:
+                    data = self._shard_data(path, cached_features)
+                except Exception as e:
+                    logger.warning(f"Leaving {path} loose: {e}")
+                    failed += 1
+                    continue
+
+                metadata = self._metadata(path, entry)
+                content_hash = metadata.get("content_hash")
+                writer.add(path.name, data, metadata, content_hash=content_hash)
+                packed.append(candidate)
+
+                stat = path.stat()
+                if (stat.st_dev, stat.st_ino) not in inodes:
+                    inodes.add((stat.st_dev, stat.st_ino))
+                    bytes_before += stat.st_size
+        except BaseException:
+            writer.abort()
+            raise
+
+        if not packed:
+            writer.abort()
+            return 0, failed, 0, 0
+
+        index = writer.close()
+
+        # The shard is durable; now point the journal at it and drop the loose copies
+        by_name = {e["name"]: e for e in index["entries"]}
+        self.feedback_manager.record_compaction([
+            self._move(c["entry"], str(writer.data_path), by_name[c["path"].name])
+            for c in packed if c["entry"] is not None
+        ])
+        for candidate in packed:
+            candidate["path"].unlink()
+            candidate["path"].with_suffix(".json").unlink(missing_ok=True)
+
+        return len(packed), failed, bytes_before, writer.data_path.stat().st_size
+
+    def _metadata(self, path: Path, entry: Optional[Dict]) -> Dict:
+        if entry is not None:
+            return {
+                "request_id": entry["request_id"],
+                "status": entry["status"],
+                "timestamp": entry["timestamp"],
+                "content_hash": entry.get("content_hash")
+            }
+
+        # Legacy clip: status is a name component, details may be in a sidecar
+        metadata = {"status": "corrected" if "corrected" in path.stem.split("_") else "correct"}
+        sidecar = path.with_suffix(".json")
+        if sidecar.exists():
+            try:
+                with open(sidecar, "r") as f:
+                    legacy = json.load(f)
+                metadata["status"] = legacy.get("status", metadata["status"])
+                metadata["timestamp"] = legacy.get("timestamp")
+            except (OSError, ValueError):
+                pass
+        return metadata
@@ -0,0 +1,198 @@
+"""
+Component 11: Bulk Feedback Import
+Imports labelled clips listed in a CSV or JSONL manifest
+"""
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from feature_extractor import AudioFeatureExtractor
+from feedback_manager import DuplicateFeedbackError, FeedbackItem, FeedbackManager
+
+logger = logging.getLogger(__name__)
+
+# Failures listed in the report; the rest are only counted
+MAX_REPORTED_FAILURES = 100
+
+_worker_extractor = None
+
+
+def _init_worker(config):
+    global _worker_extractor
+    _worker_extractor = AudioFeatureExtractor(config)
+
+
+def _prepare(path: str) -> Tuple[Optional[object], Optional[str], Optional[str]]:
+    """Hash and featurize one clip: (features, content_hash, error)"""
+    try:
+        content_hash = FeedbackManager.hash_file(path)
+        features = _worker_extractor.extract_features(path)
+        return features, content_hash, None
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+class FeedbackImporter:
+    """
+    Imports annotator batches into the feedback store.
+
+    Manifest rows need ``path`` and ``label`` (class id or name);
+    ``user_id``, ``predicted_label``, ``confidence`` and ``request_id`` are
+    optional. Relative paths are resolved against the manifest's directory.
+    Without a request_id, a row's id is derived from the clip's content and
+    label, so re-running an import skips rows that are already stored.
+
+    Clips are hashed and featurized by a pool of ``import_workers``
+    processes while earlier batches are copied and journalled, so imported
+    feedback never needs decoding again at retrain time.
+    """
+
+    def __init__(self, config, feedback_manager, feature_extractor):
+        self.config = config
+        self.feedback_manager = feedback_manager
+        self.feature_extractor = feature_extractor
+        self.workers = config.import_workers
+        self.batch_size = config.import_batch_size
+
+        self._labels = {name.lower(): label for label, name in config.label_map.items()}
+
+    def _parse_label(self, value) -> int:
+        if isinstance(value, int) and value in self.config.label_map:
+            return value
+        text = str(value).strip()
+        if text.lower() in self._labels:
+            return self._labels[text.lower()]
+        if text.isdigit() and int(text) in self.config.label_map:
+            return int(text)
+        raise ValueError(f"Unknown label: {value!r}")
+
+    def read_manifest(self, manifest_path) -> Tuple[List[Dict], List[Dict]]:
+        """Parse a manifest into (rows, failures); a bad row does not stop the rest"""
+        manifest_path = Path(manifest_path)
+        base_dir = manifest_path.parent
+        rows, failures = [], []
+
+        with open(manifest_path, "r", newline="") as f:
+            if manifest_path.suffix.lower() in (".jsonl", ".ndjson"):
+                raw_rows = []
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        raw_rows.append((line_no, json.loads(line)))
+                    except ValueError as e:
+                        failures.append({"line": line_no, "path": None, "error": f"Bad JSON: {e}"})
+            else:
+                # Line 1 is the header
+                raw_rows = list(enumerate(csv.DictReader(f), 2))
+
+        for line_no, raw in raw_rows:
+            path = raw.get("path") or raw.get("audio_path")
+            try:
+                if not path:
+                    raise ValueError("Missing path")
+                label = self._parse_label(raw.get("label"))
+                predicted = raw.get("predicted_label")
+                confidence = raw.get("confidence")
+                rows.append({
+                    "line": line_no,
+                    "path": str(base_dir / path) if not Path(path).is_absolute() else path,
+                    "label": label,
+                    # Annotator labels with no model prediction count as confirmed
+                    "predicted_label": self._parse_label(predicted) if predicted not in (None, "") else label,
+                    "user_id": raw.get("user_id") or raw.get("user") or None,
+                    "confidence": float(confidence) if confidence not in (None, "") else None,
+                    "request_id": raw.get("request_id") or None
+                })
+            except (ValueError, TypeError) as e:
+                failures.append({"line": line_no, "path": path, "error": str(e)})
+
+        return rows, failures
+
+    def _prepared(self, paths: List[str]):
+        """Yield (features, content_hash, error) per path, in order"""
+        if self.workers <= 1:
+            _init_worker(self.config)
+            yield from map(_prepare, paths)
+            return
+
+        # spawn: forking a server process with live threads is unsafe
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(self.config,)) as executor:
+            yield from executor.map(_prepare, paths, chunksize=8)
+
+    def import_manifest(self, manifest_path) -> Dict:
+        """Import every row of a manifest; returns counts, throughput and failures"""
+        start = time.perf_counter()
+        rows, failures = self.read_manifest(manifest_path)
+        unparsed = n_failed = len(failures)
+        imported = duplicates = 0
+        total_bytes = 0
+        feature_params = self.feature_extractor.get_params()
+
+        def record_failure(row, error):
+            nonlocal n_failed
+            n_failed += 1
+            if len(failures) < MAX_REPORTED_FAILURES:
+                failures.append({"line": row["line"], "path": row["path"], "error": error})
+
+        def flush(batch):
+            nonlocal imported, duplicates, total_bytes
+            items = [item for _, item in batch]
+            results = self.feedback_manager.save_feedback_batch(items, workers=self.workers)
+            for (row, item), result in zip(batch, results):
+                if not isinstance(result, Exception):
+                    imported += 1
+                    total_bytes += Path(result).stat().st_size
+                elif isinstance(result, DuplicateFeedbackError):
+                    duplicates += 1
+                else:
+                    record_failure(row, f"{type(result).__name__}: {result}")
+
+        batch = []
+        prepared = self._prepared([row["path"] for row in rows])
+        for row, (features, content_hash, error) in zip(rows, prepared):
+            if error:
+                record_failure(row, error)
+                continue
+
+            batch.append((row, FeedbackItem(
+                audio_path=row["path"],
+                predicted_label=row["predicted_label"],
+                correct_label=row["label"],
+                user_id=row["user_id"],
+                confidence=row["confidence"],
+                request_id=row["request_id"] or f"import-{content_hash[:32]}-{row['label']}",
+                features=features,
+                feature_params=feature_params,
+                content_hash=content_hash
+            )))
+            if len(batch) >= self.batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        seconds = time.perf_counter() - start
+        report = {
+            "manifest": str(manifest_path),
+            "rows": len(rows) + unparsed,
+            "imported": imported,
+            "duplicates": duplicates,
+            "failed": n_failed,
+            "seconds": seconds,
+            "files_per_second": imported / seconds if seconds else None,
+            "mb_per_second": total_bytes / 1e6 / seconds if seconds else None,
+            "failures": failures
+        }
+        logger.info(f"Imported {imported} clips from {manifest_path} in {seconds:.1f}s "
+                    f"({report['files_per_second']:.1f} files/s), "
+                    f"{duplicates} duplicates, {n_failed} failed")
+        return report
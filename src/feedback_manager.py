@@ -2,18 +2,61 @@
 Component 5: Feedback Management
 Handles user feedback collection for continuous learning
 """
+import copy
+import hashlib
+import os
 import shutil
 import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Union
+import numpy as np
 import logging
 
+import metrics
+from shard_store import shard_index_paths, read_shard_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: feedback is consistent within one process only
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 
+class DuplicateFeedbackError(ValueError):
+    """Feedback for this request_id is already stored"""
+
+
+@dataclass
+class FeedbackItem:
+    """One piece of feedback waiting to be stored"""
+    audio_path: str
+    predicted_label: int
+    correct_label: int
+    user_id: Optional[str] = None
+    confidence: Optional[float] = None
+    request_id: Optional[str] = None
+    features: Optional[np.ndarray] = None
+    feature_params: Optional[Dict] = None
+    move: bool = False  # take ownership of audio_path instead of copying it
+    content_hash: Optional[str] = None  # sha256 of the audio, if the caller has it
+
+
 class FeedbackManager:
-    """Manages user feedback for model improvement"""
+    """
+    Manages user feedback for model improvement.
+    
+    Several processes (e.g. forked API workers) may share one feedback_dir.
+    Writes hold an exclusive lock on <feedback_dir>/.lock and first apply
+    what the others appended to the journal and wrote to index.json, so
+    relabels find feedback saved elsewhere and counters are never lost.
+    """
     
     def __init__(self, config):
 
@@ -25,102 +68,748 @@ class FeedbackManager:
         for label in self.config.label_map.values():
             class_dir = self.feedback_dir / label.lower()
             class_dir.mkdir(exist_ok=True)
+        
+        # Running counters, persisted so stats never need a directory scan
+        self.index_path = self.feedback_dir / "index.json"
+        self.lock_path = self.feedback_dir / ".lock"
+        self._lock = threading.Lock()
+        self._name_lock = threading.Lock()
+        self._reserved_names = set()
+        self._index_signature = None
+        
+        # Append-only journal of saves/relabels, replayed into request_id -> entry
+        self.journal_path = self.feedback_dir / "journal.jsonl"
+        self._journal_offset = 0  # bytes of the journal applied to _entries
+        
+        with self._file_lock():
+            self._counts = self._load_index()
+            self._entries = self._replay_journal()
+        
+        # Append-only float32 feature logs, one per extractor parameter set
+        self.features_dir = self.feedback_dir / "features"
+        self.features_dir.mkdir(exist_ok=True)
+        
+        # Content hash -> one stored copy and its feature rows, so resubmitted
+        # clips are hardlinked and never featurized twice
+        self._blobs = self._index_blobs()
     
-    def save_feedback(self, audio_path: str, predicted_label: int,
-                     correct_label: int, user_id: Optional[str] = None,
-                     confidence: Optional[float] = None):
-
+    def _index_blobs(self) -> Dict[str, Dict]:
+        blobs = {}
+        for entry in self._entries.values():
+            content_hash = entry.get("content_hash")
+            if not content_hash:
+                continue
+            blob = blobs.setdefault(content_hash, {"path": None, "features": {}})
+            if blob["path"] is None and not entry.get("shard"):
+                # Only loose files can be hardlinked
+                blob["path"] = entry["saved_path"]
+            if entry.get("features"):
+                blob["features"].setdefault(entry["features"]["log"], entry["features"])
+        return blobs
+    
+    @staticmethod
+    def hash_file(path, chunk_size: int = 1 << 20) -> str:
+        """sha256 of a file's bytes"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using this feedback_dir"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    @contextmanager
+    def _locked(self):
+        """self._lock and the file lock, with other processes' writes applied"""
+        with self._lock, self._file_lock():
+            self._catch_up()
+            self._reload_index()
+            yield
+    
+    def _read_journal(self, offset: int) -> Tuple[List[Dict], int]:
+        """Records after byte offset, and the offset after the last complete line"""
+        if not self.journal_path.exists():
+            return [], 0
+        
+        with open(self.journal_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        
+        # A line without its newline is still being written (or was torn
+        # by a crash); it is picked up once complete
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A line torn by a crash; everything around it is intact
+                logger.warning(f"Skipping unreadable journal line: {line[:80]!r}")
+        return records, offset + end
+    
+    def _replay_journal(self) -> Dict[str, Dict]:
+        entries = {}
+        records, self._journal_offset = self._read_journal(0)
+        for record in records:
+            self._apply(entries, record)
+        
+        if records:
+            logger.info(f"Replayed feedback journal: {len(entries)} items")
+        return entries
+    
+    def _catch_up(self):
+        """Apply journal records appended by other processes; caller holds self._lock"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            user_suffix = f"_user{user_id}" if user_id else ""
+            size = self.journal_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size == self._journal_offset:
+            return
+        
+        if size < self._journal_offset:
+            # Replaced by a shorter journal: start over
+            self._entries = self._replay_journal()
+            self._blobs = self._index_blobs()
+            return
+        
+        records, self._journal_offset = self._read_journal(self._journal_offset)
+        rebuild_blobs = False
+        for record in records:
+            entry = self._entries.get(record.get("request_id"))
+            old_path = entry["saved_path"] if entry else None
+            self._apply(self._entries, record)
             
-            # Determine if prediction was correct
-            status = "correct" if predicted_label == correct_label else "corrected"
+            if record["op"] == "save":
+                self._track_blob(record)
+            elif record["op"] == "relabel":
+                blob = self._blobs.get(entry.get("content_hash")) if entry else None
+                if blob and blob["path"] == old_path:
+                    blob["path"] = record["saved_path"]
+            else:
+                rebuild_blobs = True
+        
+        if rebuild_blobs:
+            self._blobs = self._index_blobs()
+    
+    def _track_blob(self, record: Dict):
+        """Remember a saved clip's copy and feature rows under its content hash"""
+        if not record.get("content_hash"):
+            return
+        blob = self._blobs.setdefault(record["content_hash"],
+                                      {"path": record["saved_path"], "features": {}})
+        if not record["deduplicated"]:
+            blob["path"] = record["saved_path"]
+        if record.get("features"):
+            blob["features"].setdefault(record["features"]["log"], record["features"])
+    
+    def _apply(self, entries: Dict[str, Dict], record: Dict):
+        """Apply one journal record to the request_id index"""
+        op = record["op"]
+        
+        if op == "save":
+            entry = dict(record)
+            del entry["op"]
+            entries[record["request_id"]] = entry
+        elif op == "relabel":
+            entry = entries.get(record["request_id"])
+            if entry is not None:
+                entry.update({k: v for k, v in record.items()
+                              if k not in ("op", "request_id", "timestamp")})
+                entry["updated_at"] = record["timestamp"]
+        elif op == "compact":
+            entry = entries.get(record["request_id"])
+            if entry is not None:
+                entry["saved_path"] = record["saved_path"]
+                entry["shard"] = record["shard"]
+        elif op == "clear":
+            class_name = record.get("class")
+            for request_id in [rid for rid, e in entries.items()
+                               if class_name is None
+                               or e["correct_class"].lower() == class_name.lower()]:
+                del entries[request_id]
+    
+    def _append_journal(self, records: List[Dict], fsync: bool = False):
+        """Append and apply journal records in one write; caller holds self._locked()"""
+        payload = "".join(json.dumps(record) + "\n" for record in records).encode()
+        with open(self.journal_path, "ab") as f:
+            if f.tell() > self._journal_offset:
+                # End a line torn by a crash, so these records start on their own
+                payload = b"\n" + payload
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_offset = f.tell()
+        
+        for record in records:
+            self._apply(self._entries, record)
+    
+    def _empty_counts(self) -> Dict:
+        return {
+            label_name: {"total": 0, "correct": 0, "corrected": 0}
+            for label_name in self.config.label_map.values()
+        }
+    
+    def _stat_signature(self, path: Path):
+        stat = path.stat()
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _read_index(self) -> Dict:
+        signature = self._stat_signature(self.index_path)
+        with open(self.index_path, "r") as f:
+            counts = json.load(f)["by_class"]
+        
+        # Labels added since the index was written start at zero
+        for label_name, empty in self._empty_counts().items():
+            counts.setdefault(label_name, empty)
+        self._index_signature = signature
+        return counts
+    
+    def _load_index(self) -> Dict:
+        if self.index_path.exists():
+            try:
+                return self._read_index()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Feedback index unreadable ({e}), rebuilding")
+        
+        return self._scan_counts(persist=True)
+    
+    def _reload_index(self):
+        """Take up counters written by another process; caller holds self._lock"""
+        try:
+            if self._stat_signature(self.index_path) == self._index_signature:
+                return
+            self._counts = self._read_index()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Feedback index unreadable ({e}), keeping counters in memory")
+    
+    def _write_index(self):
+        """Persist the counters; caller holds self._locked()"""
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "by_class": self._counts}, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_signature = self._stat_signature(self.index_path)
+    
+    def _scan_counts(self, persist: bool = False) -> Dict:
+        """Count feedback by globbing the class directories (O(total feedback))"""
+        counts = self._empty_counts()
+        
+        for label_name in self.config.label_map.values():
+            label_dir = self.feedback_dir / label_name.lower()
             
-            # Get correct label directory
-            correct_label_name = self.config.label_map[correct_label].lower()
-            target_dir = self.feedback_dir / correct_label_name
+            if not label_dir.exists():
+                continue
             
-            # Copy audio file
-            source = Path(audio_path)
-            if not source.exists():
-                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+            # Count audio files
+            audio_files = list(label_dir.glob("*.wav")) + list(label_dir.glob("*.WAV"))
             
-            target_name = f"{timestamp}_{status}{user_suffix}{source.suffix}"
-            target_path = target_dir / target_name
+            # Status is a name component: <date>_<time>_<us>_<status>[_user<id>]
+            statuses = [f.stem.split("_") for f in audio_files]
             
-            shutil.copy2(audio_path, target_path)
+            # Compacted feedback is counted from the shard indexes
+            for index_path in shard_index_paths(label_dir):
+                statuses.extend([entry.get("status")]
+                                for entry in read_shard_index(index_path)["entries"])
             
-            # Save metadata
-            metadata = {
-                "timestamp": timestamp,
-                "predicted_label": predicted_label,
-                "predicted_class": self.config.label_map[predicted_label],
-                "correct_label": correct_label,
-                "correct_class": self.config.label_map[correct_label],
-                "status": status,
-                "user_id": user_id,
-                "confidence": confidence,
-                "original_path": str(audio_path),
-                "saved_path": str(target_path)
+            counts[label_name] = {
+                "total": len(statuses),
+                "correct": sum("correct" in parts for parts in statuses),
+                "corrected": sum("corrected" in parts for parts in statuses)
             }
+        
+        if persist:
+            self._counts = counts
+            self._write_index()
+        
+        return counts
+    
+    def rebuild_index(self) -> Dict:
+        """Recount feedback from disk and rewrite the index (recovery)"""
+        with self._locked():
+            self._scan_counts(persist=True)
+        
+        logger.info("Feedback index rebuilt")
+        return self.get_feedback_stats()
+    
+    def _default_feature_params(self) -> Dict:
+        return {
+            "sample_rate": self.config.sample_rate,
+            "duration": self.config.duration,
+            "n_mfcc": self.config.n_mfcc
+        }
+    
+    def _feature_log_key(self, feature_params: Dict) -> str:
+        encoded = json.dumps(feature_params, sort_keys=True).encode()
+        return hashlib.sha1(encoded).hexdigest()[:12]
+    
+    def _append_features(self, rows: List[np.ndarray], feature_params: Dict,
+                         fsync: bool = False) -> List[Dict]:
+        """Append rows to the feature log; caller holds self._lock"""
+        data = np.ascontiguousarray(np.vstack([np.ravel(r) for r in rows]), dtype="<f4")
+        dim = data.shape[1]
+        
+        key = self._feature_log_key(feature_params)
+        log_path = self.features_dir / f"{key}.f32"
+        header_path = self.features_dir / f"{key}.json"
+        
+        if not header_path.exists():
+            with open(header_path, "w") as f:
+                json.dump({"params": feature_params, "dim": dim, "dtype": "<f4"}, f)
+        
+        row_bytes = dim * 4
+        with open(log_path, "ab") as f:
+            size = f.tell()
+            if size % row_bytes:
+                # Drop a torn row left by a crash so offsets stay aligned
+                size -= size % row_bytes
+                f.truncate(size)
+                f.seek(size)
+            f.write(data.tobytes())
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        
+        first_row = size // row_bytes
+        return [{"log": key, "row": first_row + i} for i in range(len(rows))]
+    
+    def get_cached_features(self, feature_params: Optional[Dict] = None) -> Dict[Path, np.ndarray]:
+        """
+        Stored feature vectors by saved audio path.
+        
+        Only features extracted with exactly ``feature_params`` are returned;
+        anything else has to be decoded again.
+        """
+        feature_params = feature_params or self._default_feature_params()
+        key = self._feature_log_key(feature_params)
+        log_path = self.features_dir / f"{key}.f32"
+        header_path = self.features_dir / f"{key}.json"
+        
+        if not log_path.exists() or not header_path.exists():
+            return {}
+        
+        with open(header_path, "r") as f:
+            dim = json.load(f)["dim"]
+        
+        with self._lock:
+            self._catch_up()
+            rows = {}
+            for entry in self._entries.values():
+                ref = entry.get("features")
+                if not ref or ref["log"] != key:
+                    # A duplicate may share the row stored for its first copy
+                    blob = self._blobs.get(entry.get("content_hash"), {})
+                    ref = blob.get("features", {}).get(key)
+                if ref:
+                    rows[Path(entry["saved_path"])] = ref["row"]
+        
+        if not rows:
+            return {}
+        
+        n_rows = log_path.stat().st_size // (dim * 4)
+        log = np.memmap(log_path, dtype="<f4", mode="r", shape=(n_rows, dim))
+        
+        cached = {
+            path: np.array(log[row], dtype=np.float64)
+            for path, row in rows.items()
+            if row < n_rows
+        }
+        del log
+        return cached
+    
+    def _target_name(self, timestamp: str, status: str,
+                     user_id: Optional[str], suffix: str) -> str:
+        user_suffix = f"_user{user_id}" if user_id else ""
+        return f"{timestamp}_{status}{user_suffix}{suffix}"
+    
+    def _reserve_path(self, target_dir: Path, target_name: str) -> Path:
+        """
+        A free path for target_name in target_dir, numbered _1, _2, ... if
+        taken. Batches can produce several saves within the same
+        microsecond, and parallel stores must not pick the same free name,
+        so the path stays reserved until the caller discards it from
+        self._reserved_names.
+        """
+        name = Path(target_name)
+        target_path = target_dir / target_name
+        with self._name_lock:
+            n = 1
+            while target_path.exists() or target_path in self._reserved_names:
+                target_path = target_dir / f"{name.stem}_{n}{name.suffix}"
+                n += 1
+            self._reserved_names.add(target_path)
+        return target_path
+    
+    def _move_audio(self, old_path: Path, target_dir: Path, target_name: str) -> Path:
+        """Rename a stored clip to target_name (or a free numbered variant); never overwrites"""
+        while True:
+            new_path = self._reserve_path(target_dir, target_name)
+            try:
+                # A link fails rather than replacing a file that appeared
+                # since the name was picked (e.g. by another process)
+                os.link(old_path, new_path)
+            except FileExistsError:
+                continue
+            except OSError:
+                if new_path.exists():
+                    continue
+                os.replace(old_path, new_path)
+                return new_path
+            finally:
+                with self._name_lock:
+                    self._reserved_names.discard(new_path)
+            old_path.unlink()
+            return new_path
+    
+    def _store_audio(self, item: FeedbackItem, fsync: bool = False) -> Tuple[Dict, Path]:
+        """Copy (or move) one clip into its class directory and build its journal record"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        request_id = item.request_id or uuid.uuid4().hex
+        
+        if request_id in self._entries:
+            raise DuplicateFeedbackError(f"Feedback already saved for request {request_id}")
+        
+        # Determine if prediction was correct
+        status = "correct" if item.predicted_label == item.correct_label else "corrected"
+        
+        # Get correct label directory
+        correct_label_name = self.config.label_map[item.correct_label].lower()
+        target_dir = self.feedback_dir / correct_label_name
+        
+        source = Path(item.audio_path)
+        if not source.exists():
+            raise FileNotFoundError(f"Audio file not found: {item.audio_path}")
+        
+        target_path = self._reserve_path(
+            target_dir, self._target_name(timestamp, status, item.user_id, source.suffix)
+        )
+        
+        try:
+            content_hash = item.content_hash or self.hash_file(source)
+            with self._lock:
+                blob = self._blobs.get(content_hash)
+                existing = Path(blob["path"]) if blob and blob["path"] else None
+            
+            # Identical audio is stored once; later submissions are hardlinks
+            deduplicated = False
+            if existing is not None and existing.exists():
+                try:
+                    os.link(existing, target_path)
+                    deduplicated = True
+                except OSError as e:
+                    logger.debug(f"Hardlink to {existing} failed ({e}), copying")
+            
+            if deduplicated:
+                if item.move:
+                    source.unlink()
+            elif item.move:
+                shutil.move(str(source), target_path)
+            else:
+                shutil.copy2(source, target_path)
+        finally:
+            with self._name_lock:
+                self._reserved_names.discard(target_path)
+        
+        if fsync and not deduplicated:
+            with open(target_path, "rb") as f:
+                os.fsync(f.fileno())
+        
+        record = {
+            "op": "save",
+            "request_id": request_id,
+            "timestamp": timestamp,
+            "predicted_label": item.predicted_label,
+            "predicted_class": self.config.label_map[item.predicted_label],
+            "correct_label": item.correct_label,
+            "correct_class": self.config.label_map[item.correct_label],
+            "status": status,
+            "user_id": item.user_id,
+            "confidence": item.confidence,
+            "original_path": str(item.audio_path),
+            "saved_path": str(target_path),
+            "content_hash": content_hash,
+            "deduplicated": deduplicated
+        }
+        return record, target_path
+    
+    def save_feedback_batch(self, items: List[FeedbackItem], fsync: bool = False,
+                            workers: int = 1) -> List[Union[str, Exception]]:
+        """
+        Save many feedback items with one journal append and one index write.
+        
+        Returns, per item, the saved path or the exception that item raised;
+        a bad item does not fail the rest of the batch. With fsync=True the
+        audio, feature rows and journal are on disk before this returns.
+        With workers > 1 the audio files are copied by that many threads.
+        """
+        results = [None] * len(items)
+        staged = []
+        
+        def store(item):
+            try:
+                with metrics.stage("feedback_store"):
+                    return self._store_audio(item, fsync)
+            except Exception as e:
+                logger.error(f"Error saving feedback: {e}")
+                return e
+        
+        if workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix="feedback-store") as executor:
+                stored = list(executor.map(store, items))
+        else:
+            stored = [store(item) for item in items]
+        
+        for i, (item, outcome) in enumerate(zip(items, stored)):
+            if isinstance(outcome, Exception):
+                results[i] = outcome
+            else:
+                record, target_path = outcome
+                staged.append((i, item, record, target_path))
+        
+        if not staged:
+            return results
+        
+        with self._locked(), metrics.stage("feedback_commit"):
+            committed = []
+            seen = set()
+            for i, item, record, target_path in staged:
+                request_id = record["request_id"]
+                if request_id in self._entries or request_id in seen:
+                    target_path.unlink(missing_ok=True)
+                    results[i] = DuplicateFeedbackError(
+                        f"Feedback already saved for request {request_id}"
+                    )
+                    logger.error(f"Error saving feedback: {results[i]}")
+                    continue
+                seen.add(request_id)
+                committed.append((i, item, record, target_path))
             
-            metadata_path = target_path.with_suffix(".json")
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f, indent=2)
+            # One feature log append per extractor parameter set, and one row
+            # per distinct clip
+            groups = {}
+            for i, item, record, _ in committed:
+                if item.features is None:
+                    continue
+                params = item.feature_params or self._default_feature_params()
+                key = self._feature_log_key(params)
+                content_hash = record["content_hash"]
+                
+                known = self._blobs.get(content_hash, {}).get("features", {}).get(key)
+                if known:
+                    record["features"] = known
+                    continue
+                
+                _, rows, by_hash = groups.setdefault(key, (params, [], {}))
+                if content_hash not in by_hash:
+                    by_hash[content_hash] = []
+                    rows.append((content_hash, item.features))
+                by_hash[content_hash].append(record)
             
-            logger.info(f"Feedback saved: {target_path}")
+            for params, rows, by_hash in groups.values():
+                refs = self._append_features([f for _, f in rows], params, fsync)
+                for (content_hash, _), ref in zip(rows, refs):
+                    for record in by_hash[content_hash]:
+                        record["features"] = ref
             
-        except Exception as e:
-            logger.error(f"Error saving feedback: {e}")
-            raise
+            if committed:
+                self._append_journal([record for _, _, record, _ in committed], fsync)
+                
+                for i, item, record, target_path in committed:
+                    class_counts = self._counts[record["correct_class"]]
+                    class_counts["total"] += 1
+                    class_counts[record["status"]] += 1
+                    results[i] = str(target_path)
+                    self._track_blob(record)
+                
+                self._write_index()
+        
+        return results
     
-    def get_feedback_stats(self) -> Dict:
+    def save_feedback(self, audio_path: str, predicted_label: int,
+                     correct_label: int, user_id: Optional[str] = None,
+                     confidence: Optional[float] = None,
+                     request_id: Optional[str] = None,
+                     features: Optional[np.ndarray] = None,
+                     feature_params: Optional[Dict] = None,
+                     move: bool = False) -> str:
 
-        stats = {
-            "total": 0,
-            "by_class": {},
-            "correct_predictions": 0,
-            "corrected_predictions": 0
-        }
+        item = FeedbackItem(
+            audio_path=audio_path,
+            predicted_label=predicted_label,
+            correct_label=correct_label,
+            user_id=user_id,
+            confidence=confidence,
+            request_id=request_id,
+            features=features,
+            feature_params=feature_params,
+            move=move
+        )
         
-        for label_name in self.config.label_map.values():
-            label_dir = self.feedback_dir / label_name.lower()
+        result = self.save_feedback_batch([item])[0]
+        if isinstance(result, Exception):
+            raise result
+        
+        logger.info(f"Feedback saved: {result}")
+        return result
+    
+    def get_feedback(self, request_id: str) -> Optional[Dict]:
+        """Current journal entry for a request, or None"""
+        with self._lock:
+            # Saved or relabelled by another process, possibly
+            self._catch_up()
+            entry = self._entries.get(request_id)
+            return dict(entry) if entry else None
+    
+    def list_feedback(self) -> List[Dict]:
+        """Snapshot of every journalled feedback entry"""
+        with self._lock:
+            self._catch_up()
+            return [dict(entry) for entry in self._entries.values()]
+    
+    def record_compaction(self, moves: List[Dict]):
+        """
+        Journal that items now live in a shard.
+        
+        Each move is {"request_id", "saved_path", "shard"}; saved_path is the
+        shard member path used as the item's identity from now on.
+        """
+        if not moves:
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        with self._locked():
+            self._append_journal([
+                dict(move, op="compact", timestamp=timestamp) for move in moves
+            ], fsync=True)
+            self._blobs = self._index_blobs()
+    
+    def update_feedback(self, request_id: str, new_correct_label: int,
+                        user_id: Optional[str] = None) -> bool:
+        """
+        Relabel saved feedback.
+        
+        Appends a journal record and renames the audio into the new class
+        directory; returns False when the request_id is unknown, also to
+        the processes sharing this feedback_dir.
+        """
+        if new_correct_label not in self.config.label_map:
+            raise ValueError(f"Unknown label: {new_correct_label}")
+        
+        with self._locked():
+            entry = self._entries.get(request_id)
+            if entry is None:
+                logger.warning(f"No feedback found for request {request_id}")
+                return False
             
-            if not label_dir.exists():
-                continue
+            if entry.get("shard"):
+                raise ValueError(f"Feedback {request_id} is settled and compacted; "
+                                 "it can no longer be relabelled")
             
-            # Count audio files
-            audio_files = list(label_dir.glob("*.wav")) + list(label_dir.glob("*.WAV"))
+            old_path = Path(entry["saved_path"])
+            old_class = entry["correct_class"]
+            old_status = entry["status"]
+            user_id = user_id or entry["user_id"]
             
-            # Count correct vs corrected
-            correct = len([f for f in audio_files if "_correct_" in f.name])
-            corrected = len([f for f in audio_files if "_corrected_" in f.name])
+            status = "correct" if entry["predicted_label"] == new_correct_label else "corrected"
+            new_class = self.config.label_map[new_correct_label]
+            new_dir = self.feedback_dir / new_class.lower()
+            new_name = self._target_name(entry["timestamp"], status, user_id, old_path.suffix)
             
-            stats["by_class"][label_name] = {
-                "total": len(audio_files),
-                "correct": correct,
-                "corrected": corrected
-            }
+            # A numbered variant of the wanted name (same timestamp as
+            # another clip) is already right and keeps its number
+            new_stem = Path(new_name).stem
+            old_stem = old_path.stem
+            already_named = old_path.parent == new_dir and (
+                old_stem == new_stem
+                or (old_stem.startswith(new_stem + "_") and old_stem[len(new_stem) + 1:].isdigit())
+            )
+            
+            new_path = old_path
+            if not already_named:
+                new_path = self._move_audio(old_path, new_dir, new_name)
+                
+                blob = self._blobs.get(entry.get("content_hash"))
+                if blob and blob["path"] and Path(blob["path"]) == old_path:
+                    blob["path"] = str(new_path)
+            
+            self._append_journal([{
+                "op": "relabel",
+                "request_id": request_id,
+                "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S_%f"),
+                "correct_label": new_correct_label,
+                "correct_class": new_class,
+                "status": status,
+                "user_id": user_id,
+                "saved_path": str(new_path)
+            }])
             
-            stats["total"] += len(audio_files)
-            stats["correct_predictions"] += correct
-            stats["corrected_predictions"] += corrected
+            self._counts[old_class]["total"] -= 1
+            self._counts[old_class][old_status] -= 1
+            self._counts[new_class]["total"] += 1
+            self._counts[new_class][status] += 1
+            self._write_index()
+        
+        logger.info(f"Feedback {request_id} relabelled: {old_class} -> {new_class}")
+        return True
+    
+    def get_feedback_stats(self) -> Dict:
+
+        with self._lock:
+            self._reload_index()
+            by_class = copy.deepcopy(self._counts)
         
-        return stats
+        return {
+            "total": sum(c["total"] for c in by_class.values()),
+            "by_class": by_class,
+            "correct_predictions": sum(c["correct"] for c in by_class.values()),
+            "corrected_predictions": sum(c["corrected"] for c in by_class.values())
+        }
     
     def clear_feedback(self, class_name: Optional[str] = None):
 
-        if class_name:
-            class_dir = self.feedback_dir / class_name.lower()
-            if class_dir.exists():
-                shutil.rmtree(class_dir)
-                class_dir.mkdir()
-                logger.info(f"Cleared feedback for class: {class_name}")
-        else:
-            for label_name in self.config.label_map.values():
-                class_dir = self.feedback_dir / label_name.lower()
+        with self._locked():
+            if class_name:
+                class_dir = self.feedback_dir / class_name.lower()
                 if class_dir.exists():
                     shutil.rmtree(class_dir)
                     class_dir.mkdir()
-            logger.info("Cleared all feedback data")
\ No newline at end of file
+                    logger.info(f"Cleared feedback for class: {class_name}")
+                
+                for label_name in self._counts:
+                    if label_name.lower() == class_name.lower():
+                        self._counts[label_name] = {"total": 0, "correct": 0, "corrected": 0}
+                self._append_journal([{
+                    "op": "clear",
+                    "class": class_name,
+                    "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                }])
+            else:
+                for label_name in self.config.label_map.values():
+                    class_dir = self.feedback_dir / label_name.lower()
+                    if class_dir.exists():
+                        shutil.rmtree(class_dir)
+                        class_dir.mkdir()
+                self._counts = self._empty_counts()
+                shutil.rmtree(self.features_dir)
+                self.features_dir.mkdir()
+                self._append_journal([{
+                    "op": "clear",
+                    "class": None,
+                    "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                }])
+                logger.info("Cleared all feedback data")
+            
+            self._blobs = self._index_blobs()
+            self._write_index()
\ No newline at end of file
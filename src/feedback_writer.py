@@ -0,0 +1,225 @@
+"""
+Component 7: Asynchronous Feedback Writer
+Moves feedback persistence off the request path
+"""
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+from feedback_manager import FeedbackItem
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("buffered", "fsync")
+
+
+class FeedbackWriter:
+    """
+    Background writer that batches feedback saves.
+
+    Durability semantics:
+    - submit() returns once the item is queued; nothing is on disk yet.
+    - An item is written when its batch is flushed, either because
+      ``feedback_batch_size`` items are queued or ``feedback_flush_interval``
+      seconds have passed since the first item of the batch.
+    - "buffered" durability hands the batch to the OS (survives a process
+      crash, not a power loss); "fsync" syncs audio, feature rows and the
+      journal before the batch counts as written.
+    - flush() and close() block until everything queued so far is written.
+      Items still queued when the process is killed are lost.
+
+    When the queue is full, submit() writes the item synchronously rather
+    than dropping it, so overload degrades latency, not feedback.
+
+    Items submitted with ``move=True`` hand their file to the writer: it is
+    moved into the store, or deleted if the item fails to save.
+    """
+
+    def __init__(self, feedback_manager, config):
+        if config.feedback_durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Unknown feedback durability: {config.feedback_durability}. "
+                f"Choose one of {DURABILITY_MODES}"
+            )
+
+        self.feedback_manager = feedback_manager
+        self.batch_size = config.feedback_batch_size
+        self.flush_interval = config.feedback_flush_interval
+        self.fsync = config.feedback_durability == "fsync"
+
+        self._queue = queue.Queue(maxsize=config.feedback_queue_size)
+        self._thread = None
+        self._stop = threading.Event()
+
+        # Items submitted but not yet written, for flush() and is_pending()
+        self._outstanding = 0
+        self._pending_ids = set()
+        self._cond = threading.Condition()
+
+        self._metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "sync_writes": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "last_batch_seconds": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feedback-writer",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(f"Feedback writer started (batch {self.batch_size}, "
+                    f"interval {self.flush_interval}s, "
+                    f"{'fsync' if self.fsync else 'buffered'})")
+
+    def submit(self, item: FeedbackItem) -> bool:
+        """
+        Queue an item for writing.
+
+        Returns True if it was queued, False if it was written synchronously
+        (writer not running or queue full).
+        """
+        if not self.running:
+            with self._cond:
+                self._metrics["sync_writes"] += 1
+            self._write([item])
+            return False
+
+        with self._cond:
+            self._outstanding += 1
+            if item.request_id:
+                self._pending_ids.add(item.request_id)
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            pass
+        else:
+            with self._cond:
+                self._metrics["enqueued"] += 1
+                self._metrics["max_queue_depth"] = max(
+                    self._metrics["max_queue_depth"], self._queue.qsize()
+                )
+            return True
+
+        # Queue full: write on the caller's thread instead of dropping
+        with self._cond:
+            self._metrics["sync_writes"] += 1
+        try:
+            self._write([item])
+        finally:
+            self._done([item])
+        return False
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    # On shutdown, drain whatever is already queued without waiting
+                    remaining = 0
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+            self._done(batch)
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        try:
+            results = self.feedback_manager.save_feedback_batch(batch, fsync=self.fsync)
+        except Exception as e:
+            logger.error(f"Feedback batch of {len(batch)} failed: {e}")
+            results = [e] * len(batch)
+        elapsed = time.perf_counter() - start
+
+        failed = 0
+        for item, result in zip(batch, results):
+            if isinstance(result, Exception):
+                failed += 1
+                if item.move:
+                    # The writer owns moved files; a failed save must not leak them
+                    Path(item.audio_path).unlink(missing_ok=True)
+
+        with self._cond:
+            self._metrics["written"] += len(batch) - failed
+            self._metrics["failed"] += failed
+            self._metrics["batches"] += 1
+            self._metrics["last_batch_size"] = len(batch)
+            self._metrics["last_batch_seconds"] = elapsed
+
+    def _done(self, batch):
+        with self._cond:
+            self._outstanding -= len(batch)
+            for item in batch:
+                self._pending_ids.discard(item.request_id)
+            self._cond.notify_all()
+
+    def is_pending(self, request_id: str) -> bool:
+        """True while a submitted item has not been written yet"""
+        with self._cond:
+            return request_id in self._pending_ids
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far is written"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Drain the queue and stop the writer thread (shutdown hook)"""
+        if not self.running:
+            return True
+
+        self._stop.set()
+        self._thread.join(timeout)
+        drained = not self._thread.is_alive()
+        if drained:
+            self._thread = None
+
+            # Items that raced in after the thread's last look at the queue
+            leftovers = []
+            while True:
+                try:
+                    leftovers.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if leftovers:
+                self._write(leftovers)
+                self._done(leftovers)
+        else:
+            logger.warning(f"Feedback writer did not drain within {timeout}s "
+                           f"({self._queue.qsize()} items queued)")
+
+        logger.info("Feedback writer stopped")
+        return drained
+
+    def get_metrics(self) -> Dict:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics["outstanding"] = self._outstanding
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_capacity"] = self._queue.maxsize
+        return metrics
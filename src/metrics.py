@@ -0,0 +1,231 @@
+"""
+Component 13: Metrics
+Per-stage latency histograms and counters in Prometheus text format
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable, Tuple
+
+import timing
+
+PREFIX = "gender_detection_"
+
+# Seconds; covers a cached hit (sub-millisecond) up to a long clip on a busy box
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = sorted((labels, list(counts), total)
+                            for labels, (counts, total) in self._series.items())
+        bounds = self.buckets + (float("inf"),)
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """Current value read from a callback at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, callback):
+        self.name = PREFIX + name
+        self.help = help
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        try:
+            value = self.callback()
+        except Exception:
+            return
+        if value is not None:
+            yield f"{self.name} {_number(value)}"
+
+
+class _Stage:
+    """Times a with-block into the stage histogram and the active span recorder"""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        timing.record(self.name, seconds)
+        if self.registry.enabled:
+            self.registry.stage_seconds.observe(seconds, self.name)
+            if exc_type is not None:
+                self.registry.stage_errors.inc(self.name)
+        return False
+
+
+class _NoStage:
+    """Stand-in for _Stage while metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them for scraping.
+
+    Disabled (the default), stage() returns a shared no-op context and
+    observe()/inc() return after one attribute check, so library use,
+    training and tests pay nothing measurable. Stages and observations
+    are also added to the active timing.SpanRecorder, if any, whether or
+    not the registry is enabled. The API enables it from
+    config.metrics_enabled. Each process has its own registry; under the
+    pre-fork server a scrape sees the worker that answered it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stage_seconds = Histogram(
+            "stage_seconds", "Time spent in each processing stage", ("stage",)
+        )
+        self.stage_errors = Counter(
+            "stage_errors_total", "Stages that raised", ("stage",)
+        )
+        self.request_seconds = Histogram(
+            "http_request_seconds", "HTTP request latency by route and status",
+            ("route", "status")
+        )
+        self.events = Counter(
+            "events_total", "Notable events, e.g. prediction cache hits", ("event",)
+        )
+        self._metrics = [self.stage_seconds, self.stage_errors,
+                         self.request_seconds, self.events]
+
+    def configure(self, config):
+        self.enabled = config.metrics_enabled
+
+    def add_gauge(self, name: str, help: str, callback):
+        """Expose callback() as a gauge, e.g. a queue depth"""
+        self._metrics.append(Gauge(name, help, callback))
+
+    def stage(self, name: str):
+        """Context manager timing one stage, e.g. ``with REGISTRY.stage("mfcc"):``"""
+        if not self.enabled and timing.current() is None:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """Record a stage timed by the caller"""
+        timing.record(name, seconds)
+        if self.enabled:
+            self.stage_seconds.observe(seconds, name)
+
+    def inc(self, event: str, amount: float = 1):
+        if self.enabled:
+            self.events.inc(event, amount=amount)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Shorthands for instrumented modules: metrics.stage("mfcc") etc.
+def stage(name: str):
+    return REGISTRY.stage(name)
+
+
+def observe(name: str, seconds: float):
+    REGISTRY.observe(name, seconds)
+
+
+def inc(event: str, amount: float = 1):
+    REGISTRY.inc(event, amount)
@@ -2,14 +2,26 @@
 Component 4: Model Persistence
 Handles saving and loading trained models
 """
+import importlib.util
 import joblib
 import json
+import os
+from datetime import datetime
 from pathlib import Path
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Codecs accepted by joblib.dump; lz4 only when the lz4 package is installed
+SUPPORTED_CODECS = ("zlib", "gzip", "bz2", "lzma", "xz") + (
+    ("lz4",) if importlib.util.find_spec("lz4") is not None else ()
+)
+
+
+class ArtifactMismatch(RuntimeError):
+    """Model, scaler and config on disk come from different saves"""
+
 
 class ModelPersistence:
     """Handles model serialization and deserialization"""
@@ -19,67 +31,156 @@ class ModelPersistence:
         self.model_path = Path(config.model_path)
         self.scaler_path = Path(config.scaler_path)
         self.config_path = Path(config.config_path)
+        self.candidate_model_path = Path(config.candidate_model_path)
+        self.candidate_scaler_path = Path(config.candidate_scaler_path)
+        self.candidate_config_path = Path(config.candidate_config_path)
+        self.shadow_stats_path = Path(config.shadow_stats_path)
+        self.compression_codec = config.compression_codec
+        self.compression_level = config.compression_level
+        
+        if (self.compression_codec is not None
+                and self.compression_codec not in SUPPORTED_CODECS):
+            if self.compression_codec == "lz4":
+                raise ValueError("Compression codec lz4 needs the lz4 package; "
+                                 "pip install lz4 or choose another codec")
+            raise ValueError(
+                f"Unsupported compression codec: {self.compression_codec}. "
+                f"Choose one of {SUPPORTED_CODECS} or None"
+            )
         
         # Ensure artifacts directory exists
         self.model_path.parent.mkdir(parents=True, exist_ok=True)
     
-    def save_model(self, model, scaler, metrics: Dict = None):
+    def _compress_arg(self):
+        """joblib ``compress`` argument for the configured codec"""
+        if self.compression_codec is None:
+            return 0
+        return (self.compression_codec, self.compression_level)
+    
+    def _atomic_dump(self, obj, path: Path):
+        """Dump to a sibling temp file and rename, so readers never see a partial pickle"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        joblib.dump(obj, tmp_path, compress=self._compress_arg())
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _load_stamped(path: Path) -> Tuple:
+        """(object, version) of a pickle written by save_model; version None if unstamped"""
+        loaded = joblib.load(path)
+        if isinstance(loaded, dict) and loaded.keys() == {"model_version", "artifact"}:
+            return loaded["artifact"], loaded["model_version"]
+        return loaded, None
+    
+    def _paths(self, candidate: bool = False) -> Tuple[Path, Path, Path]:
+        """(model, scaler, config) paths of the production or candidate artifacts"""
+        if candidate:
+            return (self.candidate_model_path, self.candidate_scaler_path,
+                    self.candidate_config_path)
+        return self.model_path, self.scaler_path, self.config_path
+    
+    def _write_json(self, data: Dict, path: Path):
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def save_model(self, model, scaler, metrics: Dict = None,
+                   candidate: bool = False) -> str:
 
+        model_path, scaler_path, config_path = self._paths(candidate)
+        
         try:
-            # Save model
-            joblib.dump(model, self.model_path)
-            logger.info(f"Model saved to {self.model_path}")
+            model_version = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             
-            # Save scaler
-            joblib.dump(scaler, self.scaler_path)
-            logger.info(f"Scaler saved to {self.scaler_path}")
+            # The three files are replaced one after the other; each carries
+            # the version so a reader catching them mid-save can tell (see
+            # load_versioned). joblib.load detects the codec on its own.
+            self._atomic_dump({"model_version": model_version, "artifact": model}, model_path)
+            logger.info(f"Model saved to {model_path}")
+            
+            self._atomic_dump({"model_version": model_version, "artifact": scaler}, scaler_path)
+            logger.info(f"Scaler saved to {scaler_path}")
             
             # Save configuration
             config_dict = {
+                "model_version": model_version,
                 "sample_rate": self.config.sample_rate,
                 "duration": self.config.duration,
                 "n_mfcc": self.config.n_mfcc,
                 "n_estimators": self.config.n_estimators,
                 "label_map": {str(k): v for k, v in self.config.label_map.items()},
+                "compression": {
+                    "codec": self.compression_codec,
+                    "level": self.compression_level if self.compression_codec else 0
+                },
                 "metrics": metrics
             }
             
-            with open(self.config_path, "w") as f:
-                json.dump(config_dict, f, indent=2)
+            self._write_json(config_dict, config_path)
+            
+            logger.info(f"Configuration saved to {config_path} "
+                        f"(version {model_version})")
             
-            logger.info(f"Configuration saved to {self.config_path}")
+            return model_version
             
         except Exception as e:
             logger.error(f"Error saving model: {e}")
             raise
     
-    def load_model(self) -> Tuple:
-   
+    def load_model(self, candidate: bool = False) -> Tuple:
+        model, scaler, _ = self.load_versioned(candidate)
+        return model, scaler
+    
+    def load_versioned(self, candidate: bool = False) -> Tuple:
+        """
+        Load (model, scaler, version) from one and the same save.
+        
+        Raises ArtifactMismatch when the files come from different saves,
+        e.g. when read while save_model is replacing them; retry later.
+        """
+        model_path, scaler_path, config_path = self._paths(candidate)
+        
         try:
-            if not self.model_path.exists():
-                raise FileNotFoundError(f"Model not found at {self.model_path}")
+            if not model_path.exists():
+                raise FileNotFoundError(f"Model not found at {model_path}")
             
-            if not self.scaler_path.exists():
-                raise FileNotFoundError(f"Scaler not found at {self.scaler_path}")
+            if not scaler_path.exists():
+                raise FileNotFoundError(f"Scaler not found at {scaler_path}")
             
-            model = joblib.load(self.model_path)
-            scaler = joblib.load(self.scaler_path)
+            model, model_version = self._load_stamped(model_path)
+            scaler, scaler_version = self._load_stamped(scaler_path)
+            
+            if model_version is None and scaler_version is None:
+                # Saved before the files were stamped
+                version = self.get_model_version(candidate)
+            else:
+                try:
+                    version = self.load_config(candidate).get("model_version")
+                except (OSError, ValueError):
+                    version = None
+                if not model_version == scaler_version == version:
+                    raise ArtifactMismatch(
+                        f"Artifacts in {model_path.parent} are from different saves "
+                        f"(model {model_version}, scaler {scaler_version}, config {version})"
+                    )
             
             logger.info("Model and scaler loaded successfully")
             
-            return model, scaler
+            return model, scaler, version
             
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
     
-    def load_config(self) -> Dict:
+    def load_config(self, candidate: bool = False) -> Dict:
     
+        _, _, config_path = self._paths(candidate)
+        
         try:
-            if not self.config_path.exists():
-                raise FileNotFoundError(f"Config not found at {self.config_path}")
+            if not config_path.exists():
+                raise FileNotFoundError(f"Config not found at {config_path}")
             
-            with open(self.config_path, "r") as f:
+            with open(config_path, "r") as f:
                 config = json.load(f)
             
             return config
@@ -88,6 +189,65 @@ class ModelPersistence:
             logger.error(f"Error loading config: {e}")
             raise
     
+    def get_model_version(self, candidate: bool = False) -> Optional[str]:
+        """
+        Version tag of the artifacts on disk.
+        
+        Uses the version written by save_model, falling back to the model
+        file's mtime for artifacts saved before versions were recorded.
+        """
+        model_path, _, config_path = self._paths(candidate)
+        
+        if not model_path.exists():
+            return None
+        
+        if config_path.exists():
+            try:
+                with open(config_path, "r") as f:
+                    version = json.load(f).get("model_version")
+                if version:
+                    return version
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read model version: {e}")
+        
+        mtime = datetime.fromtimestamp(model_path.stat().st_mtime)
+        return mtime.strftime("%Y%m%d_%H%M%S_%f")
+    
+    def artifact_signature(self) -> Optional[Tuple]:
+        """Cheap (mtime, size) fingerprint of the artifacts, for change polling"""
+        signature = []
+        for path in (self.model_path, self.scaler_path, self.config_path):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return None
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
     def model_exists(self) -> bool:
         """Check if trained model exists"""
-        return self.model_path.exists() and self.scaler_path.exists()
\ No newline at end of file
+        return self.model_path.exists() and self.scaler_path.exists()
+    
+    def candidate_exists(self) -> bool:
+        """Check if a candidate model is waiting for promotion"""
+        return self.candidate_model_path.exists() and self.candidate_scaler_path.exists()
+    
+    def delete_candidate(self):
+        """Remove the candidate artifacts (after promotion or rejection)"""
+        for path in self._paths(candidate=True):
+            path.unlink(missing_ok=True)
+    
+    def save_shadow_stats(self, stats: Dict):
+        """Persist shadow scoring statistics next to the model artifacts"""
+        self._write_json(stats, self.shadow_stats_path)
+    
+    def load_shadow_stats(self) -> Optional[Dict]:
+        if not self.shadow_stats_path.exists():
+            return None
+        
+        try:
+            with open(self.shadow_stats_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read shadow stats: {e}")
+            return None
\ No newline at end of file
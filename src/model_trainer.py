@@ -22,6 +22,7 @@ class ModelTrainer:
         self.n_estimators = config.n_estimators
         self.random_state = config.random_state
         self.test_size = config.test_size
+        self.n_jobs = config.n_jobs
     
     def train_model(self, X: np.ndarray, y: np.ndarray) -> Tuple:
 
@@ -46,7 +47,7 @@ class ModelTrainer:
         model = RandomForestClassifier(
             n_estimators=self.n_estimators,
             random_state=self.random_state,
-            n_jobs=-1,
+            n_jobs=self.n_jobs,
             verbose=1
         )
         
@@ -64,6 +65,11 @@ class ModelTrainer:
         
         return model, scaler, metrics
     
+    def evaluate(self, model, scaler, X: np.ndarray, y: np.ndarray) -> Dict:
+        """Metrics of an already trained model on held-out data"""
+        y_pred = model.predict(scaler.transform(X))
+        return self._calculate_metrics(y, y_pred)
+    
     def _calculate_metrics(self, y_true: np.ndarray, 
                           y_pred: np.ndarray) -> Dict:
 
@@ -84,7 +90,7 @@ class ModelTrainer:
         model = RandomForestClassifier(
             n_estimators=self.n_estimators,
             random_state=self.random_state,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         scores = cross_val_score(model, X_scaled, y, cv=cv, scoring='accuracy')
@@ -0,0 +1,151 @@
+"""
+Component 12: Prediction Cache
+Remembers recent predictions by audio content
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a cached result besides its feature vector: the dict, the
+# probabilities, strings and the key
+ENTRY_OVERHEAD_BYTES = 1024
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results keyed by (sha256 of the audio bytes,
+    model version).
+
+    Entries expire ``prediction_cache_ttl`` seconds after they are stored.
+    The least recently used entries are evicted beyond
+    ``prediction_cache_size`` entries or ``prediction_cache_max_mb`` of
+    (estimated) memory. Looking up a different model version than the one
+    the cache holds clears it, so a reload invalidates every entry at once.
+    """
+
+    def __init__(self, config):
+        self.max_entries = config.prediction_cache_size
+        self.max_bytes = int(config.prediction_cache_max_mb * 1024 * 1024)
+        self.ttl = config.prediction_cache_ttl
+
+        self._entries = OrderedDict()  # digest -> (result, size, stored at)
+        self._version = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def _size(result: Dict) -> int:
+        features = result.get("features")
+        return ENTRY_OVERHEAD_BYTES + (features.nbytes if features is not None else 0)
+
+    def _invalidate(self, model_version):
+        if self._entries:
+            self._metrics["invalidations"] += 1
+            logger.info(f"Prediction cache cleared for model {model_version} "
+                        f"({len(self._entries)} entries)")
+        self._entries.clear()
+        self._bytes = 0
+        self._version = model_version
+
+    def get(self, digest: str, model_version: Optional[str]) -> Optional[Dict]:
+        """The cached result for this audio and model version, or None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if model_version is None:
+                # No model loaded yet
+                self._metrics["misses"] += 1
+                return None
+
+            if model_version != self._version:
+                self._invalidate(model_version)
+
+            entry = self._entries.get(digest)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl:
+                self._entries.pop(digest)
+                self._bytes -= entry[1]
+                self._metrics["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self._metrics["hits"] += 1
+            return dict(entry[0])
+
+    def put(self, digest: str, result: Dict):
+        """Store a result under the model version it was produced with"""
+        model_version = result.get("model_version")
+        if not self.enabled or model_version is None:
+            return
+
+        size = self._size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if model_version != self._version:
+                # Typically a result of the previous model finishing after
+                # a reload; only the version being looked up is kept
+                if self._entries:
+                    return
+                self._version = model_version
+
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            result = dict(result)
+            if result.get("features") is not None:
+                # Rows of a batch are views that would keep the whole batch alive
+                result["features"] = result["features"].copy()
+            self._entries[digest] = (result, size, time.monotonic())
+            self._bytes += size
+            self._metrics["stores"] += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._metrics["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "model_version": self._version
+            })
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics.update({
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hit_rate": metrics["hits"] / lookups if lookups else None
+        })
+        return metrics
@@ -0,0 +1,210 @@
+"""
+Component 14: Profiler
+Sampled cProfile/tracemalloc profiles of individual predictions
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Overrides config.profiling_sample_rate, e.g. to profile a running
+# deployment's replacement without editing its config
+SAMPLE_RATE_ENV = "GENDER_DETECTION_PROFILE_RATE"
+
+
+class _Sample:
+    """Profiles one with-block and writes the result"""
+
+    __slots__ = ("profiler", "label", "profile", "started", "tracing")
+
+    def __init__(self, profiler, label: str):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        # tracemalloc is process-wide: leave it alone if someone else runs it
+        self.tracing = self.profiler.tracemalloc and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        wall = time.perf_counter() - self.started
+        snapshot, peak = None, None
+        if self.tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        try:
+            self.profiler._write(self.label, wall, self.profile, snapshot, peak,
+                                 failed=exc_type is not None)
+        except Exception as e:
+            logger.error(f"Could not write profile: {e}")
+        finally:
+            self.profiler._busy.release()
+        return False
+
+
+class _NoSample:
+    """Stand-in for _Sample when a request is not sampled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SAMPLE = _NoSample()
+
+
+class RequestProfiler:
+    """
+    Profiles a random fraction of predictions with cProfile and, optionally,
+    tracemalloc, and writes each as a short text report (top functions by
+    cumulative time, top allocation sites) to <log_dir>/profiles.
+
+    At a sample rate of 0 (the default), sample() returns a shared no-op
+    after one comparison. One request is profiled at a time; samples that
+    come up while another runs are skipped, since the profilers hook the
+    whole interpreter. tracemalloc sees every thread's allocations while a
+    sample runs, so allocation sites of concurrent requests show up too.
+
+    The oldest reports are deleted beyond ``profiling_max_files`` files or
+    ``profiling_max_mb`` in total.
+    """
+
+    def __init__(self, config):
+        self.profile_dir = Path(config.log_dir) / "profiles"
+        self.tracemalloc = config.profiling_tracemalloc
+        self.top_n = config.profiling_top_n
+        self.max_files = config.profiling_max_files
+        self.max_bytes = int(config.profiling_max_mb * 1024 * 1024)
+
+        sample_rate = config.profiling_sample_rate
+        if os.environ.get(SAMPLE_RATE_ENV):
+            sample_rate = float(os.environ[SAMPLE_RATE_ENV])
+        self.sample_rate = 0.0
+        self.set_sample_rate(sample_rate)
+
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._metrics = {
+            "profiles_written": 0,
+            "samples_skipped_busy": 0,
+            "profiles_deleted": 0
+        }
+
+    def set_sample_rate(self, sample_rate: float):
+        """Change the sampled fraction at runtime, 0 disables"""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Sample rate must be between 0 and 1, got {sample_rate}")
+        if sample_rate and not self.sample_rate:
+            logger.info(f"Profiling {sample_rate:.1%} of predictions into {self.profile_dir}")
+        self.sample_rate = sample_rate
+
+    def sample(self, label: str):
+        """Context manager profiling the block if this call is sampled"""
+        if self.sample_rate <= 0.0 or random.random() >= self.sample_rate:
+            return _NO_SAMPLE
+        if not self._busy.acquire(blocking=False):
+            with self._lock:
+                self._metrics["samples_skipped_busy"] += 1
+            return _NO_SAMPLE
+        return _Sample(self, label)
+
+    def _report(self, label: str, wall: float, profile, snapshot, peak, failed: bool) -> str:
+        out = io.StringIO()
+        out.write(f"# {label} at {datetime.now(timezone.utc).isoformat(timespec='milliseconds')}"
+                  f", wall {wall * 1000:.1f} ms, pid {os.getpid()}, "
+                  f"thread {threading.current_thread().name}"
+                  f"{', raised' if failed else ''}\n")
+
+        stats = pstats.Stats(profile, stream=out)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(self.top_n)
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            top = snapshot.statistics("lineno")[:self.top_n]
+            out.write(f"# allocations: peak {peak / 1024:.1f} KiB traced, "
+                      f"still held at exit by site (all threads):\n")
+            for stat in top:
+                frame = stat.traceback[0]
+                out.write(f"{stat.size / 1024:10.1f} KiB {stat.count:7d} blocks  "
+                          f"{frame.filename}:{frame.lineno}\n")
+        return out.getvalue()
+
+    def _write(self, label: str, wall: float, profile, snapshot, peak, failed: bool):
+        report = self._report(label, wall, profile, snapshot, peak, failed)
+
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{stamp}-{os.getpid()}-{sequence:06d}-{label}.txt"
+        path.write_text(report)
+
+        with self._lock:
+            self._metrics["profiles_written"] += 1
+        self._rotate()
+        logger.info(f"Wrote {label} profile ({wall * 1000:.1f} ms) to {path}")
+
+    def _rotate(self):
+        """Delete the oldest reports beyond the file count and size limits"""
+        files = sorted(self.profile_dir.glob("*.txt"))
+        sizes = []
+        for path in files:
+            try:
+                sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                sizes.append(0)
+
+        total = sum(sizes)
+        deleted = 0
+        for path, size in zip(files, sizes):
+            if len(files) - deleted <= self.max_files and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+
+        if deleted:
+            with self._lock:
+                self._metrics["profiles_deleted"] += deleted
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            status = dict(self._metrics)
+        status.update({
+            "enabled": self.sample_rate > 0,
+            "sample_rate": self.sample_rate,
+            "tracemalloc": self.tracemalloc,
+            "profile_dir": str(self.profile_dir),
+            "max_files": self.max_files,
+            "max_bytes": self.max_bytes
+        })
+        return status
@@ -0,0 +1,401 @@
+"""
+Component 10: Retraining Scheduler
+Retrains on feedback in a separate, resource-limited process and hands
+validated candidates back to the serving process
+"""
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import logging
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+logger = logging.getLogger(__name__)
+
+
+def _apply_resource_limits(cpu_count: int, memory_limit_mb: int):
+    """Confine the current process to a CPU and memory budget (best effort)"""
+    if cpu_count > 0 and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))[:cpu_count]
+        os.sched_setaffinity(0, cpus)
+
+    if memory_limit_mb > 0:
+        try:
+            import resource
+        except ImportError:  # not available on Windows
+            logger.warning("Memory limit not supported on this platform")
+        else:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # Serving threads win any remaining contention
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def run_retrain_job(config, original_data_dir: Optional[str] = None) -> Dict:
+    """
+    Train a candidate on feedback and validate it against the active model.
+
+    Both models are scored on the same held-out split; the candidate is
+    accepted unless its accuracy trails the active model's by more than
+    ``retrain_max_accuracy_drop``. The candidate is saved either way so
+    it can be inspected; the caller decides whether to promote it.
+
+    With original (labelled) data, the holdout is taken from it alone and
+    the rest is trained on together with the feedback. Feedback is mostly
+    the model's own predictions presumed correct, so without original data
+    the holdout comes from feedback and the report's validation says so
+    ("holdout_source": "feedback"); such a candidate is never promoted
+    automatically.
+    """
+    from facade import GenderDetectionFacade
+
+    started = time.perf_counter()
+    facade = GenderDetectionFacade(config)
+
+    feedback = facade.load_training_data()
+    if feedback is None:
+        return {"status": "skipped", "reason": "no feedback to train on"}
+    X_feedback, y_feedback = feedback
+
+    X_original = np.empty((0, X_feedback.shape[1]))
+    y_original = np.empty(0, dtype=y_feedback.dtype)
+    if original_data_dir:
+        X_original, y_original = facade.dataset_loader.load_from_directory(
+            Path(original_data_dir), ["female", "male"]
+        )
+
+    if len(X_original) > 0:
+        holdout_source = "original"
+        X_kept, X_holdout, y_kept, y_holdout = train_test_split(
+            X_original, y_original,
+            test_size=config.retrain_holdout_size,
+            stratify=y_original,
+            random_state=config.random_state
+        )
+        X_train = np.vstack([X_kept, X_feedback])
+        y_train = np.concatenate([y_kept, y_feedback])
+    else:
+        holdout_source = "feedback"
+        X_train, X_holdout, y_train, y_holdout = train_test_split(
+            X_feedback, y_feedback,
+            test_size=config.retrain_holdout_size,
+            stratify=y_feedback,
+            random_state=config.random_state
+        )
+
+    model, scaler, metrics = facade.model_trainer.train_model(X_train, y_train)
+    candidate = facade.model_trainer.evaluate(model, scaler, X_holdout, y_holdout)
+
+    active = None
+    active_version = None
+    if facade.model_persistence.model_exists():
+        active_model, active_scaler, active_version = facade.model_persistence.load_versioned()
+        active = facade.model_trainer.evaluate(active_model, active_scaler,
+                                               X_holdout, y_holdout)
+
+    accepted = (active is None
+                or candidate["accuracy"] >= active["accuracy"] - config.retrain_max_accuracy_drop)
+
+    metrics["validation"] = {
+        "holdout_samples": int(len(y_holdout)),
+        "holdout_source": holdout_source,
+        "candidate_accuracy": candidate["accuracy"],
+        "candidate_f1_score": candidate["f1_score"],
+        "active_accuracy": active["accuracy"] if active else None,
+        "active_f1_score": active["f1_score"] if active else None,
+        "active_version": active_version,
+        "accepted": accepted
+    }
+    version = facade.model_persistence.save_model(model, scaler, metrics, candidate=True)
+
+    return {
+        "status": "accepted" if accepted else "rejected",
+        "candidate_version": version,
+        "samples": int(len(y_train) + len(y_holdout)),
+        "validation": metrics["validation"],
+        "seconds": time.perf_counter() - started
+    }
+
+
+def _worker_main(config, original_data_dir, results):
+    """Entry point of the retraining process"""
+    # The worker never serves requests, so it trains with exactly its budget
+    _apply_resource_limits(config.retrain_cpu_count, config.retrain_memory_limit_mb)
+    config.n_jobs = max(config.retrain_cpu_count, 1)
+
+    try:
+        report = run_retrain_job(config, original_data_dir)
+    except MemoryError:
+        report = {"status": "failed",
+                  "error": f"out of memory ({config.retrain_memory_limit_mb} MB limit)"}
+    except Exception as e:
+        logger.exception("Retraining failed")
+        report = {"status": "failed", "error": str(e)}
+    results.put(report)
+
+
+class RetrainScheduler:
+    """
+    Starts retraining when enough feedback has arrived, or when feedback
+    has been waiting too long, and applies the result.
+
+    Only one job runs at a time, and none starts while a candidate is
+    still being shadow-scored. ``on_accepted`` receives the job report of
+    a candidate that passed validation (the facade promotes it or starts
+    shadowing it); rejected candidates are deleted.
+    """
+
+    def __init__(self, config, feedback_manager, model_persistence,
+                 on_accepted: Callable[[Dict], None]):
+        self.config = config
+        self.feedback_manager = feedback_manager
+        self.model_persistence = model_persistence
+        self.on_accepted = on_accepted
+        self.check_interval = config.retrain_check_interval
+        self.state_path = Path(config.retrain_state_path)
+
+        self._state = self._load_state()
+        self._job = None  # (process, results, started, reason, feedback total)
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._context = multiprocessing.get_context("spawn")
+
+    def _load_state(self) -> Dict:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Retrain state unreadable ({e}), starting fresh")
+        return {"trained_feedback_total": 0, "pending_since": None,
+                "last_started_at": None, "last_finished_at": None, "last_result": None}
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_name(f".{self.state_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @property
+    def running(self) -> bool:
+        return self._job is not None
+
+    def due(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Why a retrain is due, or None"""
+        now = now or datetime.now()
+        total = self.feedback_manager.get_feedback_stats()["total"]
+
+        with self._lock:
+            if total < self._state["trained_feedback_total"]:
+                # Feedback was cleared; count from what is left
+                self._state["trained_feedback_total"] = total
+            new_feedback = total - self._state["trained_feedback_total"]
+
+            if new_feedback <= 0:
+                if self._state["pending_since"] is not None:
+                    self._state["pending_since"] = None
+                    self._save_state()
+                return None
+
+            if self._state["pending_since"] is None:
+                self._state["pending_since"] = now.isoformat()
+                self._save_state()
+
+            if new_feedback >= self.config.feedback_threshold:
+                return f"{new_feedback} new feedback samples"
+
+            waiting = now - datetime.fromisoformat(self._state["pending_since"])
+            if waiting.total_seconds() >= self.config.retrain_max_age_hours * 3600:
+                return f"feedback waiting {waiting.total_seconds() / 3600:.1f}h"
+
+        return None
+
+    def check(self) -> Optional[str]:
+        """Collect a finished job, or start one if due; returns the start reason"""
+        with self._lock:
+            if self._job is not None:
+                self.poll()
+                return None
+
+            reason = self.due()
+            if reason is None:
+                return None
+            if self.model_persistence.candidate_exists():
+                logger.info(f"Retrain due ({reason}) but a candidate is still pending")
+                return None
+
+            self._start(reason)
+            return reason
+
+    def trigger(self) -> bool:
+        """Start a job now, regardless of thresholds; False if one is running"""
+        with self._lock:
+            self.poll()
+            if self._job is not None:
+                return False
+            self._start("manual")
+            return True
+
+    def _start(self, reason: str):
+        total = self.feedback_manager.get_feedback_stats()["total"]
+        results = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.config, self.config.retrain_data_dir, results),
+            name="retrain-worker"
+        )
+        process.start()
+
+        self._job = (process, results, time.monotonic(), reason, total)
+        self._state["last_started_at"] = datetime.now().isoformat()
+        self._save_state()
+        logger.info(f"Retraining started in process {process.pid} ({reason})")
+
+        # Collects the result as soon as the worker exits, also when no
+        # periodic check runs (retrain_check_interval 0, manual triggers)
+        threading.Thread(target=self._collect, args=(process,),
+                         name="retrain-collector", daemon=True).start()
+
+    def _collect(self, process):
+        while True:
+            process.join(self.config.retrain_timeout)
+            with self._lock:
+                if self._job is None or self._job[0] is not process:
+                    return
+                try:
+                    if self.poll() is not None:
+                        return
+                except Exception as e:
+                    logger.error(f"Collecting retrain job failed: {e}")
+                    return
+
+    def poll(self) -> Optional[Dict]:
+        """Handle the running job if it has finished or timed out"""
+        with self._lock:
+            if self._job is None:
+                return None
+            process, results, started, reason, total = self._job
+
+            alive = process.is_alive()
+            try:
+                # A worker that just exited may still be flushing its result
+                report = results.get(timeout=None if alive else 1.0, block=not alive)
+            except queue.Empty:
+                report = None
+
+            if report is None:
+                if alive:
+                    if time.monotonic() - started < self.config.retrain_timeout:
+                        return None
+                    process.terminate()
+                    report = {"status": "failed",
+                              "error": f"timed out after {self.config.retrain_timeout}s"}
+                else:
+                    report = {"status": "failed",
+                              "error": f"worker exited with code {process.exitcode}"}
+
+            process.join(timeout=10)
+            self._job = None
+            report["reason"] = reason
+            report["finished_at"] = datetime.now().isoformat()
+            self._finish(report, total)
+            return report
+
+    def _finish(self, report: Dict, total: int):
+        status = report["status"]
+
+        if status == "accepted":
+            try:
+                self.on_accepted(report)
+            except Exception as e:
+                logger.error(f"Applying candidate {report['candidate_version']} failed: {e}")
+                report["status"] = status = "failed"
+                report["error"] = str(e)
+        elif status == "rejected":
+            self.model_persistence.delete_candidate()
+
+        if status in ("accepted", "rejected", "skipped"):
+            # This feedback has been tried; wait for new feedback before retrying
+            self._state["trained_feedback_total"] = total
+            self._state["pending_since"] = None
+
+        self._state["last_finished_at"] = report["finished_at"]
+        self._state["last_result"] = report
+        self._save_state()
+
+        log = logger.info if status != "failed" else logger.error
+        log(f"Retraining {status}: {report.get('validation') or report.get('error') or report.get('reason')}")
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until the running job finishes (tests and the CLI)"""
+        with self._lock:
+            job = self._job
+        if job is None:
+            return None
+        job[0].join(timeout)
+        with self._lock:
+            if self._job is job:
+                return self.poll()
+            # Already collected by the job's collector thread
+            return self._state.get("last_result")
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            self.poll()
+            status = dict(self._state)
+            status["running"] = self._job is not None
+            if self._job is not None:
+                status["running_pid"] = self._job[0].pid
+                status["running_reason"] = self._job[3]
+        return status
+
+    def wake(self):
+        """Check now instead of at the next interval"""
+        self._wake.set()
+
+    def start(self):
+        if self.check_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retrain-scheduler",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(f"Retrain scheduler started (every {self.check_interval}s)")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Retrain check failed: {e}")
+
+    def close(self):
+        """Stop checking and kill a running job (it restarts on the next check)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._lock:
+            if self._job is not None:
+                process = self._job[0]
+                process.terminate()
+                process.join(timeout=10)
+                self._job = None
+                logger.info("Running retrain job terminated")
@@ -0,0 +1,198 @@
+"""
+Component 6: Shadow Scoring
+Scores a sample of live requests with a candidate model, off the response path
+"""
+import copy
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowScorer:
+    """Compares a candidate model against the active one on live traffic"""
+
+    # Persist statistics every N scored samples (and on close)
+    PERSIST_EVERY = 50
+
+    def __init__(self, config, model_persistence):
+        self.config = config
+        self.model_persistence = model_persistence
+        self.sample_rate = config.shadow_sample_rate
+        self.max_pending = config.shadow_max_pending
+
+        self._candidate = None  # (model, scaler, version)
+        self._stats = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._random = random.Random()
+
+        # A single worker keeps shadow load from competing with serving threads
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="shadow-scorer")
+
+    @property
+    def candidate_version(self) -> Optional[str]:
+        return self._candidate[2] if self._candidate else None
+
+    def _new_stats(self, candidate_version: str) -> Dict:
+        return {
+            "candidate_version": candidate_version,
+            "started_at": datetime.now().isoformat(),
+            "updated_at": None,
+            "sampled": 0,
+            "scored": 0,
+            "dropped": 0,
+            "errors": 0,
+            "agreements": 0,
+            # confusion[active_label][candidate_label] -> count
+            "confusion": {},
+            "abs_probability_diff_sum": 0.0,
+            "active_latency_sum": 0.0,
+            "candidate_latency_sum": 0.0,
+            "candidate_latency_max": 0.0,
+            "active_versions": {}
+        }
+
+    def load_candidate(self) -> Optional[str]:
+        """
+        Load the candidate artifacts and start (or resume) its statistics.
+
+        Returns the candidate version, or None when no candidate is saved.
+        """
+        if not self.model_persistence.candidate_exists():
+            logger.info("No candidate model to shadow")
+            return None
+
+        model, scaler, version = self.model_persistence.load_versioned(candidate=True)
+
+        # Resume persisted statistics if they belong to the same candidate
+        stats = self.model_persistence.load_shadow_stats()
+        if not stats or stats.get("candidate_version") != version:
+            stats = self._new_stats(version)
+
+        with self._lock:
+            self._candidate = (model, scaler, version)
+            self._stats = stats
+
+        logger.info(f"Shadow scoring candidate {version} "
+                    f"on {self.sample_rate:.0%} of requests")
+        return version
+
+    def clear_candidate(self):
+        """Stop shadow scoring; pending jobs finish against the old candidate"""
+        self.save_stats()
+        with self._lock:
+            self._candidate = None
+            self._stats = None
+
+    def submit(self, features: np.ndarray, active_label: int,
+               active_probabilities: np.ndarray, active_latency: float,
+               active_version: Optional[str] = None) -> bool:
+        """
+        Queue a request for shadow scoring if it is sampled.
+
+        Never blocks: when the shadow worker is behind, the sample is
+        dropped and counted instead of queued.
+        """
+        candidate = self._candidate
+        if candidate is None or self._random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            stats = self._stats
+            if stats is None:
+                return False
+            stats["sampled"] += 1
+            if self._pending >= self.max_pending:
+                stats["dropped"] += 1
+                return False
+            self._pending += 1
+
+        try:
+            self._executor.submit(self._score, candidate, stats, features,
+                                  int(active_label), np.asarray(active_probabilities),
+                                  active_latency, active_version)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._pending -= 1
+            return False
+        return True
+
+    def _score(self, candidate, stats, features, active_label,
+               active_probabilities, active_latency, active_version):
+        model, scaler, _ = candidate
+
+        try:
+            start = time.perf_counter()
+            features_scaled = scaler.transform(features.reshape(1, -1))
+            probabilities = model.predict_proba(features_scaled)[0]
+            latency = time.perf_counter() - start
+            label = int(model.classes_[np.argmax(probabilities)])
+        except Exception as e:
+            logger.warning(f"Shadow scoring failed: {e}")
+            with self._lock:
+                self._pending -= 1
+                stats["errors"] += 1
+            return
+
+        with self._lock:
+            self._pending -= 1
+            stats["scored"] += 1
+            stats["agreements"] += int(label == active_label)
+            row = stats["confusion"].setdefault(str(active_label), {})
+            row[str(label)] = row.get(str(label), 0) + 1
+            stats["abs_probability_diff_sum"] += float(
+                np.abs(probabilities - active_probabilities).max()
+            )
+            stats["active_latency_sum"] += active_latency
+            stats["candidate_latency_sum"] += latency
+            stats["candidate_latency_max"] = max(stats["candidate_latency_max"], latency)
+            if active_version:
+                versions = stats["active_versions"]
+                versions[active_version] = versions.get(active_version, 0) + 1
+            stats["updated_at"] = datetime.now().isoformat()
+            persist = stats["scored"] % self.PERSIST_EVERY == 0
+
+        if persist:
+            self.save_stats()
+
+    def get_stats(self) -> Dict:
+        """Raw counters plus derived agreement and latency figures"""
+        with self._lock:
+            if self._stats is None:
+                return {"candidate_version": None, "scored": 0}
+            stats = copy.deepcopy(self._stats)
+            stats["pending"] = self._pending
+
+        scored = stats["scored"]
+        stats["agreement_rate"] = stats["agreements"] / scored if scored else None
+        stats["mean_abs_probability_diff"] = (
+            stats["abs_probability_diff_sum"] / scored if scored else None
+        )
+        stats["active_latency_mean"] = stats["active_latency_sum"] / scored if scored else None
+        stats["candidate_latency_mean"] = (
+            stats["candidate_latency_sum"] / scored if scored else None
+        )
+        return stats
+
+    def save_stats(self):
+        with self._save_lock:
+            with self._lock:
+                if self._stats is None:
+                    return
+                snapshot = copy.deepcopy(self._stats)
+            self.model_persistence.save_shadow_stats(snapshot)
+
+    def close(self):
+        """Finish queued shadow jobs and persist the statistics"""
+        self._executor.shutdown(wait=True)
+        self.save_stats()
@@ -0,0 +1,145 @@
+"""
+Component 8: Shard Storage
+Packed shard files holding many clips (raw PCM) or feature rows, with a
+JSON offset index per shard
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shards live next to the loose files of a class: <class_dir>/_shards/
+SHARD_DIR = "_shards"
+PCM_FORMAT = "pcm_f32le"
+FEATURES_FORMAT = "features_f32le"
+
+
+def member_path(data_path: Path, name: str) -> Path:
+    """Stable path-like identifier of one clip inside a shard"""
+    return Path(f"{data_path}#{name}")
+
+
+def shard_index_paths(class_dir: Path) -> List[Path]:
+    shard_dir = Path(class_dir) / SHARD_DIR
+    if not shard_dir.exists():
+        return []
+    return sorted(shard_dir.glob("shard-*.idx.json"))
+
+
+def read_shard_index(index_path: Path) -> Dict:
+    with open(index_path, "r") as f:
+        index = json.load(f)
+    index["data_path"] = str(Path(index_path).with_name(index["data"]))
+    return index
+
+
+def open_shard_data(index: Dict) -> np.ndarray:
+    """Memory-map a shard's data: 1-D samples for PCM, rows for features"""
+    data_path = Path(index["data_path"])
+    if data_path.stat().st_size == 0:
+        return np.zeros(0, dtype="<f4")
+
+    data = np.memmap(data_path, dtype="<f4", mode="r")
+    if index["format"] == FEATURES_FORMAT:
+        data = data.reshape(-1, index["dim"])
+    return data
+
+
+class ShardWriter:
+    """
+    Writes one shard. Data is appended as clips are added; the index is
+    written (atomically) only on close, so a shard without an index is an
+    interrupted write and is ignored by readers.
+    """
+
+    def __init__(self, class_dir: Path, fmt: str = PCM_FORMAT,
+                 sample_rate: Optional[int] = None,
+                 feature_params: Optional[Dict] = None):
+        if fmt not in (PCM_FORMAT, FEATURES_FORMAT):
+            raise ValueError(f"Unknown shard format: {fmt}")
+
+        self.shard_dir = Path(class_dir) / SHARD_DIR
+        self.shard_dir.mkdir(exist_ok=True)
+
+        existing = shard_index_paths(class_dir)
+        number = int(existing[-1].name.split("-")[1].split(".")[0]) + 1 if existing else 1
+        suffix = "pcm" if fmt == PCM_FORMAT else "f32"
+
+        self.data_path = self.shard_dir / f"shard-{number:06d}.{suffix}"
+        self.index_path = self.shard_dir / f"shard-{number:06d}.idx.json"
+        self.format = fmt
+        self.sample_rate = sample_rate
+        self.feature_params = feature_params
+        self.dim = None
+        self.entries = []
+
+        self._file = open(self.data_path, "wb")
+        self._position = 0  # samples (PCM) or rows (features)
+        self._by_hash = {}  # identical clips are stored once per shard
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name: str, data: np.ndarray, metadata: Optional[Dict] = None,
+            content_hash: Optional[str] = None) -> Path:
+        """Append a clip (PCM signal) or a feature row; returns its member path"""
+        entry = dict(metadata or {})
+        entry["name"] = name
+
+        shared = self._by_hash.get(content_hash) if content_hash else None
+        if shared is not None:
+            entry.update(shared)
+        else:
+            values = np.ascontiguousarray(np.ravel(data), dtype="<f4")
+            if self.format == PCM_FORMAT:
+                location = {"offset": self._position, "length": int(values.shape[0])}
+                self._position += values.shape[0]
+            else:
+                if self.dim is None:
+                    self.dim = int(values.shape[0])
+                location = {"row": self._position}
+                self._position += 1
+            self._file.write(values.tobytes())
+            entry.update(location)
+            if content_hash:
+                self._by_hash[content_hash] = location
+
+        self.entries.append(entry)
+        return member_path(self.data_path, name)
+
+    def close(self) -> Dict:
+        """Sync the data and publish the index"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        index = {
+            "version": 1,
+            "format": self.format,
+            "data": self.data_path.name,
+            "entries": self.entries
+        }
+        if self.format == PCM_FORMAT:
+            index["sample_rate"] = self.sample_rate
+        else:
+            index["params"] = self.feature_params
+            index["dim"] = self.dim
+
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+        logger.info(f"Wrote shard {self.index_path} ({len(self.entries)} clips)")
+        return index
+
+    def abort(self):
+        """Discard a shard that failed part-way"""
+        self._file.close()
+        self.data_path.unlink(missing_ok=True)
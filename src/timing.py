@@ -0,0 +1,104 @@
+"""
+Component 15: Timing
+Per-request span recorder for latency breakdowns
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_current = contextvars.ContextVar("span_recorder", default=None)
+
+
+class _Span:
+    """Times a with-block into a recorder"""
+
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SpanRecorder:
+    """
+    Seconds spent in named spans of one request, on the monotonic
+    high-resolution clock (time.perf_counter).
+
+    A span entered more than once accumulates. Spans are flat: an outer
+    span (e.g. "predict") also contains the inner ones it encloses.
+
+    While activated, the recorder is found by current() in the same thread
+    or asyncio task, and in threads started with a copy of the context;
+    metrics.stage()/observe() feed it, so every instrumented stage shows up
+    under its metrics name.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> _Span:
+        """Context manager adding the block's duration to ``name``"""
+        return _Span(self, name)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._spans[name] = self._spans.get(name, 0.0) + seconds
+
+    def merge(self, other: "SpanRecorder"):
+        """Add another recorder's spans, e.g. those of a shared batch"""
+        for name, seconds in other.spans().items():
+            self.add(name, seconds)
+
+    def spans(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._spans)
+
+    def to_dict(self) -> Dict[str, float]:
+        """The spans plus "total", the seconds since the recorder was created"""
+        result = self.spans()
+        result["total"] = time.perf_counter() - self.started
+        return result
+
+    @contextmanager
+    def activate(self):
+        """Make this the current recorder for the block"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+def current() -> Optional[SpanRecorder]:
+    """The active recorder, or None"""
+    return _current.get()
+
+
+def record(name: str, seconds: float):
+    """Add a span timed by the caller to the active recorder, if any"""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.add(name, seconds)
+
+
+@contextmanager
+def recording(enabled: bool = True):
+    """Activate a new SpanRecorder for the block; yields it, or None when not enabled"""
+    if not enabled:
+        yield None
+        return
+    recorder = SpanRecorder()
+    with recorder.activate():
+        yield recorder
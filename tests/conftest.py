@@ -36,6 +36,11 @@ def test_config(temp_dir):
     config.model_path = str(temp_dir / "artifacts" / "model.pkl")
     config.scaler_path = str(temp_dir / "artifacts" / "scaler.pkl")
     config.config_path = str(temp_dir / "artifacts" / "config.json")
+    config.candidate_model_path = str(temp_dir / "artifacts" / "candidate_model.pkl")
+    config.candidate_scaler_path = str(temp_dir / "artifacts" / "candidate_scaler.pkl")
+    config.candidate_config_path = str(temp_dir / "artifacts" / "candidate_config.json")
+    config.shadow_stats_path = str(temp_dir / "artifacts" / "shadow_stats.json")
+    config.retrain_state_path = str(temp_dir / "artifacts" / "retrain_state.json")
     config.feedback_dir = str(temp_dir / "feedback")
     config.log_dir = str(temp_dir / "logs")
     return config
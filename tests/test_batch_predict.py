@@ -0,0 +1,162 @@
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+import numpy as np
+import pytest
+import soundfile as sf
+from backend.batch_predict import ArchiveLimitExceeded, iter_archive, stream_predictions
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return path
+
+
+def make_tar(path, members):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def wav_bytes(seconds=0.1):
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(int(16000 * seconds), dtype=np.float32), 16000, format="WAV")
+    return buffer.getvalue()
+
+
+async def decode_predict(path):
+    """Stand-in for the executor: fails like it would on a clip that does not decode"""
+    sf.read(path)
+    return {"prediction": "male", "label_id": 1, "confidence": 0.9,
+            "probabilities": {"female": 0.1, "male": 0.9}, "model_version": "test"}
+
+
+def collect(sources, predict=None, window=2):
+    async def echo(path):
+        return {"prediction": "female", "label_id": 0, "confidence": 1.0,
+                "probabilities": {"female": 1.0, "male": 0.0}, "model_version": "test"}
+
+    async def run():
+        return [json.loads(line) async for line in
+                stream_predictions(predict or echo, sources, window=window)]
+
+    return asyncio.run(run())
+
+
+class TestIterArchive:
+    """Test iter_archive function"""
+
+    @pytest.mark.parametrize("make_archive", [make_zip, make_tar])
+    def test_member_over_limit_is_skipped(self, temp_dir, make_archive):
+        """Test an oversized member is yielded as an error and its neighbours still extract"""
+        out_dir = temp_dir / "members"
+        out_dir.mkdir()
+        archive = make_archive(temp_dir / "archive", {
+            "small.wav": b"a" * 100,
+            "huge.wav": b"b" * 5000,
+            "last.wav": b"c" * 100
+        })
+
+        members = list(iter_archive(archive, out_dir, max_member_bytes=1000))
+
+        assert [name for name, _ in members] == ["small.wav", "huge.wav", "last.wav"]
+        assert isinstance(members[1][1], ArchiveLimitExceeded)
+        assert members[2][1].read_bytes() == b"c" * 100
+        assert len(list(out_dir.iterdir())) == 2
+
+    @pytest.mark.parametrize("make_archive", [make_zip, make_tar])
+    def test_total_limit_stops_extraction(self, temp_dir, make_archive):
+        """Test extraction stops once the archive has produced max_total_bytes"""
+        out_dir = temp_dir / "members"
+        out_dir.mkdir()
+        archive = make_archive(temp_dir / "archive", {
+            f"{i}.wav": bytes(1000) for i in range(5)
+        })
+
+        sources = iter_archive(archive, out_dir, max_member_bytes=1000, max_total_bytes=2500)
+
+        assert len([next(sources), next(sources)]) == 2
+        with pytest.raises(ArchiveLimitExceeded):
+            next(sources)
+        # The partial third member is not left behind
+        assert len(list(out_dir.iterdir())) == 2
+
+    def test_stream_reports_skipped_member(self, temp_dir):
+        """Test an oversized member gets an error line and the stream continues"""
+        out_dir = temp_dir / "members"
+        out_dir.mkdir()
+        archive = make_zip(temp_dir / "archive.zip", {
+            "huge.wav": bytes(5000),
+            "ok.wav": bytes(100)
+        })
+
+        lines = collect(iter_archive(archive, out_dir, max_member_bytes=1000))
+
+        by_name = {line.get("filename"): line for line in lines}
+        assert "exceeds" in by_name["huge.wav"]["error"]
+        assert by_name["ok.wav"]["prediction"] == "female"
+        assert lines[-1] == {"done": True, "count": 2, "errors": 1}
+
+    @pytest.mark.parametrize("make_archive", [make_zip, make_tar])
+    def test_traversal_member_stays_in_out_dir(self, temp_dir, make_archive):
+        """Test a ../ member name is extracted under out_dir by index"""
+        out_dir = temp_dir / "batch" / "members"
+        out_dir.mkdir(parents=True)
+        archive = make_archive(temp_dir / "archive", {"../x.wav": wav_bytes()})
+
+        members = list(iter_archive(archive, out_dir))
+
+        assert members == [("../x.wav", out_dir / "000000.wav")]
+        assert not (temp_dir / "batch" / "x.wav").exists()
+        assert not (temp_dir / "x.wav").exists()
+
+
+class TestStreamPredictions:
+    """Test stream_predictions function"""
+
+    @pytest.mark.parametrize("make_archive", [make_zip, make_tar])
+    def test_archive_stream(self, temp_dir, make_archive):
+        """Test good, traversal and undecodable members each get a line, then the summary"""
+        out_dir = temp_dir / "members"
+        out_dir.mkdir()
+        archive = make_archive(temp_dir / "archive", {
+            "clips/a.wav": wav_bytes(),
+            "../x.wav": wav_bytes(),
+            "notes.txt": b"skipped, not audio",
+            "broken.wav": b"this is not a wav file",
+            "clips/b.wav": wav_bytes()
+        })
+
+        lines = collect(iter_archive(archive, out_dir), predict=decode_predict)
+
+        items = {line["filename"]: line for line in lines[:-1]}
+        assert set(items) == {"clips/a.wav", "../x.wav", "broken.wav", "clips/b.wav"}
+        assert "error" in items["broken.wav"]
+        assert "prediction" not in items["broken.wav"]
+        for name in ("clips/a.wav", "../x.wav", "clips/b.wav"):
+            assert items[name]["prediction"] == "male"
+        assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2, 3]
+        assert lines[-1] == {"done": True, "count": 4, "errors": 1}
+        # Each clip is deleted once its line is out
+        assert not any(out_dir.iterdir())
+
+    def test_unreadable_archive_ends_stream(self, temp_dir):
+        """Test a read failure yields an error line and a summary instead of raising"""
+        def sources():
+            yield "a.wav", temp_dir / "a.wav"
+            raise OSError("truncated archive")
+
+        (temp_dir / "a.wav").write_bytes(wav_bytes())
+
+        lines = collect(sources(), predict=decode_predict, window=1)
+
+        assert lines[0]["filename"] == "a.wav"
+        assert "truncated archive" in lines[1]["error"]
+        assert lines[-1] == {"done": True, "count": 1, "errors": 1}
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from backend.batching import MicroBatcher
+
+
+class FakeDetector:
+    """Records the size of every batch; blocks while ``gate`` is cleared"""
+
+    def __init__(self, fail=False):
+        self.batch_sizes = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def predict_features_batch(self, features, audio_paths=None, return_features=False):
+        self.entered.set()
+        self.gate.wait(10)
+        self.batch_sizes.append(len(features))
+        if self.fail:
+            raise ValueError("model failed")
+        return [{"value": float(row[0]), "audio_path": path}
+                for row, path in zip(features, audio_paths)]
+
+
+def make_batcher(test_config, detector, **overrides):
+    for key, value in overrides.items():
+        setattr(test_config, key, value)
+    return MicroBatcher(detector, test_config)
+
+
+def vector(value):
+    return np.full(4, float(value))
+
+
+class TestMicroBatcher:
+    """Test MicroBatcher class"""
+
+    def test_concurrent_submits_share_a_batch(self, test_config):
+        """Test concurrent requests are scored in one predict_features_batch call"""
+        detector = FakeDetector()
+        batcher = make_batcher(test_config, detector)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(batcher.submit(vector(i), f"{i}.wav") for i in range(3)))
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+
+        assert [result["value"] for result in results] == [0.0, 1.0, 2.0]
+        assert [result["audio_path"] for result in results] == ["0.wav", "1.wav", "2.wav"]
+        assert detector.batch_sizes == [3]
+        assert batcher.get_metrics()["batch_sizes"] == {3: 1}
+
+    def test_max_size_splits_batches(self, test_config):
+        """Test no batch holds more than batch_max_size vectors"""
+        detector = FakeDetector()
+        batcher = make_batcher(test_config, detector, batch_max_size=2)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(batcher.submit(vector(i)) for i in range(5)))
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+
+        assert [result["value"] for result in results] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert detector.batch_sizes == [2, 2, 1]
+
+    def test_failed_batch_fails_every_request(self, test_config):
+        """Test an exception from the model reaches every request of the batch"""
+        batcher = make_batcher(test_config, FakeDetector(fail=True))
+
+        async def run():
+            try:
+                return await asyncio.gather(*(batcher.submit(vector(i)) for i in range(3)),
+                                            return_exceptions=True)
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert batcher.get_metrics()["failed_batches"] == 1
+
+    def test_arrivals_during_evaluation_form_next_batch(self, test_config):
+        """Test requests arriving while the model is busy are scored together right after"""
+        detector = FakeDetector()
+        detector.gate.clear()
+        batcher = make_batcher(test_config, detector)
+
+        async def run():
+            try:
+                first = asyncio.ensure_future(batcher.submit(vector(0)))
+                await asyncio.to_thread(detector.entered.wait, 5)
+                rest = [asyncio.ensure_future(batcher.submit(vector(i))) for i in range(1, 4)]
+                await asyncio.sleep(0.05)
+                detector.gate.set()
+                return await asyncio.gather(first, *rest)
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+
+        assert len(results) == 4
+        assert detector.batch_sizes == [1, 3]
+
+    def test_lone_request_is_not_delayed(self, test_config):
+        """Test an idle batcher scores a single request without waiting for others"""
+        detector = FakeDetector()
+        lingering = make_batcher(test_config, detector, batch_max_wait_ms=500.0)
+        batcher = make_batcher(test_config, detector, batch_max_wait_ms=0.0)
+
+        async def run(batcher):
+            try:
+                return await asyncio.wait_for(batcher.submit(vector(1)), 0.25)
+            finally:
+                await batcher.close()
+
+        assert asyncio.run(run(batcher))["value"] == 1.0
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run(lingering))
+
+    def test_close_fails_waiting_requests(self, test_config):
+        """Test close() fails the batch being evaluated and the requests waiting for it"""
+        detector = FakeDetector()
+        detector.gate.clear()
+        batcher = make_batcher(test_config, detector)
+
+        async def run():
+            futures = [asyncio.ensure_future(batcher.submit(vector(0)))]
+            await asyncio.to_thread(detector.entered.wait, 5)
+            futures += [asyncio.ensure_future(batcher.submit(vector(i))) for i in range(1, 3)]
+            await asyncio.sleep(0.01)
+            await batcher.close()
+            detector.gate.set()
+            return await asyncio.gather(*futures, return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert len(results) == 3
+        assert all(isinstance(result, RuntimeError) for result in results)
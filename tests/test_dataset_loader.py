@@ -1,6 +1,8 @@
 import pytest
 import numpy as np
+from pathlib import Path
 from dataset_loader import DatasetLoader
+from feature_extractor import AudioFeatureExtractor
 
 
 class TestDatasetLoader:
@@ -63,3 +65,34 @@ class TestDatasetLoader:
         assert X.shape[0] == 3
         assert np.all(y == 0)
 
+    
+    def test_load_from_directory_feature_cache(self, test_config, sample_dataset, mocker):
+        """Test cached features are used instead of decoding"""
+        extractor = AudioFeatureExtractor(test_config)
+        loader = DatasetLoader(extractor)
+        
+        female_files = list((sample_dataset / "female").glob("*.wav"))
+        cache = {path: np.full(test_config.n_mfcc * 2, 7.0) for path in female_files}
+        spy = mocker.spy(extractor, "extract_features")
+        
+        X, y = loader.load_from_directory(sample_dataset, ["female", "male"],
+                                          feature_cache=cache)
+        
+        assert X.shape[0] == 10
+        assert spy.call_count == 5  # only the male files were decoded
+        assert (X[y == 0] == 7.0).all()
+    
+    def test_load_from_directory_hardlinks_decoded_once(self, test_config, sample_dataset, mocker):
+        """Test hardlinked duplicates are decoded only once"""
+        import os
+        extractor = AudioFeatureExtractor(test_config)
+        loader = DatasetLoader(extractor)
+        
+        female_dir = sample_dataset / "female"
+        os.link(female_dir / "female_0.wav", female_dir / "female_0_dup.wav")
+        spy = mocker.spy(extractor, "extract_features")
+        
+        X, y = loader.load_from_directory(sample_dataset, ["female", "male"])
+        
+        assert X.shape[0] == 11
+        assert spy.call_count == 10
@@ -1,5 +1,7 @@
 import pytest
+import numpy as np
 from facade import GenderDetectionFacade
+from model_persistence import ArtifactMismatch
 
 
 class TestGenderDetectionFacade:
@@ -50,6 +52,72 @@ class TestGenderDetectionFacade:
         assert 'probabilities' in result
         assert result['prediction'] in ['Female', 'Male']
     
+    def test_predict_cached(self, test_config, sample_dataset, sample_audio_file, mocker):
+        """Test a repeated clip is answered from the cache without decoding"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        first = facade.predict(str(sample_audio_file))
+        
+        extract = mocker.spy(facade.feature_extractor, "extract_features")
+        second = facade.predict(str(sample_audio_file))
+        
+        assert extract.call_count == 0
+        assert second == first
+        assert facade.prediction_cache.get_metrics()["hits"] == 1
+    
+    def test_predict_timings(self, test_config, sample_dataset, sample_audio_file):
+        """Test timings=True adds a per-stage breakdown to the result"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        
+        result = facade.predict(str(sample_audio_file), timings=True)
+        
+        for stage in ("hash", "decode", "mfcc", "scale", "model", "predict", "total"):
+            assert result["timings"][stage] >= 0
+        assert result["timings"]["total"] >= result["timings"]["decode"]
+        assert "timings" not in facade.predict(str(sample_audio_file))
+    
+    def test_predict_signal(self, test_config, sample_dataset, sample_audio_file):
+        """Test decoded samples predict the same as the file they came from"""
+        import soundfile as sf
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        y, sr = sf.read(str(sample_audio_file), dtype="float32")
+        
+        result = facade.predict_signal(y, sr)
+        
+        assert result['probabilities'] == facade.predict(str(sample_audio_file))['probabilities']
+    
+    def test_validate_features(self, test_config, sample_dataset):
+        """Test feature vectors are checked against the model's input size"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        width = 2 * test_config.n_mfcc
+        
+        assert facade.validate_features(np.zeros(width)).shape == (1, width)
+        assert facade.validate_features(np.zeros((3, width))).shape == (3, width)
+        with pytest.raises(ValueError):
+            facade.validate_features(np.zeros(width - 1))
+        with pytest.raises(ValueError):
+            facade.validate_features(np.full(width, np.nan))
+        with pytest.raises(ValueError):
+            facade.validate_features(np.zeros((0, width)))
+        with pytest.raises(ValueError, match=f"must have {width} floats"):
+            facade.validate_features([[0.0] * width, [0.0] * (width - 1)])
+    
+    def test_warm_up(self, test_config, sample_dataset):
+        """Test warm-up loads the model before the first prediction"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        facade._active = None
+        
+        timings = facade.warm_up(iterations=2)
+        
+        assert facade.model_version is not None
+        assert timings["iterations"] == 2
+        assert set(timings["first"]) == {"decode_seconds", "mfcc_seconds",
+                                         "model_seconds", "total_seconds"}
+    
     def test_predict_batch(self, test_config, sample_dataset):
         """Test batch prediction"""
         facade = GenderDetectionFacade(test_config)
@@ -66,6 +134,21 @@ class TestGenderDetectionFacade:
         assert len(results) == 3
         assert all('prediction' in r for r in results)
     
+    def test_predict_batch_isolates_errors(self, test_config, sample_dataset, temp_dir):
+        """Test a bad file fails alone and results keep input order"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        
+        good = [str(f) for f in sorted((sample_dataset / "male").glob("*.wav"))[:2]]
+        missing = str(temp_dir / "missing.wav")
+        
+        results = facade.predict_batch([good[0], missing, good[1]])
+        
+        assert [('error' in r) for r in results] == [False, True, False]
+        assert results[1]['audio_path'] == missing
+        for path, result in zip([good[0], good[1]], [results[0], results[2]]):
+            assert result == facade.predict(path)
+    
     def test_submit_feedback(self, test_config, sample_dataset, sample_audio_file):
         """Test submitting feedback"""
         facade = GenderDetectionFacade(test_config)
@@ -122,3 +205,112 @@ class TestGenderDetectionFacade:
         assert metrics is not None
         assert 'accuracy' in metrics
 
+    
+    def test_predict_reports_model_version(self, test_config, sample_dataset, sample_audio_file):
+        """Test predictions are tagged with the serving model version"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        
+        result = facade.predict(str(sample_audio_file))
+        
+        assert result['model_version'] is not None
+        assert result['model_version'] == facade.model_persistence.get_model_version()
+    
+    def test_hot_reload(self, test_config, sample_dataset, sample_audio_file):
+        """Test a model saved by another process is picked up without restart"""
+        serving = GenderDetectionFacade(test_config)
+        serving.train_initial_model(str(sample_dataset))
+        old_version = serving.predict(str(sample_audio_file))['model_version']
+        
+        assert not serving.reload_if_changed()
+        
+        # Retrain through a separate facade, as an offline job would
+        trainer = GenderDetectionFacade(test_config)
+        trainer.train_initial_model(str(sample_dataset))
+        
+        assert serving.reload_if_changed()
+        new_version = serving.predict(str(sample_audio_file))['model_version']
+        assert new_version != old_version
+        assert new_version == trainer.model_version
+    
+    def test_reload_refuses_interrupted_save(self, test_config, sample_dataset,
+                                             sample_audio_file, mocker):
+        """Test a reload during a save keeps the current model instead of mixing files"""
+        serving = GenderDetectionFacade(test_config)
+        serving.train_initial_model(str(sample_dataset))
+        old_version = serving.model_version
+        
+        # Another process's save stops after replacing the model file
+        trainer = GenderDetectionFacade(test_config)
+        persistence = trainer.model_persistence
+        dump = persistence._atomic_dump
+        
+        def dies_after_model(obj, path):
+            if path != persistence.model_path:
+                raise OSError("killed")
+            dump(obj, path)
+        
+        mocker.patch.object(persistence, "_atomic_dump", side_effect=dies_after_model)
+        with pytest.raises(OSError):
+            trainer.train_initial_model(str(sample_dataset))
+        
+        with pytest.raises(ArtifactMismatch):
+            serving.reload_if_changed()
+        assert serving.predict(str(sample_audio_file))['model_version'] == old_version
+        
+        # The next complete save is picked up
+        mocker.stopall()
+        trainer.train_initial_model(str(sample_dataset))
+        assert serving.reload_if_changed()
+        assert serving.model_version == trainer.model_version
+    
+    def test_candidate_shadow_and_promote(self, test_config, sample_dataset,
+                                          sample_audio_file):
+        """Test retraining as a candidate leaves the active model serving"""
+        test_config.shadow_sample_rate = 1.0
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        active_version = facade.model_version
+        
+        facade.submit_feedback(str(sample_audio_file), 1, 0)
+        facade.retrain_with_feedback(str(sample_dataset), as_candidate=True)
+        
+        result = facade.predict(str(sample_audio_file))
+        assert result['model_version'] == active_version
+        
+        facade.shadow_scorer.close()
+        assert facade.get_shadow_stats()['scored'] == 1
+        
+        new_version = facade.promote_candidate()
+        assert new_version != active_version
+        assert facade.model_version == new_version
+        assert not facade.model_persistence.candidate_exists()
+    
+    def test_predict_features(self, test_config, sample_dataset, sample_audio_file):
+        """Test predicting from extracted features matches predicting from the file"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        
+        features = facade.feature_extractor.extract_features(str(sample_audio_file))
+        from_features = facade.predict_features(features)
+        from_file = facade.predict(str(sample_audio_file))
+        
+        assert from_features['label_id'] == from_file['label_id']
+        assert from_features['probabilities'] == from_file['probabilities']
+    
+    def test_predict_features_batch(self, test_config, sample_dataset):
+        """Test a batched prediction matches predicting each row on its own"""
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        
+        paths = sorted(str(p) for p in sample_dataset.glob("*/*.wav"))
+        features = np.vstack([facade.feature_extractor.extract_features(p) for p in paths])
+        
+        batched = facade.predict_features_batch(features, paths)
+        
+        assert len(batched) == len(paths)
+        for row, path, result in zip(features, paths, batched):
+            single = facade.predict_features(row, path)
+            assert result['label_id'] == single['label_id']
+            assert result['probabilities'] == pytest.approx(single['probabilities'])
+            assert result['audio_path'] == path
@@ -0,0 +1,118 @@
+import pytest
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+from dataset_loader import DatasetLoader
+from feature_extractor import AudioFeatureExtractor
+from feedback_manager import FeedbackManager
+from feedback_compactor import FeedbackCompactor
+from shard_store import shard_index_paths, read_shard_index
+
+
+@pytest.fixture
+def feedback_with_clips(test_config, temp_dir):
+    """Feedback manager holding four distinct clips, two per class"""
+    manager = FeedbackManager(test_config)
+    for i in range(4):
+        path = temp_dir / f"clip_{i}.wav"
+        sf.write(str(path), np.random.randn(16000).astype(np.float32), 16000)
+        manager.save_feedback(str(path), predicted_label=0, correct_label=i % 2,
+                              request_id=f"r{i}")
+    return manager
+
+
+class TestFeedbackCompactor:
+    """Test FeedbackCompactor class"""
+
+    def test_invalid_format(self, test_config):
+        """Test unknown shard formats are rejected"""
+        test_config.compaction_format = "flac"
+
+        with pytest.raises(ValueError):
+            FeedbackCompactor(test_config, FeedbackManager(test_config),
+                              AudioFeatureExtractor(test_config))
+
+    def test_recent_feedback_left_loose(self, test_config, feedback_with_clips):
+        """Test feedback younger than the minimum age is not compacted"""
+        compactor = FeedbackCompactor(test_config, feedback_with_clips,
+                                      AudioFeatureExtractor(test_config))
+
+        report = compactor.compact()
+
+        assert report['compacted'] == 0
+        assert Path(feedback_with_clips.get_feedback("r0")['saved_path']).exists()
+
+    def test_compact_pcm(self, test_config, feedback_with_clips):
+        """Test clips move into shards with stats and training data unchanged"""
+        test_config.compaction_min_age_days = 0
+        extractor = AudioFeatureExtractor(test_config)
+        loader = DatasetLoader(extractor)
+        feedback_dir = Path(test_config.feedback_dir)
+        stats_before = feedback_with_clips.get_feedback_stats()
+        X_before, y_before = loader.load_from_directory(feedback_dir, ["female", "male"])
+
+        report = FeedbackCompactor(test_config, feedback_with_clips, extractor).compact()
+
+        assert report['compacted'] == 4
+        assert report['shards'] == 2
+        assert not list((feedback_dir / "male").glob("*.wav"))
+        assert len(shard_index_paths(feedback_dir / "male")) == 1
+
+        entry = feedback_with_clips.get_feedback("r0")
+        assert entry['shard']
+        assert "#" in entry['saved_path']
+
+        assert feedback_with_clips.get_feedback_stats() == stats_before
+        assert FeedbackManager(test_config).rebuild_index() == stats_before
+
+        X_after, y_after = loader.load_from_directory(feedback_dir, ["female", "male"])
+        assert sorted(y_after) == sorted(y_before)
+        assert np.allclose(np.sort(X_after, axis=0), np.sort(X_before, axis=0), atol=1e-4)
+
+    def test_compacted_feedback_cannot_be_relabelled(self, test_config, feedback_with_clips):
+        """Test relabelling a packed clip is refused"""
+        test_config.compaction_min_age_days = 0
+        FeedbackCompactor(test_config, feedback_with_clips,
+                          AudioFeatureExtractor(test_config)).compact()
+
+        with pytest.raises(ValueError):
+            feedback_with_clips.update_feedback("r0", 1)
+
+    def test_compact_features_skips_decoding(self, test_config, feedback_with_clips, mocker):
+        """Test feature shards are read back without decoding audio"""
+        test_config.compaction_min_age_days = 0
+        test_config.compaction_format = "features"
+        extractor = AudioFeatureExtractor(test_config)
+
+        FeedbackCompactor(test_config, feedback_with_clips, extractor).compact()
+        index = read_shard_index(shard_index_paths(Path(test_config.feedback_dir) / "male")[0])
+        assert index['params'] == extractor.get_params()
+
+        spy = mocker.spy(extractor, "extract_features_from_signal")
+        X, y = DatasetLoader(extractor).load_from_directory(Path(test_config.feedback_dir),
+                                                            ["female", "male"])
+
+        assert X.shape == (4, test_config.n_mfcc * 2)
+        assert spy.call_count == 0
+
+    def test_interrupted_compaction_finished(self, test_config, feedback_with_clips, mocker):
+        """Test a shard published before its journal record is picked up on the next run"""
+        test_config.compaction_min_age_days = 0
+        compactor = FeedbackCompactor(test_config, feedback_with_clips,
+                                      AudioFeatureExtractor(test_config))
+
+        def crash(moves):
+            if moves:
+                raise OSError("crash")
+
+        mocker.patch.object(feedback_with_clips, "record_compaction", side_effect=crash)
+        with pytest.raises(OSError):
+            compactor.compact()
+        assert shard_index_paths(Path(test_config.feedback_dir) / "female")
+
+        mocker.stopall()
+        compactor.compact()
+
+        for i in range(4):
+            assert feedback_with_clips.get_feedback(f"r{i}")['shard']
+        assert feedback_with_clips.get_feedback_stats()['total'] == 4
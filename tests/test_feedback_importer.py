@@ -0,0 +1,83 @@
+import json
+import pytest
+import numpy as np
+import soundfile as sf
+from feature_extractor import AudioFeatureExtractor
+from feedback_manager import FeedbackManager
+from feedback_importer import FeedbackImporter
+
+
+@pytest.fixture
+def clips(temp_dir):
+    """Four distinct clips next to where the manifests are written"""
+    paths = []
+    for i in range(4):
+        path = temp_dir / f"clip_{i}.wav"
+        sf.write(str(path), np.random.randn(16000).astype(np.float32), 16000)
+        paths.append(path)
+    return paths
+
+
+def make_importer(config):
+    manager = FeedbackManager(config)
+    return FeedbackImporter(config, manager, AudioFeatureExtractor(config)), manager
+
+
+class TestFeedbackImporter:
+    """Test FeedbackImporter class"""
+
+    def test_import_csv_with_failures(self, test_config, temp_dir, clips):
+        """Test good rows are imported and bad rows are reported by line"""
+        test_config.import_workers = 1
+        manifest = temp_dir / "batch.csv"
+        lines = ["path,label,user_id"]
+        lines += [f"{clip.name},{'female' if i % 2 else 1},annotator" for i, clip in enumerate(clips)]
+        lines += ["missing.wav,male,annotator", f"{clips[0].name},child,annotator"]
+        manifest.write_text("\n".join(lines) + "\n")
+        importer, manager = make_importer(test_config)
+
+        report = importer.import_manifest(manifest)
+
+        assert report['rows'] == 6
+        assert report['imported'] == 4
+        assert report['failed'] == 2
+        assert sorted(f['line'] for f in report['failures']) == [6, 7]
+        assert manager.get_feedback_stats()['by_class']['Female']['total'] == 2
+        assert manager.get_feedback_stats()['by_class']['Male']['total'] == 2
+
+        # Features were stored, so retraining will not decode the clips again
+        cached = manager.get_cached_features(importer.feature_extractor.get_params())
+        assert len(cached) == 4
+
+    def test_reimport_skips_duplicates(self, test_config, temp_dir, clips):
+        """Test importing the same JSONL twice stores each clip once"""
+        test_config.import_workers = 1
+        manifest = temp_dir / "batch.jsonl"
+        manifest.write_text("".join(
+            json.dumps({"path": str(clip), "label": "Male", "user_id": "a1"}) + "\n"
+            for clip in clips
+        ))
+        importer, manager = make_importer(test_config)
+
+        first = importer.import_manifest(manifest)
+        second = importer.import_manifest(manifest)
+
+        assert first['imported'] == 4
+        assert second['imported'] == 0
+        assert second['duplicates'] == 4
+        assert manager.get_feedback_stats()['total'] == 4
+
+    def test_import_parallel(self, test_config, temp_dir, clips):
+        """Test worker processes and copy threads import every clip"""
+        test_config.import_workers = 2
+        test_config.import_batch_size = 3
+        manifest = temp_dir / "batch.csv"
+        manifest.write_text("path,label\n" + "".join(f"{clip.name},0\n" for clip in clips))
+        importer, manager = make_importer(test_config)
+
+        report = importer.import_manifest(manifest)
+
+        assert report['imported'] == 4
+        assert report['failed'] == 0
+        assert report['files_per_second'] > 0
+        assert len(list((temp_dir / "feedback" / "female").glob("*.wav"))) == 4
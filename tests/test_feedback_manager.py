@@ -1,5 +1,8 @@
 import pytest
-from feedback_manager import FeedbackManager
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from feedback_manager import DuplicateFeedbackError, FeedbackManager, FeedbackItem
 
 
 class TestFeedbackManager:
@@ -25,13 +28,12 @@ class TestFeedbackManager:
             confidence=0.85
         )
         
-        # Check files were created
+        # Check audio was stored and metadata journalled
         female_dir = manager.feedback_dir / "female"
         audio_files = list(female_dir.glob("*.wav"))
-        json_files = list(female_dir.glob("*.json"))
         
         assert len(audio_files) > 0
-        assert len(json_files) > 0
+        assert manager.journal_path.exists()
     
     def test_save_feedback_correct_prediction(self, test_config, sample_audio_file):
         """Test saving feedback for correct prediction"""
@@ -83,3 +85,234 @@ class TestFeedbackManager:
         
         stats = manager.get_feedback_stats()
         assert stats['by_class']['Female']['total'] == 0
+    
+    def test_stats_persisted_in_index(self, test_config, sample_audio_file):
+        """Test counters survive a restart without rescanning"""
+        manager = FeedbackManager(test_config)
+        manager.save_feedback(str(sample_audio_file), 0, 0)
+        manager.save_feedback(str(sample_audio_file), 0, 1)
+        
+        assert manager.index_path.exists()
+        
+        restarted = FeedbackManager(test_config)
+        stats = restarted.get_feedback_stats()
+        
+        assert stats['total'] == 2
+        assert stats['correct_predictions'] == 1
+        assert stats['corrected_predictions'] == 1
+        assert stats['by_class']['Male']['corrected'] == 1
+    
+    def test_rebuild_index(self, test_config, sample_audio_file):
+        """Test rebuilding the index from the files on disk"""
+        manager = FeedbackManager(test_config)
+        manager.save_feedback(str(sample_audio_file), 0, 0, user_id="u1")
+        manager.save_feedback(str(sample_audio_file), 1, 0)
+        expected = manager.get_feedback_stats()
+        
+        manager.index_path.unlink()
+        manager._counts = manager._empty_counts()
+        
+        assert manager.rebuild_index() == expected
+    
+    def test_save_feedback_with_request_id(self, test_config, sample_audio_file):
+        """Test feedback is indexed by request_id"""
+        manager = FeedbackManager(test_config)
+        
+        saved_path = manager.save_feedback(str(sample_audio_file), 1, 1,
+                                           confidence=0.9, request_id="req-1")
+        
+        entry = manager.get_feedback("req-1")
+        assert entry['saved_path'] == saved_path
+        assert entry['correct_class'] == "Male"
+        assert entry['confidence'] == 0.9
+        
+        with pytest.raises(DuplicateFeedbackError):
+            manager.save_feedback(str(sample_audio_file), 1, 1, request_id="req-1")
+    
+    def test_update_feedback(self, test_config, sample_audio_file):
+        """Test relabelling moves the audio and updates stats"""
+        manager = FeedbackManager(test_config)
+        old_path = manager.save_feedback(str(sample_audio_file), 1, 1, request_id="req-1")
+        
+        assert manager.update_feedback("req-1", 0, user_id="u7")
+        
+        entry = manager.get_feedback("req-1")
+        assert entry['correct_label'] == 0
+        assert entry['status'] == "corrected"
+        assert entry['user_id'] == "u7"
+        assert not Path(old_path).exists()
+        assert Path(entry['saved_path']).parent.name == "female"
+        assert Path(entry['saved_path']).exists()
+        
+        stats = manager.get_feedback_stats()
+        assert stats['by_class']['Male']['total'] == 0
+        assert stats['by_class']['Female']['corrected'] == 1
+    
+    def test_update_feedback_same_timestamp(self, test_config, sample_audio_file,
+                                            temp_dir, monkeypatch):
+        """Test relabelling clips saved in the same microsecond keeps both files"""
+        import feedback_manager
+        import soundfile as sf
+        
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2026, 1, 1, 12, 0, 0)
+        
+        other_audio = temp_dir / "other.wav"
+        sf.write(str(other_audio), np.random.randn(16000).astype(np.float32), 16000)
+        monkeypatch.setattr(feedback_manager, "datetime", FrozenDatetime)
+        manager = FeedbackManager(test_config)
+        first = manager.save_feedback(str(sample_audio_file), 1, 1, request_id="req-1")
+        second = manager.save_feedback(str(other_audio), 1, 1, request_id="req-2")
+        assert Path(second).stem == Path(first).stem + "_1"
+        
+        assert manager.update_feedback("req-1", 0)
+        assert manager.update_feedback("req-2", 0)
+        
+        paths = [Path(manager.get_feedback(r)['saved_path']) for r in ("req-1", "req-2")]
+        assert paths[0] != paths[1]
+        assert all(path.exists() and path.parent.name == "female" for path in paths)
+        assert (paths[0].read_bytes() == sample_audio_file.read_bytes())
+        assert (paths[1].read_bytes() == other_audio.read_bytes())
+        assert manager.get_feedback_stats()['by_class']['Female']['corrected'] == 2
+    
+    def test_update_feedback_unknown_request(self, test_config):
+        """Test relabelling an unknown request_id"""
+        manager = FeedbackManager(test_config)
+        
+        assert not manager.update_feedback("missing", 0)
+    
+    def test_journal_replayed_on_restart(self, test_config, sample_audio_file):
+        """Test the request_id index is rebuilt from the journal"""
+        manager = FeedbackManager(test_config)
+        manager.save_feedback(str(sample_audio_file), 1, 1, request_id="req-1")
+        manager.save_feedback(str(sample_audio_file), 0, 0, request_id="req-2")
+        manager.update_feedback("req-1", 0)
+        manager.clear_feedback("male")
+        
+        restarted = FeedbackManager(test_config)
+        
+        assert restarted.get_feedback("req-1")['correct_class'] == "Female"
+        assert restarted.get_feedback("req-2") is not None
+        assert restarted.update_feedback("req-2", 1)
+    
+    def test_cached_features(self, test_config, sample_audio_file, sample_features):
+        """Test features stored with feedback are returned by saved path"""
+        manager = FeedbackManager(test_config)
+        params = {"sample_rate": 16000, "duration": 2.0, "n_mfcc": 40}
+        
+        manager.save_feedback(str(sample_audio_file), 0, 0, request_id="req-1",
+                              features=sample_features, feature_params=params)
+        manager.save_feedback(str(sample_audio_file), 1, 1, request_id="req-2")
+        manager.update_feedback("req-1", 1)
+        
+        cached = FeedbackManager(test_config).get_cached_features(params)
+        
+        saved_path = Path(manager.get_feedback("req-1")['saved_path'])
+        assert saved_path in cached
+        np.testing.assert_allclose(cached[saved_path], sample_features, rtol=1e-6)
+    
+    def test_cached_features_params_changed(self, test_config, sample_audio_file,
+                                            sample_features):
+        """Test features from other extractor parameters are not reused"""
+        manager = FeedbackManager(test_config)
+        params = {"sample_rate": 16000, "duration": 2.0, "n_mfcc": 40}
+        manager.save_feedback(str(sample_audio_file), 0, 0,
+                              features=sample_features, feature_params=params)
+        
+        assert manager.get_cached_features({**params, "n_mfcc": 20}) == {}
+    
+    def test_save_feedback_batch(self, test_config, sample_audio_file):
+        """Test a batch isolates per-item failures"""
+        manager = FeedbackManager(test_config)
+        items = [
+            FeedbackItem(str(sample_audio_file), 0, 0, request_id="a"),
+            FeedbackItem("missing.wav", 0, 0, request_id="b"),
+            FeedbackItem(str(sample_audio_file), 0, 1, request_id="a"),
+            FeedbackItem(str(sample_audio_file), 1, 1, request_id="c"),
+        ]
+        
+        results = manager.save_feedback_batch(items)
+        
+        assert isinstance(results[0], str)
+        assert isinstance(results[1], FileNotFoundError)
+        assert isinstance(results[2], DuplicateFeedbackError)
+        assert isinstance(results[3], str)
+        assert results[0] != results[3]
+        assert manager.get_feedback_stats()['total'] == 2
+    
+    def test_duplicate_audio_hardlinked(self, test_config, sample_audio_file,
+                                        sample_features):
+        """Test resubmitted audio is stored once and shares its feature row"""
+        manager = FeedbackManager(test_config)
+        
+        first = manager.save_feedback(str(sample_audio_file), 0, 0, request_id="a",
+                                      features=sample_features)
+        second = manager.save_feedback(str(sample_audio_file), 1, 1, request_id="b",
+                                       features=sample_features)
+        third = manager.save_feedback(str(sample_audio_file), 1, 0, request_id="c")
+        
+        assert Path(first).stat().st_ino == Path(second).stat().st_ino
+        assert Path(first).stat().st_ino == Path(third).stat().st_ino
+        assert manager.get_feedback("b")['deduplicated']
+        assert manager.get_feedback("a")['content_hash'] == manager.get_feedback("b")['content_hash']
+        
+        # One stored feature row serves every submission of the clip
+        assert manager.get_feedback("a")['features'] == manager.get_feedback("b")['features']
+        cached = manager.get_cached_features()
+        assert set(cached) == {Path(first), Path(second), Path(third)}
+        
+        # Each submission is still counted
+        assert manager.get_feedback_stats()['total'] == 3
+    
+    def test_duplicate_after_original_removed(self, test_config, sample_audio_file):
+        """Test a duplicate is copied when the stored original is gone"""
+        manager = FeedbackManager(test_config)
+        manager.save_feedback(str(sample_audio_file), 0, 0, request_id="a")
+        manager.clear_feedback("female")
+        
+        saved = manager.save_feedback(str(sample_audio_file), 0, 0, request_id="b")
+        
+        assert Path(saved).exists()
+        assert not manager.get_feedback("b")['deduplicated']
+    
+    def test_managers_share_feedback_dir(self, test_config, sample_audio_file, temp_dir):
+        """Test two managers on one directory (e.g. two workers) see each other's writes"""
+        import json
+        import shutil
+        worker_a = FeedbackManager(test_config)
+        worker_b = FeedbackManager(test_config)
+        other_clip = temp_dir / "other.wav"
+        shutil.copy(sample_audio_file, other_clip)
+        
+        worker_a.save_feedback(str(sample_audio_file), 1, 1, request_id="from-a")
+        worker_b.save_feedback(str(other_clip), 0, 0, request_id="from-b")
+        
+        # Relabelled by the worker that did not save it
+        assert worker_b.update_feedback("from-a", 0)
+        assert worker_a.get_feedback("from-a")['correct_class'] == "Female"
+        assert Path(worker_a.get_feedback("from-a")['saved_path']).exists()
+        
+        with open(worker_a.index_path) as f:
+            by_class = json.load(f)["by_class"]
+        assert by_class["Female"]["total"] == 2
+        assert by_class["Male"]["total"] == 0
+        for manager in (worker_a, worker_b, FeedbackManager(test_config)):
+            stats = manager.get_feedback_stats()
+            assert stats['total'] == 2
+            assert stats['corrected_predictions'] == 1
+    
+    def test_torn_journal_line_skipped(self, test_config, sample_audio_file):
+        """Test a line torn by a crash neither hides nor swallows later records"""
+        manager = FeedbackManager(test_config)
+        manager.save_feedback(str(sample_audio_file), 0, 0, request_id="before")
+        with open(manager.journal_path, "a") as f:
+            f.write('{"op": "save", "request_')
+        
+        restarted = FeedbackManager(test_config)
+        restarted.save_feedback(str(sample_audio_file), 1, 1, request_id="after")
+        
+        replayed = FeedbackManager(test_config)
+        assert replayed.get_feedback("before") is not None
+        assert replayed.get_feedback("after") is not None
@@ -0,0 +1,96 @@
+import pytest
+import shutil
+from feedback_manager import FeedbackManager, FeedbackItem
+from feedback_writer import FeedbackWriter
+
+
+class TestFeedbackWriter:
+    """Test FeedbackWriter class"""
+    
+    def test_invalid_durability(self, test_config):
+        """Test unknown durability modes are rejected"""
+        test_config.feedback_durability = "eventually"
+        
+        with pytest.raises(ValueError):
+            FeedbackWriter(FeedbackManager(test_config), test_config)
+    
+    def test_sync_write_when_not_started(self, test_config, sample_audio_file):
+        """Test items are written immediately when the writer is not running"""
+        manager = FeedbackManager(test_config)
+        writer = FeedbackWriter(manager, test_config)
+        
+        queued = writer.submit(FeedbackItem(str(sample_audio_file), 0, 0, request_id="r1"))
+        
+        assert not queued
+        assert manager.get_feedback("r1") is not None
+        assert writer.get_metrics()['sync_writes'] == 1
+    
+    def test_batched_background_write(self, test_config, sample_audio_file):
+        """Test queued items are written in batches and drained on flush"""
+        test_config.feedback_flush_interval = 0.2
+        manager = FeedbackManager(test_config)
+        writer = FeedbackWriter(manager, test_config)
+        writer.start()
+        
+        for i in range(5):
+            assert writer.submit(FeedbackItem(str(sample_audio_file), 0, 0,
+                                              request_id=f"r{i}"))
+        
+        assert writer.flush(timeout=5)
+        assert not writer.is_pending("r0")
+        assert manager.get_feedback_stats()['total'] == 5
+        
+        metrics = writer.get_metrics()
+        assert metrics['written'] == 5
+        assert metrics['batches'] < 5
+        assert metrics['queue_depth'] == 0
+        writer.close()
+    
+    def test_move_and_drain_on_close(self, test_config, sample_audio_file, temp_dir):
+        """Test moved uploads are owned by the writer and drained on close"""
+        test_config.feedback_durability = "fsync"
+        manager = FeedbackManager(test_config)
+        writer = FeedbackWriter(manager, test_config)
+        writer.start()
+        
+        upload = temp_dir / "upload.wav"
+        shutil.copy(sample_audio_file, upload)
+        writer.submit(FeedbackItem(str(upload), 1, 1, request_id="r1", move=True))
+        
+        assert writer.close(timeout=5)
+        assert not upload.exists()
+        assert manager.get_feedback("r1") is not None
+    
+    def test_failed_move_removes_upload(self, test_config, sample_audio_file, temp_dir):
+        """Test a moved upload that fails to save is deleted, not leaked"""
+        manager = FeedbackManager(test_config)
+        writer = FeedbackWriter(manager, test_config)
+        writer.start()
+        
+        uploads = [temp_dir / f"upload_{i}.wav" for i in range(2)]
+        for upload in uploads:
+            shutil.copy(sample_audio_file, upload)
+        writer.submit(FeedbackItem(str(uploads[0]), 1, 1, request_id="r1", move=True))
+        assert writer.flush(timeout=5)
+        
+        # Same request_id again: the save fails as a duplicate
+        writer.submit(FeedbackItem(str(uploads[1]), 1, 1, request_id="r1", move=True))
+        assert writer.close(timeout=5)
+        
+        assert writer.get_metrics()['failed'] == 1
+        assert not any(upload.exists() for upload in uploads)
+    
+    def test_queue_full_falls_back_to_sync(self, test_config, sample_audio_file):
+        """Test a full queue writes on the caller thread instead of dropping"""
+        test_config.feedback_queue_size = 1
+        test_config.feedback_flush_interval = 5.0
+        manager = FeedbackManager(test_config)
+        writer = FeedbackWriter(manager, test_config)
+        writer.start()
+        
+        for i in range(4):
+            writer.submit(FeedbackItem(str(sample_audio_file), 0, 0, request_id=f"r{i}"))
+        
+        writer.close(timeout=10)
+        assert manager.get_feedback_stats()['total'] == 4
+        assert writer.get_metrics()['sync_writes'] >= 1
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import numpy as np
+import pytest
+from facade import GenderDetectionFacade
+from backend.inference import InferenceExecutor, Overloaded
+
+
+@pytest.fixture
+def trained_detector(test_config, sample_dataset):
+    """A facade with a model trained on sample_dataset"""
+    detector = GenderDetectionFacade(test_config)
+    detector.train_initial_model(str(sample_dataset))
+    yield detector
+    detector.close()
+
+
+def run_executor(executor, *calls):
+    """Await each call(executor) in turn on a fresh loop, then close the executor"""
+    async def run():
+        executor.start()
+        try:
+            return [await call(executor) for call in calls]
+        finally:
+            await executor.close()
+
+    return asyncio.run(run())
+
+
+def admission_config(config, **overrides):
+    """One slot, one waiter and a short queue timeout"""
+    config.inference_mode = "inline"
+    config.inference_max_concurrency = 1
+    config.inference_max_queue = 1
+    config.inference_queue_timeout = 0.05
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+class TestInferenceExecutor:
+    """Test InferenceExecutor class"""
+
+    def test_queue_full_is_refused(self, test_config, mocker):
+        """Test a request beyond inference_max_queue is refused at once with Overloaded"""
+        detector = mocker.Mock()
+        detector.predict_features_batch.return_value = [{"label_id": 0}]
+        executor = InferenceExecutor(detector, admission_config(test_config, inference_queue_timeout=5.0))
+        features = np.zeros((1, 80))
+
+        async def run():
+            executor.start()
+            await executor._semaphore.acquire()  # the one slot is busy
+            waiter = asyncio.ensure_future(executor.predict_features(features))
+            await asyncio.sleep(0.01)
+            assert executor.saturated()
+
+            with pytest.raises(Overloaded) as excinfo:
+                await executor.predict_features(features)
+
+            executor._semaphore.release()
+            return excinfo.value, await waiter
+
+        error, result = asyncio.run(run())
+
+        assert error.reason == "queue full"
+        assert 1 <= error.retry_after <= 60
+        assert result == [{"label_id": 0}]
+        metrics = executor.get_metrics()
+        assert metrics["rejected_queue_full"] == 1
+        assert metrics["completed"] == 1
+        assert metrics["waiting"] == 0
+        assert not executor.saturated()
+
+    def test_queue_timeout(self, test_config, mocker):
+        """Test a request waiting longer than inference_queue_timeout gives up"""
+        detector = mocker.Mock()
+        executor = InferenceExecutor(detector, admission_config(test_config))
+
+        async def run():
+            executor.start()
+            await executor._semaphore.acquire()
+            with pytest.raises(Overloaded) as excinfo:
+                await executor.predict_features(np.zeros((1, 80)))
+            return excinfo.value
+
+        error = asyncio.run(run())
+
+        assert error.reason == "timeout"
+        assert executor.get_metrics()["rejected_timeout"] == 1
+        assert executor.get_metrics()["waiting"] == 0
+        detector.predict_features_batch.assert_not_called()
+
+    def test_without_admission_waits(self, test_config, mocker):
+        """Test admission=False waits past the queue timeout instead of failing"""
+        detector = mocker.Mock()
+        detector.predict_features_batch.return_value = [{"label_id": 1}]
+        executor = InferenceExecutor(detector, admission_config(test_config))
+
+        async def run():
+            executor.start()
+            await executor._semaphore.acquire()
+            waiter = asyncio.ensure_future(
+                executor.predict_features(np.zeros((1, 80)), admission=False)
+            )
+            await asyncio.sleep(0.1)
+            executor._semaphore.release()
+            return await waiter
+
+        assert asyncio.run(run()) == [{"label_id": 1}]
+        assert executor.get_metrics()["rejected_timeout"] == 0
+
+    @pytest.mark.parametrize("mode", ["thread", "process", "inline"])
+    def test_modes_match_detector(self, trained_detector, sample_audio_file, mode):
+        """Test each mode returns what detector.predict does for the same clip"""
+        trained_detector.config.inference_mode = mode
+        trained_detector.config.inference_workers = 1
+        expected = trained_detector.predict(str(sample_audio_file))
+        executor = InferenceExecutor(trained_detector, trained_detector.config)
+
+        result, = run_executor(executor, lambda e: e.predict(str(sample_audio_file)))
+
+        for key in ("prediction", "label_id", "model_version"):
+            assert result[key] == expected[key]
+        assert result["confidence"] == pytest.approx(expected["confidence"])
+        assert result["probabilities"] == pytest.approx(expected["probabilities"])
+        assert len(result["features"]) == 2 * trained_detector.config.n_mfcc
+        assert executor.get_metrics()["completed"] == 1
+
+    def test_cache_hit_skips_slot(self, trained_detector, sample_audio_file):
+        """Test a cached clip is answered while every slot is taken"""
+        trained_detector.config.inference_mode = "inline"
+        trained_detector.config.inference_max_concurrency = 1
+        digest = hashlib.sha256(sample_audio_file.read_bytes()).hexdigest()
+        executor = InferenceExecutor(trained_detector, trained_detector.config)
+
+        async def cached_while_busy(e):
+            await e._semaphore.acquire()
+            try:
+                return await asyncio.wait_for(e.predict(str(sample_audio_file), digest), 1.0)
+            finally:
+                e._semaphore.release()
+
+        first, second = run_executor(
+            executor,
+            lambda e: e.predict(str(sample_audio_file), digest),
+            cached_while_busy
+        )
+
+        assert second["prediction"] == first["prediction"]
+        metrics = executor.get_metrics()
+        assert metrics["cache_hits"] == 1
+        assert metrics["completed"] == 1
+
+    def test_failure_releases_slot(self, trained_detector, temp_dir):
+        """Test a failing prediction counts as failed and gives its slot back"""
+        trained_detector.config.inference_mode = "thread"
+        trained_detector.config.inference_max_concurrency = 1
+        broken = temp_dir / "broken.wav"
+        broken.write_bytes(b"not audio")
+        executor = InferenceExecutor(trained_detector, trained_detector.config)
+
+        async def fails(e):
+            with pytest.raises(Exception):
+                await e.predict(str(broken))
+            return e._semaphore.locked()
+
+        locked, locked_again = run_executor(executor, fails, fails)
+
+        assert not locked and not locked_again
+        metrics = executor.get_metrics()
+        assert metrics["failed"] == 2
+        assert metrics["in_flight"] == 0
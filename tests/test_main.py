@@ -0,0 +1,346 @@
+import io
+import json
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+import metrics
+from metrics import MetricsRegistry
+from facade import GenderDetectionFacade
+from backend import main
+from backend.inference import InferenceExecutor
+
+
+@pytest.fixture
+def serve(test_config, temp_dir, monkeypatch):
+    """Call with config overrides to get a TestClient of backend.main on test_config"""
+    monkeypatch.chdir(temp_dir)  # temp_uploads is relative
+    monkeypatch.setattr(metrics, "REGISTRY", MetricsRegistry())
+    monkeypatch.setattr(main, "readiness", {"ready": False, "reason": "starting", "cold_start": None})
+    test_config.model_watch_interval = 0
+    test_config.warmup_iterations = 0
+
+    def make(**overrides):
+        for key, value in overrides.items():
+            setattr(test_config, key, value)
+        detector = GenderDetectionFacade(test_config)
+        monkeypatch.setattr(main, "detector", detector)
+        monkeypatch.setattr(main, "inference", InferenceExecutor(detector, test_config))
+        metrics.REGISTRY.configure(test_config)
+        return TestClient(main.app)
+
+    return make
+
+
+@pytest.fixture
+def trained_config(test_config, sample_dataset):
+    """test_config with a model trained on sample_dataset"""
+    GenderDetectionFacade(test_config).train_initial_model(str(sample_dataset))
+    return test_config
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def block_extraction(mocker):
+    """Make feature extraction wait until the returned event is set"""
+    release = threading.Event()
+    extractor = main.detector.feature_extractor
+    extract = extractor.extract_features
+
+    def blocked(*args, **kwargs):
+        release.wait(10)
+        return extract(*args, **kwargs)
+
+    mocker.patch.object(extractor, "extract_features", side_effect=blocked)
+    return release
+
+
+def post_clip(client, path):
+    with open(path, "rb") as f:
+        return client.post("/predict", files={"file": ("clip.wav", f, "audio/wav")})
+
+
+class TestAdmissionControl:
+    """Test 503 and 413 responses of the admission control"""
+
+    ADMISSION = dict(inference_mode="thread", inference_workers=1, batch_max_size=1,
+                     inference_max_concurrency=1, inference_max_queue=1)
+
+    def test_queue_full_gets_503(self, serve, trained_config, sample_audio_file, mocker):
+        """Test a request arriving with the queue full is refused before its body is read"""
+        with serve(inference_queue_timeout=10.0, **self.ADMISSION) as client:
+            release = block_extraction(mocker)
+            with ThreadPoolExecutor(2) as pool:
+                running = pool.submit(post_clip, client, sample_audio_file)
+                wait_for(lambda: main.inference.get_metrics()["in_flight"] == 1)
+                queued = pool.submit(post_clip, client, sample_audio_file)
+                wait_for(lambda: main.inference.get_metrics()["waiting"] == 1)
+
+                refused = post_clip(client, sample_audio_file)
+
+                release.set()
+                assert running.result().status_code == 200
+                assert queued.result().status_code == 200
+
+        assert refused.status_code == 503
+        assert 1 <= int(refused.headers["Retry-After"]) <= 60
+        assert main.inference.get_metrics()["rejected_queue_full"] == 1
+        assert 'events_total{event="rejected_queue_full"} 1' in metrics.REGISTRY.render()
+
+    def test_queue_timeout_gets_503(self, serve, trained_config, sample_audio_file, mocker):
+        """Test a request waiting past inference_queue_timeout gets 503 and Retry-After"""
+        with serve(inference_queue_timeout=0.2, **self.ADMISSION) as client:
+            release = block_extraction(mocker)
+            with ThreadPoolExecutor(1) as pool:
+                running = pool.submit(post_clip, client, sample_audio_file)
+                wait_for(lambda: main.inference.get_metrics()["in_flight"] == 1)
+
+                timed_out = post_clip(client, sample_audio_file)
+
+                release.set()
+                assert running.result().status_code == 200
+
+        assert timed_out.status_code == 503
+        assert "Retry-After" in timed_out.headers
+        assert main.inference.get_metrics()["rejected_timeout"] == 1
+        assert 'events_total{event="rejected_timeout"} 1' in metrics.REGISTRY.render()
+
+    def test_oversized_upload_gets_413(self, serve):
+        """Test uploads over max_upload_mb are refused on /predict and /predict/batch"""
+        client = serve(max_upload_mb=0.01)
+
+        clip = client.post("/predict", files={"file": ("big.wav", bytes(200 * 1024), "audio/wav")})
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as z:
+            z.writestr("big.wav", bytes(30 * 1024))
+        batch = client.post("/predict/batch",
+                            files={"archive": ("clips.zip", archive.getvalue(), "application/zip")})
+
+        assert clip.status_code == 413
+        assert batch.status_code == 413
+        assert 'events_total{event="rejected_upload_too_large"} 2' in metrics.REGISTRY.render()
+        assert not any(Path("temp_uploads").glob("*"))
+
+
+class TestPredictInputs:
+    """Test /predict/pcm and /predict/features with good and bad input"""
+
+    @pytest.mark.parametrize("dtype", ["float32", "int16"])
+    def test_pcm(self, serve, trained_config, sample_audio_file, dtype):
+        """Test raw PCM in either sample format is scored like the decoded clip"""
+        import numpy as np
+        import soundfile as sf
+        y, sample_rate = sf.read(str(sample_audio_file), dtype=dtype)
+
+        with serve() as client:
+            response = client.post(f"/predict/pcm?dtype={dtype}&sample_rate={sample_rate}",
+                                   content=y.astype(np.dtype(dtype).newbyteorder("<")).tobytes(),
+                                   headers={"Content-Type": "application/octet-stream"})
+
+        assert response.status_code == 200
+        assert response.json()["prediction"] in trained_config.label_map.values()
+
+    def test_pcm_bad_dtype(self, serve, trained_config):
+        """Test an unknown sample format is refused with the accepted ones"""
+        with serve() as client:
+            response = client.post("/predict/pcm?dtype=float64", content=bytes(800))
+
+        assert response.status_code == 422
+        assert "float32" in response.json()["detail"]
+
+    @pytest.mark.parametrize("features", [
+        [0.0] * 3,
+        [[0.0] * 3, [0.0] * 3],
+    ], ids=["one vector", "batch"])
+    def test_features_wrong_length(self, serve, trained_config, features):
+        """Test vectors of the wrong width name the expected width"""
+        with serve() as client:
+            response = client.post("/predict/features", json={"features": features})
+
+        assert response.status_code == 422
+        assert f"must have {2 * trained_config.n_mfcc} floats" in response.json()["detail"]
+
+    def test_features_ragged_batch(self, serve, trained_config):
+        """Test rows of different lengths get a clear message, not numpy's"""
+        width = 2 * trained_config.n_mfcc
+        with serve() as client:
+            response = client.post("/predict/features",
+                                   json={"features": [[0.0] * width, [0.0] * (width - 1)]})
+
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith(f"Each feature vector must have {width} floats")
+
+    def test_features_batch(self, serve, trained_config):
+        """Test a batch of valid vectors gets one prediction per vector"""
+        width = 2 * trained_config.n_mfcc
+        with serve() as client:
+            response = client.post("/predict/features", json={"features": [[0.0] * width] * 3})
+
+        assert response.status_code == 200
+        assert len(response.json()["predictions"]) == 3
+
+
+class TestTimings:
+    """Test the per-stage breakdown of /predict?timings=true"""
+
+    def test_spans_add_up_to_total(self, serve, trained_config, sample_audio_file, temp_dir):
+        """Test the stages of one request are reported and account for its total"""
+        import numpy as np
+        import soundfile as sf
+        clip = temp_dir / "other.wav"
+        sf.write(str(clip), np.random.randn(16000).astype(np.float32) * 0.1, 16000)
+
+        with serve() as client:
+            # The first request also loads the model, outside any stage; a
+            # different clip keeps the second out of the prediction cache
+            untimed = post_clip(client, sample_audio_file)
+            with open(clip, "rb") as f:
+                response = client.post("/predict?timings=true",
+                                       files={"file": ("clip.wav", f, "audio/wav")})
+
+        assert response.status_code == 200
+        timings = response.json()["timings"]
+        assert {"upload", "decode", "mfcc", "scale", "model", "feedback_enqueue",
+                "total"} <= set(timings)
+        assert all(seconds >= 0 for seconds in timings.values())
+        # Stages run one after the other; the rest is thread hand-offs
+        spans = sum(seconds for stage, seconds in timings.items() if stage != "total")
+        assert timings["total"] * 0.5 <= spans <= timings["total"]
+        assert untimed.json()["timings"] is None
+
+
+class TestReadiness:
+    """Test /ready as models come and go after startup"""
+
+    def wait_ready(self, client):
+        wait_for(lambda: client.get("/ready").status_code == 200)
+        return client.get("/ready").json()
+
+    def test_ready_after_reload(self, serve, test_config, sample_dataset):
+        """Test /ready turns 200 once a model trained after startup is loaded"""
+        with serve() as client:
+            response = client.get("/ready")
+            assert response.status_code == 503
+            assert response.json()["reason"] == "model not trained"
+
+            GenderDetectionFacade(test_config).train_initial_model(str(sample_dataset))
+            assert client.post("/admin/reload").status_code == 200
+
+            assert self.wait_ready(client)["model_version"] == main.detector.model_version
+
+    def test_watcher_load_makes_ready(self, serve, test_config, sample_dataset):
+        """Test a model picked up by the artifact watcher is warmed up and reported ready"""
+        with serve(model_watch_interval=0.05) as client:
+            assert client.get("/ready").status_code == 503
+
+            GenderDetectionFacade(test_config).train_initial_model(str(sample_dataset))
+
+            wait_for(lambda: main.readiness["ready"])
+            assert client.get("/ready").json()["ready"] is True
+
+    def test_failed_warm_up_is_retried(self, serve, trained_config, mocker):
+        """Test /ready recovers after a warm-up failure instead of staying 503"""
+        client = serve()
+        warm_up = main.detector.warm_up
+        calls = []
+
+        def flaky_warm_up(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError("artifacts not readable yet")
+            return warm_up(*args, **kwargs)
+
+        mocker.patch.object(main.detector, "warm_up", side_effect=flaky_warm_up)
+
+        with client:
+            wait_for(lambda: main.readiness["reason"] and "warm-up failed" in main.readiness["reason"])
+            assert client.get("/ready").status_code == 503
+
+            assert self.wait_ready(client)["ready"] is True
+            assert len(calls) == 2
+
+
+class TestFeedback:
+    """Test /feedback"""
+
+    def test_relabel_waits_for_other_worker(self, serve, test_config, sample_audio_file):
+        """Test a fresh request_id saved by another worker a moment later is still found"""
+        import uuid6
+        from feedback_manager import FeedbackManager
+        test_config.feedback_flush_interval = 0.05
+        request_id = str(uuid6.uuid7())
+        other_worker = FeedbackManager(test_config)
+
+        with serve() as client:
+            timer = threading.Timer(0.2, other_worker.save_feedback,
+                                    (str(sample_audio_file), 1, 1), {"request_id": request_id})
+            timer.start()
+            response = client.post("/feedback", json={"request_id": request_id, "correct_label": 0})
+            timer.join()
+
+            unknown = client.post("/feedback", json={"request_id": "not-a-uuid", "correct_label": 0})
+
+        assert response.status_code == 200
+        assert main.detector.feedback_manager.get_feedback(request_id)["correct_class"] == "Female"
+        assert unknown.status_code == 404
+
+
+class TestRetrain:
+    """Test /admin/retrain"""
+
+    def test_triggered_job_is_collected(self, serve, trained_config, sample_dataset, temp_dir):
+        """Test a job started over the API finishes without a periodic scheduler check"""
+        import numpy as np
+        import soundfile as sf
+        client = serve(n_estimators=10, retrain_check_interval=0.0, retrain_memory_limit_mb=0,
+                       retrain_max_accuracy_drop=1.0, retrain_data_dir=str(sample_dataset))
+        for i in range(6):
+            path = temp_dir / f"feedback_{i}.wav"
+            sf.write(str(path), np.random.randn(16000).astype(np.float32), 16000)
+            main.detector.feedback_manager.save_feedback(str(path), predicted_label=0,
+                                                         correct_label=i % 2)
+
+        with client:
+            started = client.post("/admin/retrain")
+            assert started.status_code == 200
+            assert client.post("/admin/retrain").status_code == 409
+
+            wait_for(lambda: not client.get("/admin/retrain").json()["running"], timeout=300)
+            status = client.get("/admin/retrain").json()
+
+            assert client.post("/admin/retrain").status_code == 200
+
+        assert status["last_result"]["status"] == "accepted"
+        assert status["trained_feedback_total"] == 6
+
+    def test_batch_feedback_can_be_relabelled(self, serve, trained_config, sample_audio_file):
+        """Test /predict/batch with save_feedback returns request_ids /feedback accepts"""
+        with serve() as client:
+            clips = [("files", (f"clip_{i}.wav", sample_audio_file.read_bytes(), "audio/wav"))
+                     for i in range(3)]
+            response = client.post("/predict/batch", files=clips, data={"save_feedback": "true"})
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            results, summary = lines[:-1], lines[-1]
+
+            relabelled = [client.post("/feedback", json={"request_id": result["request_id"],
+                                                         "correct_label": 1 - result["label_id"]})
+                          for result in results]
+
+        assert response.status_code == 200
+        assert summary["done"] and summary["count"] == 3 and summary["errors"] == 0
+        assert len({result["request_id"] for result in results}) == 3
+        assert all(r.status_code == 200 for r in relabelled)
+        manager = main.detector.feedback_manager
+        for result in results:
+            entry = manager.get_feedback(result["request_id"])
+            assert entry["correct_class"] == trained_config.label_map[1 - result["label_id"]]
+        assert not any(Path("temp_uploads").glob("*.wav"))
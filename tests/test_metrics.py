@@ -0,0 +1,72 @@
+import pytest
+import metrics
+from metrics import MetricsRegistry, Histogram
+from feature_extractor import AudioFeatureExtractor
+
+
+class TestMetrics:
+    """Test MetricsRegistry and its metric types"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts, sum and count in the text format"""
+        histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, "mfcc")
+
+        lines = list(histogram.samples())
+
+        assert 'gender_detection_test_seconds_bucket{stage="mfcc",le="0.1"} 2' in lines
+        assert 'gender_detection_test_seconds_bucket{stage="mfcc",le="1.0"} 3' in lines
+        assert 'gender_detection_test_seconds_bucket{stage="mfcc",le="+Inf"} 4' in lines
+        assert 'gender_detection_test_seconds_count{stage="mfcc"} 4' in lines
+        assert 'gender_detection_test_seconds_sum{stage="mfcc"} 2.65' in lines
+
+    def test_disabled_records_nothing(self):
+        """Test a disabled registry hands out a shared no-op stage"""
+        registry = MetricsRegistry()
+
+        with registry.stage("mfcc"):
+            pass
+        registry.observe("model", 0.1)
+        registry.inc("prediction_cache_hit")
+
+        assert registry.stage("mfcc") is registry.stage("load")
+        assert "stage=" not in registry.render()
+        assert "event=" not in registry.render()
+
+    def test_stage_counts_errors(self):
+        """Test a stage that raises is timed and counted as an error"""
+        registry = MetricsRegistry()
+        registry.enabled = True
+
+        with pytest.raises(ValueError):
+            with registry.stage("load"):
+                raise ValueError("bad file")
+
+        text = registry.render()
+        assert 'gender_detection_stage_errors_total{stage="load"} 1' in text
+        assert 'gender_detection_stage_seconds_count{stage="load"} 1' in text
+        assert "# TYPE gender_detection_stage_seconds histogram" in text
+
+    def test_feature_extraction_stages(self, test_config, sample_audio_file, monkeypatch):
+        """Test feature extraction records the decode and mfcc stages"""
+        registry = MetricsRegistry()
+        registry.enabled = True
+        monkeypatch.setattr(metrics, "REGISTRY", registry)
+
+        AudioFeatureExtractor(test_config).extract_features(str(sample_audio_file))
+
+        text = registry.render()
+        assert 'gender_detection_stage_seconds_count{stage="decode"} 1' in text
+        assert 'gender_detection_stage_seconds_count{stage="mfcc"} 1' in text
+
+    def test_gauge_reads_callback(self):
+        """Test a gauge reports its callback's value at render time"""
+        registry = MetricsRegistry()
+        depth = [3]
+        registry.add_gauge("queue_depth", "Queued requests", lambda: depth[0])
+
+        assert "gender_detection_queue_depth 3" in registry.render()
+        depth[0] = 0
+        assert "gender_detection_queue_depth 0" in registry.render()
+        assert "# TYPE gender_detection_queue_depth gauge" in registry.render()
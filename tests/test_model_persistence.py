@@ -1,5 +1,5 @@
 import pytest
-from model_persistence import ModelPersistence
+from model_persistence import ModelPersistence, ArtifactMismatch
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 
@@ -75,3 +75,72 @@ class TestModelPersistence:
         assert config['sample_rate'] == test_config.sample_rate
         assert config['n_mfcc'] == test_config.n_mfcc
         assert 'metrics' in config
+    
+    def test_save_and_load_compressed(self, test_config, sample_training_data):
+        """Test compressed artifacts round-trip and shrink the model file"""
+        X, y = sample_training_data
+        
+        model = RandomForestClassifier(n_estimators=10, random_state=42)
+        scaler = StandardScaler()
+        model.fit(scaler.fit_transform(X), y)
+        
+        persistence = ModelPersistence(test_config)
+        persistence.save_model(model, scaler)
+        raw_size = persistence.model_path.stat().st_size
+        
+        test_config.compression_codec = "zlib"
+        test_config.compression_level = 3
+        persistence = ModelPersistence(test_config)
+        persistence.save_model(model, scaler)
+        
+        assert persistence.model_path.stat().st_size < raw_size
+        assert persistence.load_config()['compression']['codec'] == "zlib"
+        
+        loaded_model, loaded_scaler = persistence.load_model()
+        assert (loaded_model.predict(loaded_scaler.transform(X))
+                == model.predict(scaler.transform(X))).all()
+    
+    def test_interrupted_save_is_detected(self, test_config, sample_training_data, mocker):
+        """Test a save stopped between files is refused instead of mixing artifacts"""
+        X, y = sample_training_data
+        scaler = StandardScaler().fit(X)
+        model = RandomForestClassifier(n_estimators=5, random_state=42).fit(scaler.transform(X), y)
+        
+        persistence = ModelPersistence(test_config)
+        version = persistence.save_model(model, scaler)
+        assert persistence.load_versioned()[2] == version
+        
+        # The new model is written, then the save dies before the scaler
+        dump = persistence._atomic_dump
+        calls = []
+        
+        def dies_after_model(obj, path):
+            calls.append(path)
+            if path != persistence.model_path:
+                raise OSError("killed")
+            dump(obj, path)
+        
+        mocker.patch.object(persistence, "_atomic_dump", side_effect=dies_after_model)
+        with pytest.raises(OSError):
+            persistence.save_model(model, scaler)
+        assert calls == [persistence.model_path, persistence.scaler_path]
+        
+        with pytest.raises(ArtifactMismatch):
+            persistence.load_model()
+    
+    def test_unsupported_codec(self, test_config):
+        """Test unknown compression codec is rejected"""
+        test_config.compression_codec = "snappy"
+        
+        with pytest.raises(ValueError):
+            ModelPersistence(test_config)
+    
+    def test_lz4_needs_package(self, test_config, monkeypatch):
+        """Test lz4 is rejected up front when the lz4 package is missing"""
+        import model_persistence
+        monkeypatch.setattr(model_persistence, "SUPPORTED_CODECS",
+                            tuple(c for c in model_persistence.SUPPORTED_CODECS if c != "lz4"))
+        test_config.compression_codec = "lz4"
+        
+        with pytest.raises(ValueError, match="lz4 package"):
+            ModelPersistence(test_config)
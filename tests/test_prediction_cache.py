@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+from prediction_cache import PredictionCache, ENTRY_OVERHEAD_BYTES
+
+
+def make_result(version="v1", label=0):
+    return {
+        "prediction": "Female" if label == 0 else "Male",
+        "label_id": label,
+        "confidence": 0.9,
+        "probabilities": {"Female": 0.9, "Male": 0.1},
+        "audio_path": "clip.wav",
+        "model_version": version,
+        "features": np.zeros(80)
+    }
+
+
+class TestPredictionCache:
+    """Test PredictionCache class"""
+
+    def test_hit_and_miss(self, test_config):
+        """Test a stored result is returned for the same digest and version"""
+        cache = PredictionCache(test_config)
+
+        assert cache.get("abc", "v1") is None
+        cache.put("abc", make_result())
+        hit = cache.get("abc", "v1")
+
+        assert hit["prediction"] == "Female"
+        assert cache.get_metrics()["hits"] == 1
+        assert cache.get_metrics()["misses"] == 1
+        assert cache.get_metrics()["hit_rate"] == 0.5
+
+    def test_new_model_version_invalidates(self, test_config):
+        """Test looking up another model version clears the cache"""
+        cache = PredictionCache(test_config)
+        cache.put("abc", make_result("v1"))
+
+        assert cache.get("abc", "v2") is None
+        assert cache.get_metrics()["entries"] == 0
+
+        # A late result from the old model is not stored
+        cache.put("def", make_result("v2"))
+        cache.put("abc", make_result("v1"))
+        assert cache.get("abc", "v2") is None
+        assert cache.get("def", "v2") is not None
+
+    def test_lru_eviction(self, test_config):
+        """Test the least recently used entry goes first"""
+        test_config.prediction_cache_size = 2
+        cache = PredictionCache(test_config)
+        cache.put("a", make_result())
+        cache.put("b", make_result())
+        cache.get("a", "v1")
+        cache.put("c", make_result())
+
+        assert cache.get("b", "v1") is None
+        assert cache.get("a", "v1") is not None
+        assert cache.get_metrics()["evictions"] == 1
+
+    def test_memory_bound(self, test_config):
+        """Test entries are evicted to stay under the byte limit"""
+        entry_bytes = ENTRY_OVERHEAD_BYTES + np.zeros(80).nbytes
+        test_config.prediction_cache_max_mb = 3.5 * entry_bytes / (1024 * 1024)
+        cache = PredictionCache(test_config)
+        for digest in "abcde":
+            cache.put(digest, make_result())
+
+        metrics = cache.get_metrics()
+        assert metrics["entries"] == 3
+        assert metrics["bytes"] <= metrics["max_bytes"]
+
+    def test_ttl_expiry(self, test_config, monkeypatch):
+        """Test entries older than the TTL are not returned"""
+        test_config.prediction_cache_ttl = 10
+        cache = PredictionCache(test_config)
+        now = [1000.0]
+        monkeypatch.setattr("prediction_cache.time.monotonic", lambda: now[0])
+        cache.put("abc", make_result())
+
+        now[0] += 11
+        assert cache.get("abc", "v1") is None
+        assert cache.get_metrics()["expirations"] == 1
+
+    def test_disabled(self, test_config):
+        """Test a size of 0 disables the cache"""
+        test_config.prediction_cache_size = 0
+        cache = PredictionCache(test_config)
+        cache.put("abc", make_result())
+
+        assert not cache.enabled
+        assert cache.get("abc", "v1") is None
@@ -0,0 +1,76 @@
+import pytest
+from profiler import RequestProfiler, SAMPLE_RATE_ENV, _NO_SAMPLE
+
+
+def busy_work():
+    return sum(i * i for i in range(10000))
+
+
+class TestRequestProfiler:
+    """Test RequestProfiler class"""
+
+    def test_disabled_by_default(self, test_config):
+        """Test nothing is profiled or written at the default sample rate"""
+        profiler = RequestProfiler(test_config)
+
+        with profiler.sample("predict") as sample:
+            busy_work()
+
+        assert sample is _NO_SAMPLE
+        assert not profiler.profile_dir.exists()
+        assert profiler.get_status()["enabled"] is False
+
+    def test_sampled_request_writes_report(self, test_config):
+        """Test a sampled block leaves a report with functions and allocations"""
+        test_config.profiling_sample_rate = 1.0
+        profiler = RequestProfiler(test_config)
+
+        with profiler.sample("predict"):
+            busy_work()
+
+        reports = list(profiler.profile_dir.glob("*-predict.txt"))
+        assert len(reports) == 1
+        text = reports[0].read_text()
+        assert "busy_work" in text
+        assert "# allocations" in text
+        assert profiler.get_status()["profiles_written"] == 1
+
+    def test_rotation_keeps_newest(self, test_config):
+        """Test reports beyond profiling_max_files are deleted oldest first"""
+        test_config.profiling_sample_rate = 1.0
+        test_config.profiling_tracemalloc = False
+        test_config.profiling_max_files = 2
+        profiler = RequestProfiler(test_config)
+
+        for _ in range(4):
+            with profiler.sample("predict"):
+                busy_work()
+
+        reports = sorted(path.name for path in profiler.profile_dir.glob("*.txt"))
+        assert len(reports) == 2
+        assert reports[-1].split("-")[2] == "000004"
+        assert profiler.get_status()["profiles_deleted"] == 2
+
+    def test_concurrent_sample_is_skipped(self, test_config):
+        """Test a sample coming up while another runs is not profiled"""
+        test_config.profiling_sample_rate = 1.0
+        test_config.profiling_tracemalloc = False
+        profiler = RequestProfiler(test_config)
+
+        with profiler.sample("outer"):
+            inner = profiler.sample("inner")
+
+        assert inner is _NO_SAMPLE
+        assert profiler.get_status()["samples_skipped_busy"] == 1
+
+    def test_env_var_and_runtime_toggle(self, test_config, monkeypatch):
+        """Test the environment variable overrides the config and rates are validated"""
+        monkeypatch.setenv(SAMPLE_RATE_ENV, "0.25")
+        profiler = RequestProfiler(test_config)
+        assert profiler.sample_rate == 0.25
+
+        profiler.set_sample_rate(0)
+        assert profiler.get_status()["enabled"] is False
+
+        with pytest.raises(ValueError):
+            profiler.set_sample_rate(1.5)
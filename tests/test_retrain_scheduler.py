@@ -0,0 +1,146 @@
+import pytest
+import numpy as np
+import soundfile as sf
+from datetime import datetime, timedelta
+from facade import GenderDetectionFacade
+from feedback_manager import FeedbackManager
+from model_persistence import ModelPersistence
+from retrain_scheduler import RetrainScheduler, run_retrain_job
+
+
+def add_feedback(manager, temp_dir, count):
+    for i in range(count):
+        path = temp_dir / f"feedback_{i}.wav"
+        sf.write(str(path), np.random.randn(16000).astype(np.float32), 16000)
+        manager.save_feedback(str(path), predicted_label=0, correct_label=i % 2)
+
+
+class TestRetrainScheduler:
+    """Test RetrainScheduler class"""
+
+    def make_scheduler(self, config, on_accepted=None):
+        return RetrainScheduler(config, FeedbackManager(config), ModelPersistence(config),
+                                on_accepted or (lambda report: None))
+
+    def test_due_on_feedback_count(self, test_config, temp_dir):
+        """Test a retrain is due once enough new feedback has arrived"""
+        test_config.feedback_threshold = 3
+        scheduler = self.make_scheduler(test_config)
+
+        add_feedback(scheduler.feedback_manager, temp_dir, 2)
+        assert scheduler.due() is None
+
+        add_feedback(scheduler.feedback_manager, temp_dir, 1)
+        assert scheduler.due() is not None
+
+    def test_due_on_feedback_age(self, test_config, temp_dir):
+        """Test a few samples trigger a retrain once they have waited long enough"""
+        test_config.retrain_max_age_hours = 24
+        scheduler = self.make_scheduler(test_config)
+        add_feedback(scheduler.feedback_manager, temp_dir, 1)
+
+        now = datetime.now()
+        assert scheduler.due(now) is None
+        assert scheduler.due(now + timedelta(hours=25)) is not None
+
+    def test_no_feedback_not_due(self, test_config):
+        """Test nothing is due without new feedback"""
+        scheduler = self.make_scheduler(test_config)
+
+        assert scheduler.due(datetime.now() + timedelta(days=30)) is None
+
+    def test_run_retrain_job_accepted(self, test_config, sample_dataset, temp_dir):
+        """Test a candidate within the accuracy tolerance is accepted and saved"""
+        test_config.n_estimators = 10
+        test_config.retrain_max_accuracy_drop = 1.0
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        add_feedback(facade.feedback_manager, temp_dir, 6)
+
+        report = run_retrain_job(test_config, str(sample_dataset))
+
+        assert report['status'] == "accepted"
+        assert report['validation']['active_accuracy'] is not None
+        assert facade.model_persistence.candidate_exists()
+
+    def test_run_retrain_job_rejected(self, test_config, sample_dataset, temp_dir):
+        """Test a candidate worse than the active model is rejected"""
+        test_config.n_estimators = 10
+        # Demand an impossible improvement: on the 2-clip holdout, -1.0
+        # still passes a candidate scoring 2/2 against an active model's 0/2
+        test_config.retrain_max_accuracy_drop = -1.5
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        add_feedback(facade.feedback_manager, temp_dir, 6)
+
+        report = run_retrain_job(test_config, str(sample_dataset))
+
+        assert report['status'] == "rejected"
+
+    def test_holdout_from_original_data(self, test_config, sample_dataset, temp_dir):
+        """Test candidates are validated on held-out original data, not feedback"""
+        test_config.n_estimators = 10
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        add_feedback(facade.feedback_manager, temp_dir, 6)
+
+        report = run_retrain_job(test_config, str(sample_dataset))
+
+        assert report['validation']['holdout_source'] == "original"
+        assert report['validation']['holdout_samples'] == 2  # 20% of the 10 original clips
+        assert report['samples'] == 16
+
+    def test_feedback_only_candidate_not_promoted(self, test_config, sample_dataset, temp_dir):
+        """Test a candidate validated on feedback alone is shadowed, not promoted"""
+        test_config.n_estimators = 10
+        test_config.retrain_max_accuracy_drop = 1.0
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        previous_version = facade.model_version
+        add_feedback(facade.feedback_manager, temp_dir, 10)
+
+        report = run_retrain_job(test_config)
+        facade._apply_retrained(report)
+
+        assert report['status'] == "accepted"
+        assert report['validation']['holdout_source'] == "feedback"
+        assert facade.model_version == previous_version
+        assert facade.model_persistence.candidate_exists()
+        assert facade.get_shadow_stats()['candidate_version'] == report['candidate_version']
+
+    def test_scheduler_opt_in(self, test_config):
+        """Test the scheduler thread only runs when a check interval is configured"""
+        scheduler = self.make_scheduler(test_config)
+        scheduler.start()
+
+        assert scheduler._thread is None
+
+    def test_run_retrain_job_without_feedback(self, test_config):
+        """Test the job is skipped when there is no feedback"""
+        report = run_retrain_job(test_config)
+
+        assert report['status'] == "skipped"
+
+    def test_worker_process_promotes(self, test_config, sample_dataset, temp_dir):
+        """Test a triggered job trains in a separate process and is promoted"""
+        test_config.n_estimators = 10
+        test_config.retrain_memory_limit_mb = 0
+        test_config.retrain_max_accuracy_drop = 1.0
+        test_config.retrain_data_dir = str(sample_dataset)
+        facade = GenderDetectionFacade(test_config)
+        facade.train_initial_model(str(sample_dataset))
+        previous_version = facade.model_version
+        add_feedback(facade.feedback_manager, temp_dir, 6)
+
+        assert facade.retrain_scheduler.trigger()
+        assert not facade.retrain_scheduler.trigger()  # one job at a time
+        report = facade.retrain_scheduler.wait(timeout=300)
+
+        assert report['status'] == "accepted"
+        assert facade.model_version != previous_version
+        assert not facade.model_persistence.candidate_exists()
+
+        status = facade.retrain_scheduler.get_status()
+        assert not status['running']
+        assert status['trained_feedback_total'] == 6
+        assert facade.retrain_scheduler.due() is None
@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from shadow_scorer import ShadowScorer
+from model_persistence import ModelPersistence
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+
+@pytest.fixture
+def candidate_persistence(test_config, sample_training_data):
+    """Persistence with a saved candidate model"""
+    X, y = sample_training_data
+    
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    model.fit(scaler.fit_transform(X), y)
+    
+    persistence = ModelPersistence(test_config)
+    persistence.save_model(model, scaler, {'accuracy': 0.9}, candidate=True)
+    return persistence
+
+
+class TestShadowScorer:
+    """Test ShadowScorer class"""
+    
+    def test_no_candidate(self, test_config):
+        """Test nothing is sampled without a candidate"""
+        scorer = ShadowScorer(test_config, ModelPersistence(test_config))
+        
+        assert scorer.load_candidate() is None
+        assert not scorer.submit(np.zeros(80), 0, np.array([1.0, 0.0]), 0.001)
+        assert scorer.get_stats()['scored'] == 0
+    
+    def test_scores_sampled_requests(self, test_config, candidate_persistence,
+                                     sample_features):
+        """Test sampled requests are scored and aggregated off the caller thread"""
+        test_config.shadow_sample_rate = 1.0
+        scorer = ShadowScorer(test_config, candidate_persistence)
+        
+        assert scorer.load_candidate() is not None
+        for _ in range(5):
+            assert scorer.submit(sample_features, 1, np.array([0.2, 0.8]), 0.001, "v1")
+        scorer.close()
+        
+        stats = scorer.get_stats()
+        assert stats['scored'] == 5
+        assert 0 <= stats['agreement_rate'] <= 1
+        assert stats['candidate_latency_mean'] > 0
+        assert stats['active_versions'] == {"v1": 5}
+    
+    def test_stats_persisted_and_resumed(self, test_config, candidate_persistence,
+                                         sample_features):
+        """Test statistics survive a restart for the same candidate"""
+        test_config.shadow_sample_rate = 1.0
+        scorer = ShadowScorer(test_config, candidate_persistence)
+        scorer.load_candidate()
+        scorer.submit(sample_features, 0, np.array([0.6, 0.4]), 0.001)
+        scorer.close()
+        
+        assert candidate_persistence.shadow_stats_path.exists()
+        
+        restarted = ShadowScorer(test_config, candidate_persistence)
+        restarted.load_candidate()
+        assert restarted.get_stats()['scored'] == 1
+    
+    def test_sample_rate_zero(self, test_config, candidate_persistence, sample_features):
+        """Test unsampled requests are not scored"""
+        test_config.shadow_sample_rate = 0.0
+        scorer = ShadowScorer(test_config, candidate_persistence)
+        scorer.load_candidate()
+        
+        assert not scorer.submit(sample_features, 0, np.array([0.6, 0.4]), 0.001)
+        scorer.close()
+        assert scorer.get_stats()['sampled'] == 0
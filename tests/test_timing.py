@@ -0,0 +1,63 @@
+import threading
+import contextvars
+import metrics
+import timing
+from metrics import MetricsRegistry
+from timing import SpanRecorder
+
+
+class TestSpanRecorder:
+    """Test SpanRecorder class"""
+
+    def test_spans_accumulate(self):
+        """Test a span entered twice adds up and total covers the recorder's life"""
+        recorder = SpanRecorder()
+
+        with recorder.span("decode"):
+            pass
+        recorder.add("decode", 0.5)
+        recorder.add("model", 0.25)
+
+        spans = recorder.to_dict()
+        assert spans["decode"] >= 0.5
+        assert spans["model"] == 0.25
+        assert spans["total"] >= 0
+
+    def test_record_only_while_active(self):
+        """Test record() reaches the active recorder and is a no-op otherwise"""
+        timing.record("model", 1.0)
+        assert timing.current() is None
+
+        with timing.recording() as recorder:
+            assert timing.current() is recorder
+            timing.record("model", 1.0)
+
+        assert timing.current() is None
+        assert recorder.spans() == {"model": 1.0}
+
+        with timing.recording(False) as recorder:
+            assert recorder is None
+
+    def test_metrics_stages_feed_recorder(self, monkeypatch):
+        """Test metrics stages are recorded even while the registry is disabled"""
+        registry = MetricsRegistry()
+        monkeypatch.setattr(metrics, "REGISTRY", registry)
+
+        with timing.recording() as recorder:
+            with metrics.stage("mfcc"):
+                pass
+            metrics.observe("scale", 0.125)
+
+        assert set(recorder.spans()) == {"mfcc", "scale"}
+        assert "stage=" not in registry.render()
+
+    def test_copied_context_reaches_thread(self):
+        """Test a thread run with a copy of the context records into the same recorder"""
+        with timing.recording() as recorder:
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run,
+                                      args=(timing.record, "decode", 0.5))
+            thread.start()
+            thread.join()
+
+        assert recorder.spans() == {"decode": 0.5}